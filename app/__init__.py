@@ -27,13 +27,28 @@ def create_app(config_class=Config):
     login_manager.login_message = 'Por favor, faça login para acessar esta página.'
     login_manager.login_message_category = 'warning'
 
+    # Pool de conexões e timeouts do banco (Config.DB_*); opções explícitas em
+    # SQLALCHEMY_ENGINE_OPTIONS têm prioridade
+    from app.banco import opcoes_engine, registrar_eventos_banco
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **opcoes_engine(app.config), **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
+
     db.init_app(app)
+    with app.app_context():
+        registrar_eventos_banco(app, db.engine)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     #bootstrap.init_app(app)
     # Importante: Inicializa o SocketIO com a app
     # A opção cors_allowed_origins é importante para desenvolvimento
-    socketio.init_app(app, cors_allowed_origins="*")
+    # A fila de mensagens (Config.SOCKETIO_MESSAGE_QUEUE) permite escalar os workers
+    from app.pubsub import opcoes_fila_socketio
+    socketio.init_app(app, cors_allowed_origins="*", **opcoes_fila_socketio(app.config))
+
+    # Handlers de eventos em tempo real (entrada nas salas de condomínio/portaria)
+    from app.events import setup_events
+    setup_events(socketio)
 
     # Registro dos Blueprints
     # O Blueprint 'main' é o principal e deve ser registrado primeiro
@@ -50,16 +65,55 @@ def create_app(config_class=Config):
     from app.sindico import routes as sindico_routes
     app.register_blueprint(sindico_routes.sindico)
 
+    # Consolidado diário de acessos mantido a cada flush
+    from app.rollup import registrar_eventos_rollup
+    registrar_eventos_rollup()
+
+    # Texto normalizado para a busca de profissionais e moradores
+    from app.busca import registrar_eventos_busca
+    registrar_eventos_busca()
+
+    # Cache por condomínio, invalidado nos commits que alteram o condomínio
+    from app.cache import cache_condominio
+    cache_condominio.init_app(app)
+
+    # Limite de tentativas de login por IP e por e-mail
+    from app.limitador import limitador_login
+    limitador_login.init_app(app)
+
+    # Cache das imagens de QR Code (memória e disco)
+    from app.qrcodes import cache_qrcodes
+    cache_qrcodes.init_app(app)
+
+    # Tempo, consultas SQL e renderização por endpoint, expostos em /metrics
+    from app.metricas import metricas_requisicao
+    with app.app_context():
+        metricas_requisicao.init_app(app, db.engine)
+
+    # Consultas acima de CONSULTA_LENTA_MS, visíveis em /admin/consultas_lentas
+    from app.consultas_lentas import registro_consultas_lentas
+    with app.app_context():
+        registro_consultas_lentas.init_app(app, db.engine)
+
+    # Encerramento automático dos acessos esquecidos em aberto
+    from app.transicoes import iniciar_encerramento_automatico
+    iniciar_encerramento_automatico(app)
+
+    # Comandos de linha de comando (flask rollup backfill, ...)
+    from app.cli import registrar_comandos
+    registrar_comandos(app)
+
     # User loader function for Flask-Login
-    from app.models import User
+    # A identidade fica na sessão e só é relida do banco quando muda ou expira
+    from app.identidade import carregar_identidade
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return carregar_identidade(user_id)
 
     # Contexto para o Flask shell (útil para depuração)
-    from app.models import User, Condominio, Profissional, Acesso, Portaria, Plano
+    from app.models import User, Condominio, Profissional, Acesso, Portaria, Plano, AcessoDiario
     @app.shell_context_processor
     def make_shell_context():
-        return {'db': db, 'User': User, 'Condominio': Condominio, 'Profissional': Profissional, 'Acesso': Acesso, 'Portaria': Portaria, 'Plano': Plano}
+        return {'db': db, 'User': User, 'Condominio': Condominio, 'Profissional': Profissional, 'Acesso': Acesso, 'Portaria': Portaria, 'Plano': Plano, 'AcessoDiario': AcessoDiario}
 
     return app
\ No newline at end of file
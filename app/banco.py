@@ -0,0 +1,160 @@
+# app/banco.py
+# Opções do engine do SQLAlchemy (pool de conexões, timeouts) lidas do Config
+# e métricas do pool.
+#
+# Com o GeventWebSocketWorker, centenas de greenlets disputam o mesmo pool.
+# A classe PoolInstrumentado mede quanto tempo cada checkout esperou por uma
+# conexão livre, quantos estouraram DB_POOL_TIMEOUT e quanto do overflow está
+# em uso, para que a fila no pool apareça antes de virar lentidão na portaria.
+#
+# Modo DB_POOLER='pgbouncer' (pooling por transação): cada transação pode cair
+# em uma conexão diferente do servidor, então
+#   - prepared statements do lado do servidor ficam desligados (psycopg 3 os
+#     cria automaticamente; o psycopg2 nunca os usa);
+#   - o statement_timeout é aplicado com SET LOCAL a cada transação, pois o
+#     parâmetro de inicialização 'options' não passa pelo PgBouncer;
+#   - LISTEN/NOTIFY (SOCKETIO_MESSAGE_QUEUE='postgresql') precisa de uma URL
+#     direta para o PostgreSQL, sem o PgBouncer.
+
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as TimeoutPool
+from sqlalchemy.pool import QueuePool
+
+# Limites (em segundos) do histograma de espera por conexão
+FAIXAS_ESPERA = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class EstatisticasPool:
+    """
+    Contadores de uso do pool de conexões, acumulados desde o início do processo.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+        self.esperas_por_faixa = [0] * (len(FAIXAS_ESPERA) + 1)
+        self.timeouts = 0
+        self.conexoes_abertas = 0
+        self.conexoes_invalidadas = 0
+        self.pool = None
+
+    def registrar_espera(self, segundos):
+        self.checkouts += 1
+        self.espera_total += segundos
+        self.espera_maxima = max(self.espera_maxima, segundos)
+        for indice, limite in enumerate(FAIXAS_ESPERA):
+            if segundos <= limite:
+                self.esperas_por_faixa[indice] += 1
+                break
+        else:
+            self.esperas_por_faixa[-1] += 1
+
+    def resumo(self):
+        pool = self.pool
+        return {
+            'tamanho': pool.size() if pool is not None else None,
+            'em_uso': pool.checkedout() if pool is not None else None,
+            'livres': pool.checkedin() if pool is not None else None,
+            # Negativo enquanto o pool ainda não abriu todas as conexões fixas
+            'overflow': pool.overflow() if pool is not None else None,
+            'max_overflow': getattr(pool, '_max_overflow', None),
+            'checkouts': self.checkouts,
+            'espera_total_s': round(self.espera_total, 6),
+            'espera_media_ms': round(self.espera_total / self.checkouts * 1000, 3) if self.checkouts else None,
+            'espera_maxima_ms': round(self.espera_maxima * 1000, 3),
+            'esperas_por_faixa': dict(zip([f'<={limite}s' for limite in FAIXAS_ESPERA] + ['>5.0s'], self.esperas_por_faixa)),
+            'timeouts': self.timeouts,
+            'conexoes_abertas': self.conexoes_abertas,
+            'conexoes_invalidadas': self.conexoes_invalidadas,
+        }
+
+
+estatisticas_pool = EstatisticasPool()
+
+
+class PoolInstrumentado(QueuePool):
+    """
+    QueuePool que mede o tempo de espera de cada checkout.
+    """
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except TimeoutPool:
+            estatisticas_pool.timeouts += 1
+            raise
+        estatisticas_pool.registrar_espera(time.perf_counter() - inicio)
+        return conexao
+
+
+def _driver(url):
+    esquema = url.split('://', 1)[0]
+    dialeto, _, driver = esquema.partition('+')
+    return dialeto, driver
+
+def opcoes_engine(config):
+    """
+    Monta SQLALCHEMY_ENGINE_OPTIONS a partir do Config. Opções de pool só valem
+    para bancos de rede; o SQLite mantém o pool padrão do SQLAlchemy.
+    """
+    dialeto, driver = _driver(config['SQLALCHEMY_DATABASE_URI'])
+    if dialeto == 'sqlite':
+        return {}
+
+    opcoes = {
+        'poolclass': PoolInstrumentado,
+        'pool_size': config.get('DB_POOL_SIZE', 10),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 10),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+    }
+
+    connect_args = {}
+    timeout_ms = config.get('DB_STATEMENT_TIMEOUT_MS')
+    pgbouncer = config.get('DB_POOLER') == 'pgbouncer'
+    if dialeto == 'postgresql':
+        if pgbouncer and driver == 'psycopg':
+            # psycopg 3 prepara consultas repetidas no servidor; com pooling por
+            # transação o prepared statement pode não existir na próxima conexão
+            connect_args['prepare_threshold'] = None
+        if timeout_ms and not pgbouncer:
+            connect_args['options'] = f'-c statement_timeout={int(timeout_ms)}'
+    if connect_args:
+        opcoes['connect_args'] = connect_args
+    return opcoes
+
+
+def _ao_conectar(conexao_dbapi, registro):
+    estatisticas_pool.conexoes_abertas += 1
+
+def _ao_invalidar(conexao_dbapi, registro, excecao):
+    estatisticas_pool.conexoes_invalidadas += 1
+
+def registrar_eventos_banco(app, engine):
+    """
+    Liga as métricas ao pool do engine e, no modo PgBouncer, o statement_timeout por transação.
+    """
+    if isinstance(engine.pool, PoolInstrumentado):
+        estatisticas_pool.pool = engine.pool
+    if not event.contains(engine.pool, 'connect', _ao_conectar):
+        event.listen(engine.pool, 'connect', _ao_conectar)
+        event.listen(engine.pool, 'invalidate', _ao_invalidar)
+
+    timeout_ms = app.config.get('DB_STATEMENT_TIMEOUT_MS')
+    if (app.config.get('DB_POOLER') == 'pgbouncer' and timeout_ms
+            and engine.dialect.name == 'postgresql'):
+        comando = f'SET LOCAL statement_timeout = {int(timeout_ms)}'
+
+        @event.listens_for(engine, 'begin')
+        def _timeout_da_transacao(conexao):
+            # Direto no cursor DBAPI: executar pela Connection aqui reabriria a transação.
+            # O driver abre a transação no primeiro comando, então o SET LOCAL vale para ela.
+            cursor = conexao.connection.cursor()
+            try:
+                cursor.execute(comando)
+            finally:
+                cursor.close()
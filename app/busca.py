@@ -0,0 +1,130 @@
+# app/busca.py
+# Busca aproximada de profissionais e moradores para a portaria.
+#
+# Cada Profissional e User guarda em termos_busca o texto pesquisável já
+# normalizado (minúsculas, sem acentos), atualizado a cada INSERT/UPDATE pelo
+# ORM. Os termos digitados passam pela mesma normalização, então a busca não
+# diferencia acentos nem maiúsculas em nenhum banco.
+#
+# No PostgreSQL, termos_busca tem índice GIN de trigramas (pg_trgm), que atende
+# tanto LIKE '%trecho%' quanto a semelhança por palavra (operador <%), usada
+# para tolerar erros de digitação. No SQLite (testes), vale apenas o LIKE.
+
+import unicodedata
+from sqlalchemy import and_, case, event, func, literal, or_
+from app.models import Profissional, User, db, normalizar_cpf, normalizar_placa
+
+LIMITE_SUGESTOES = 10
+TAMANHO_MINIMO_TERMO = 2
+# Palavras menores que isso não têm trigramas suficientes para a busca aproximada
+TAMANHO_MINIMO_APROXIMADO = 3
+
+
+def normalizar_busca(*partes):
+    """
+    Junta as partes em minúsculas, sem acentos e sem espaços repetidos.
+    """
+    texto = ' '.join(str(parte) for parte in partes if parte)
+    texto = unicodedata.normalize('NFKD', texto)
+    texto = ''.join(caractere for caractere in texto if not unicodedata.combining(caractere))
+    return ' '.join(texto.lower().split())
+
+def escapar_like(texto):
+    """
+    Escapa os curingas do LIKE (use com escape='\\').
+    """
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def termos_profissional(nome, cpf, placa_veiculo, empresa):
+    # CPF e placa também entram sem pontuação, para achar "123456" em "123.456.789-00"
+    return normalizar_busca(nome, cpf, normalizar_cpf(cpf), placa_veiculo, normalizar_placa(placa_veiculo), empresa)
+
+def termos_usuario(nome, apartamento):
+    return normalizar_busca(nome, apartamento)
+
+
+def _atualizar_termos_profissional(mapper, conexao, profissional):
+    profissional.termos_busca = termos_profissional(
+        profissional.nome, profissional.cpf, profissional.placa_veiculo, profissional.empresa
+    )
+
+def _atualizar_termos_usuario(mapper, conexao, user):
+    user.termos_busca = termos_usuario(user.nome, user.apartamento)
+
+def registrar_eventos_busca():
+    """
+    Mantém termos_busca atualizado nos INSERT/UPDATE feitos pelo ORM.
+    Inserções em massa fora do ORM devem preencher a coluna (ver app/importacao.py).
+    """
+    if event.contains(Profissional, 'before_insert', _atualizar_termos_profissional):
+        return
+    for evento in ('before_insert', 'before_update'):
+        event.listen(Profissional, evento, _atualizar_termos_profissional)
+        event.listen(User, evento, _atualizar_termos_usuario)
+
+
+def _filtro_termos(coluna, termo, aproximado):
+    """
+    Todas as palavras digitadas precisam aparecer (ou, no PostgreSQL, ser
+    parecidas com alguma palavra) em termos_busca.
+    """
+    condicoes = []
+    for palavra in termo.split():
+        condicao = coluna.like(f'%{escapar_like(palavra)}%', escape='\\')
+        if aproximado and len(palavra) >= TAMANHO_MINIMO_APROXIMADO:
+            condicao = or_(condicao, literal(palavra).op('<%')(coluna))
+        condicoes.append(condicao)
+    return and_(*condicoes)
+
+def _ordem_relevancia(coluna, termo, aproximado):
+    if aproximado:
+        return func.word_similarity(termo, coluna).desc()
+    # Sem pg_trgm: quem começa com o termo vem primeiro
+    return case((coluna.like(f'{escapar_like(termo)}%', escape='\\'), 0), else_=1)
+
+def buscar_profissionais(termo, limite=LIMITE_SUGESTOES):
+    """
+    Profissionais cujo nome, CPF, placa ou empresa combinam com o termo.
+    """
+    termo = normalizar_busca(termo)
+    if len(termo) < TAMANHO_MINIMO_TERMO:
+        return []
+    aproximado = db.session.get_bind().dialect.name == 'postgresql'
+    coluna = Profissional.termos_busca
+    return db.session.query(
+        Profissional.id, Profissional.nome, Profissional.cpf,
+        Profissional.placa_veiculo, Profissional.empresa
+    ).filter(
+        _filtro_termos(coluna, termo, aproximado)
+    ).order_by(
+        _ordem_relevancia(coluna, termo, aproximado), Profissional.nome
+    ).limit(limite).all()
+
+def buscar_moradores(condominio_id, termo, limite=LIMITE_SUGESTOES):
+    """
+    Moradores do condomínio cujo nome ou apartamento combinam com o termo.
+    """
+    termo = normalizar_busca(termo)
+    if len(termo) < TAMANHO_MINIMO_TERMO:
+        return []
+    aproximado = db.session.get_bind().dialect.name == 'postgresql'
+    coluna = User.termos_busca
+    return db.session.query(
+        User.id, User.nome, User.apartamento
+    ).filter(
+        User.condominio_id == condominio_id,
+        User.role == 'morador',
+        _filtro_termos(coluna, termo, aproximado)
+    ).order_by(
+        _ordem_relevancia(coluna, termo, aproximado), User.nome
+    ).limit(limite).all()
+
+def buscar_para_acesso_imediato(condominio_id, termo, limite=LIMITE_SUGESTOES):
+    """
+    Sugestões para o acesso imediato: profissionais (cadastro geral) e
+    moradores do condomínio da portaria.
+    """
+    return {
+        'profissionais': [linha._asdict() for linha in buscar_profissionais(termo, limite)],
+        'moradores': [linha._asdict() for linha in buscar_moradores(condominio_id, termo, limite)],
+    }
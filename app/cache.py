@@ -0,0 +1,266 @@
+# app/cache.py
+# Cache por condomínio (tenant) para métricas que mudam pouco, como contagens
+# de moradores/profissionais e os dados básicos do condomínio.
+#
+# Cada valor em cache depende de um ou mais modelos ('User', 'Acesso',
+# 'Condominio'). A invalidação incrementa a "versão" de (condomínio, modelo),
+# que faz parte da chave: os valores antigos deixam de ser encontrados e saem
+# por TTL/LRU, sem precisar varrer o cache. As versões são incrementadas nos
+# hooks after_commit do SQLAlchemy quando linhas daquele condomínio mudam.
+#
+# Backends (Config.CACHE_BACKEND):
+#   - 'memoria': em processo, com TTL e LRU (cada worker tem o seu; o TTL limita
+#     quanto tempo um worker pode ver um valor já invalidado em outro)
+#   - 'redis': compartilhado entre workers (configure maxmemory-policy allkeys-lru)
+#   - 'nenhum': desativa o cache
+
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from itertools import chain
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger('easygate.cache')
+
+# Modelos cujas alterações invalidam o cache do condomínio
+MODELOS_MONITORADOS = ('User', 'Acesso', 'Condominio')
+
+
+class CacheMemoria:
+    """
+    Cache em processo com expiração por TTL e descarte do item menos usado (LRU).
+    """
+
+    def __init__(self, max_itens=1024):
+        self.max_itens = max_itens
+        self._itens = OrderedDict()
+        self._versoes = {}
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return False, None
+            expira_em, valor = item
+            if expira_em < time.monotonic():
+                del self._itens[chave]
+                return False, None
+            self._itens.move_to_end(chave)
+            return True, valor
+
+    def definir(self, chave, valor, ttl):
+        with self._lock:
+            self._itens[chave] = (time.monotonic() + ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def excluir(self, chave):
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def versoes(self, chaves):
+        with self._lock:
+            return [self._versoes.get(chave, 0) for chave in chaves]
+
+    def incrementar_versao(self, chave):
+        with self._lock:
+            self._versoes[chave] = self._versoes.get(chave, 0) + 1
+
+    def __len__(self):
+        return len(self._itens)
+
+
+class CacheRedis:
+    """
+    Cache compartilhado em um servidor Redis (ou compatível).
+    """
+
+    def __init__(self, url, prefixo='easygate:cache:'):
+        import redis
+        self.redis = redis.Redis.from_url(url)
+        self.prefixo = prefixo
+
+    def obter(self, chave):
+        valor = self.redis.get(self.prefixo + chave)
+        if valor is None:
+            return False, None
+        return True, pickle.loads(valor)
+
+    def definir(self, chave, valor, ttl):
+        self.redis.set(self.prefixo + chave, pickle.dumps(valor), ex=max(int(ttl), 1))
+
+    def excluir(self, chave):
+        self.redis.delete(self.prefixo + chave)
+
+    def versoes(self, chaves):
+        valores = self.redis.mget([self.prefixo + 'versao:' + chave for chave in chaves])
+        return [int(valor) if valor is not None else 0 for valor in valores]
+
+    def incrementar_versao(self, chave):
+        self.redis.incr(self.prefixo + 'versao:' + chave)
+
+    def __len__(self):
+        return self.redis.dbsize()
+
+
+class CacheCondominio:
+    """
+    Fachada do cache por condomínio, com contadores de acertos e falhas.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.ttl = 60
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+
+    def init_app(self, app):
+        tipo = app.config.get('CACHE_BACKEND', 'memoria')
+        self.ttl = app.config.get('CACHE_TTL', 60)
+        if tipo == 'redis':
+            self.backend = CacheRedis(app.config['CACHE_REDIS_URL'])
+        elif tipo == 'nenhum':
+            self.backend = None
+        else:
+            self.backend = CacheMemoria(app.config.get('CACHE_MAX_ITENS', 1024))
+        registrar_invalidacao_cache()
+
+    @staticmethod
+    def _chave_versao(condominio_id, modelo):
+        return f"{condominio_id}:{modelo}"
+
+    def obter_ou_calcular(self, condominio_id, nome, dependencias, calcular, ttl=None):
+        if self.backend is None or condominio_id is None:
+            return calcular()
+
+        try:
+            versoes = self.backend.versoes([self._chave_versao(condominio_id, modelo) for modelo in dependencias])
+            chave = f"{condominio_id}:{nome}:" + ".".join(str(versao) for versao in versoes)
+            encontrado, valor = self.backend.obter(chave)
+        except Exception as e:
+            # Um backend indisponível não pode derrubar a página
+            logger.warning('Erro ao consultar o cache: %s', e)
+            return calcular()
+
+        if encontrado:
+            self.acertos += 1
+            return valor
+
+        self.falhas += 1
+        valor = calcular()
+        try:
+            self.backend.definir(chave, valor, ttl or self.ttl)
+        except Exception as e:
+            logger.warning('Erro ao gravar no cache: %s', e)
+        return valor
+
+    def invalidar(self, condominio_id, modelo):
+        if self.backend is None:
+            return
+        try:
+            self.backend.incrementar_versao(self._chave_versao(condominio_id, modelo))
+            self.invalidacoes += 1
+        except Exception as e:
+            logger.warning('Erro ao invalidar o cache: %s', e)
+
+    def versao_usuario(self, user_id):
+        """
+        Versão atual do usuário (ver app/identidade.py), ou None sem backend
+        ou se o backend falhar: sem versão, a identidade é relida do banco.
+        """
+        if self.backend is None:
+            return None
+        try:
+            return self.backend.versoes([f"usuario:{user_id}"])[0]
+        except Exception as e:
+            logger.warning('Erro ao consultar a versão do usuário: %s', e)
+            return None
+
+    def invalidar_usuario(self, user_id):
+        if self.backend is None:
+            return
+        try:
+            self.backend.incrementar_versao(f"usuario:{user_id}")
+        except Exception as e:
+            logger.warning('Erro ao invalidar o usuário: %s', e)
+
+    def estatisticas(self):
+        consultas = self.acertos + self.falhas
+        return {
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'invalidacoes': self.invalidacoes,
+            'taxa_acerto': round(self.acertos / consultas, 4) if consultas else None,
+        }
+
+
+cache_condominio = CacheCondominio()
+
+
+def em_cache_por_condominio(*dependencias, ttl=None):
+    """
+    Decorador para funções de serviço cujo primeiro argumento é o condominio_id.
+    dependencias: modelos cujas alterações no condomínio invalidam o valor.
+    """
+    def decorador(funcao):
+        @wraps(funcao)
+        def envolvida(condominio_id, *args, **kwargs):
+            nome = funcao.__name__
+            if args or kwargs:
+                nome += ':' + repr((args, sorted(kwargs.items())))
+            return cache_condominio.obter_ou_calcular(
+                condominio_id, nome, dependencias,
+                lambda: funcao(condominio_id, *args, **kwargs),
+                ttl=ttl
+            )
+        return envolvida
+    return decorador
+
+
+# ==============================================================================
+# Invalidação a partir dos commits do SQLAlchemy
+# ==============================================================================
+
+def _condominios_do_objeto(objeto, modelo):
+    if modelo == 'Condominio':
+        return {objeto.id}
+    # Considera o condomínio atual e o anterior (ex.: usuário transferido)
+    historico = inspect(objeto).attrs.condominio_id.history
+    return {cid for cid in chain(historico.added, historico.unchanged, historico.deleted) if cid is not None}
+
+def _coletar_alteracoes(session, flush_context):
+    alterados = session.info.setdefault('cache_condominios_alterados', set())
+    usuarios = session.info.setdefault('cache_usuarios_alterados', set())
+    for objeto in chain(session.new, session.dirty, session.deleted):
+        modelo = type(objeto).__name__
+        if modelo in MODELOS_MONITORADOS:
+            for condominio_id in _condominios_do_objeto(objeto, modelo):
+                alterados.add((condominio_id, modelo))
+        # Usuários alterados ou excluídos têm a identidade da sessão relida
+        if modelo == 'User' and objeto not in session.new:
+            usuarios.add(objeto.id)
+
+def _invalidar_apos_commit(session):
+    for condominio_id, modelo in session.info.pop('cache_condominios_alterados', ()):
+        cache_condominio.invalidar(condominio_id, modelo)
+    for user_id in session.info.pop('cache_usuarios_alterados', ()):
+        cache_condominio.invalidar_usuario(user_id)
+
+def _descartar_apos_rollback(session):
+    session.info.pop('cache_condominios_alterados', None)
+    session.info.pop('cache_usuarios_alterados', None)
+
+def registrar_invalidacao_cache():
+    if event.contains(Session, 'after_flush', _coletar_alteracoes):
+        return
+    event.listen(Session, 'after_flush', _coletar_alteracoes)
+    event.listen(Session, 'after_commit', _invalidar_apos_commit)
+    event.listen(Session, 'after_soft_rollback', lambda session, transacao: _descartar_apos_rollback(session))
@@ -0,0 +1,136 @@
+# app/cli.py
+# Comandos de linha de comando da aplicação (flask <comando>).
+
+import click
+from flask.cli import AppGroup
+
+rollup_cli = AppGroup('rollup', help='Consolidado diário de acessos (acessos_diarios).')
+
+@rollup_cli.command('backfill')
+@click.option('--condominio', 'condominio_id', type=int, default=None,
+              help='Reconstrói apenas este condomínio (padrão: todos).')
+def rollup_backfill(condominio_id):
+    """Reconstrói o consolidado diário a partir da tabela de acessos."""
+    from app.rollup import recalcular_rollup
+    linhas = recalcular_rollup(condominio_id)
+    click.echo(f"Consolidado reconstruído: {linhas} linhas (condomínio, portaria, dia).")
+
+
+usuarios_cli = AppGroup('usuarios', help='Gestão de usuários em massa.')
+
+@usuarios_cli.command('importar')
+@click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--condominio', 'condominio_id', type=int, required=True, help='Condomínio de destino.')
+@click.option('--papel', type=click.Choice(['morador', 'porteiro']), default='morador', show_default=True)
+@click.option('--simular', is_flag=True, help='Apenas valida e lista os erros, sem gravar.')
+@click.option('--processos', type=int, default=None, help='Processos para gerar os hashes (padrão: núcleos da CPU).')
+@click.option('--senhas', 'arquivo_senhas', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='CSV onde gravar as senhas temporárias geradas.')
+def usuarios_importar(arquivo, condominio_id, papel, simular, processos, arquivo_senhas):
+    """Importa moradores ou porteiros de um CSV/XLSX."""
+    import csv
+    import time
+    from app.importacao import importar_usuarios, ErroImportacao
+
+    inicio = time.perf_counter()
+    try:
+        with open(arquivo, 'rb') as planilha:
+            resultado = importar_usuarios(planilha, arquivo, papel, condominio_id,
+                                          simular=simular, processos=processos)
+    except ErroImportacao as e:
+        raise click.ClickException(str(e))
+    duracao = time.perf_counter() - inicio
+
+    for linha, mensagem in resultado.erros:
+        click.echo(f"Linha {linha}: {mensagem}", err=True)
+    click.echo(f"Linhas: {resultado.total_linhas} | válidas: {resultado.validas} | "
+               f"com erro: {len(resultado.erros)} | importadas: {resultado.inseridos} | {duracao:.2f}s")
+
+    if resultado.senhas_geradas:
+        if arquivo_senhas:
+            with open(arquivo_senhas, 'w', newline='', encoding='utf-8') as saida:
+                escritor = csv.writer(saida)
+                escritor.writerow(['email', 'senha'])
+                escritor.writerows(resultado.senhas_geradas)
+            click.echo(f"Senhas temporárias gravadas em {arquivo_senhas}.")
+        else:
+            click.echo("Senhas temporárias geradas (use --senhas para gravá-las em arquivo):")
+            for email, senha in resultado.senhas_geradas:
+                click.echo(f"{email};{senha}")
+
+    if resultado.erros:
+        raise SystemExit(1)
+
+
+acessos_cli = AppGroup('acessos', help='Manutenção dos acessos.')
+
+@acessos_cli.command('encerrar-abertos')
+@click.option('--horas', type=float, required=True, help='Finaliza os acessos em andamento há mais de N horas.')
+@click.option('--condominio', 'condominio_id', type=int, default=None,
+              help='Apenas este condomínio (padrão: todos).')
+def acessos_encerrar_abertos(horas, condominio_id):
+    """Encerramento automático dos acessos esquecidos em aberto (para o cron)."""
+    from app.transicoes import encerrar_acessos_esquecidos
+    ids = encerrar_acessos_esquecidos(horas, condominio_id)
+    click.echo(f"Acessos finalizados: {len(ids)}.")
+
+qrcodes_cli = AppGroup('qrcodes', help='QR Codes das portarias.')
+
+@qrcodes_cli.command('exportar')
+@click.option('--condominio', 'condominio_id', type=int, default=None,
+              help='Apenas este condomínio (padrão: todos).')
+@click.option('--formato', type=click.Choice(['png', 'svg']), default='png', show_default=True)
+@click.option('--saida', type=click.Path(dir_okay=False, writable=True), default='qrcodes_portarias.zip',
+              show_default=True, help='Arquivo ZIP gerado.')
+@click.option('--url-base', default='http://localhost:5000', show_default=True,
+              help='Endereço público da aplicação, usado nas URLs de check-in sem QR Code gravado.')
+@click.option('--processos', type=int, default=None, help='Processos de geração (padrão: um por CPU).')
+def qrcodes_exportar(condominio_id, formato, saida, url_base, processos):
+    """Gera os QR Codes das portarias ativas em um ZIP, em paralelo."""
+    import os
+    from flask import current_app
+    from app.models import Portaria
+    from app.qrcodes import ErroQrcode, exportar_zip, itens_qrcodes_portarias
+    consulta = Portaria.query.filter_by(is_ativo=True)
+    if condominio_id is not None:
+        consulta = consulta.filter_by(condominio_id=condominio_id)
+    portarias = consulta.order_by(Portaria.condominio_id, Portaria.nome).all()
+    # url_for(_external=True) precisa de uma requisição para saber o host
+    with current_app.test_request_context(base_url=url_base):
+        try:
+            dados = exportar_zip(itens_qrcodes_portarias(portarias), formato, processos or os.cpu_count() or 1)
+        except ErroQrcode as e:
+            raise click.ClickException(str(e))
+    with open(saida, 'wb') as arquivo:
+        arquivo.write(dados)
+    click.echo(f"{len(portarias)} QR Codes gravados em {saida}.")
+
+@click.command('seed')
+@click.option('--condos', 'condominios', type=int, default=4, show_default=True, help='Condomínios.')
+@click.option('--days', 'dias', type=int, default=30, show_default=True, help='Dias de histórico de acessos.')
+@click.option('--portarias', type=int, default=2, show_default=True, help='Portarias por condomínio.')
+@click.option('--moradores', type=int, default=50, show_default=True, help='Moradores por condomínio.')
+@click.option('--profissionais', type=int, default=500, show_default=True)
+@click.option('--acessos-por-dia', type=int, default=20, show_default=True, help='Acessos por condomínio e dia.')
+@click.option('--pendentes', type=int, default=5, show_default=True,
+              help='Pré-autorizações para hoje, por condomínio.')
+@click.option('--semente', type=int, default=42, show_default=True, help='Mesma semente, mesmos dados.')
+@click.option('--manter', is_flag=True, help='Acrescenta aos dados existentes em vez de apagá-los.')
+@click.option('--yes', '-y', 'confirmado', is_flag=True, help='Não pede confirmação para apagar os dados.')
+def seed(manter, confirmado, **opcoes):
+    """Popula o banco com dados de teste em volume (substitui o populate_db.py)."""
+    from app.seed import ParametrosGeracao, gerar_dados, limpar_tabelas
+    if not manter:
+        if not confirmado:
+            click.confirm('Todos os dados das tabelas da aplicação serão apagados. Continuar?', abort=True)
+        limpar_tabelas()
+        click.echo("Tabelas limpas.")
+    gerar_dados(ParametrosGeracao(demonstracao=not manter, **opcoes), log=click.echo)
+
+
+def registrar_comandos(app):
+    app.cli.add_command(rollup_cli)
+    app.cli.add_command(usuarios_cli)
+    app.cli.add_command(acessos_cli)
+    app.cli.add_command(qrcodes_cli)
+    app.cli.add_command(seed)
@@ -0,0 +1,74 @@
+# app/condicional.py
+# Respostas condicionais (ETag / If-None-Match) para páginas HTML recarregadas
+# com frequência, como o painel do profissional e as listas do síndico.
+#
+# Cada rota declara um "carimbo": max(updated_at) e count(*) das linhas que a
+# página exibe, lidos em uma única consulta barata. O ETag é o hash do carimbo,
+# da URL e do usuário logado; se o navegador já tem essa versão, a resposta é
+# 304 antes das consultas da página e da renderização. O count(*) detecta
+# exclusões, que não mudam o max(updated_at).
+#
+# O carimbo vem do banco, e não das versões de app/cache.py, porque estas são
+# por worker no backend 'memoria' e recomeçam do zero a cada reinício.
+#
+# Páginas com mensagens flash pendentes são sempre renderizadas (e as
+# consomem). Alterações nos templates dessas páginas não mudam o carimbo:
+# incremente VERSAO_PAGINAS para que os navegadores busquem a nova versão.
+
+import hashlib
+from functools import wraps
+from flask import Response, make_response, request, session
+from flask_login import current_user
+from sqlalchemy import func, select
+from app.models import db
+
+VERSAO_PAGINAS = 1
+
+
+def linhas_alteradas(modelo, *filtros):
+    """
+    Expressões do carimbo de um modelo: (max(updated_at), count(*)) das linhas dos filtros.
+    """
+    return [
+        select(func.max(modelo.updated_at)).where(*filtros).scalar_subquery(),
+        select(func.count()).select_from(modelo).where(*filtros).scalar_subquery(),
+    ]
+
+def calcular_etag(expressoes):
+    valores = db.session.execute(select(*expressoes)).one()
+    usuario = (current_user.get_id(), current_user.role) if current_user.is_authenticated else None
+    partes = (VERSAO_PAGINAS, request.full_path, usuario, tuple(valores))
+    return hashlib.sha256(repr(partes).encode()).hexdigest()[:32]
+
+
+def resposta_condicional(carimbo, publica=False):
+    """
+    Decorador de rotas GET, aplicado depois dos de login e permissão.
+    carimbo(**argumentos_da_rota) retorna as expressões de linhas_alteradas
+    (somadas, se forem vários modelos) ou None para responder sem ETag.
+    """
+    cache_control = 'no-cache' if publica else 'private, no-cache'
+
+    def decorador(view):
+        @wraps(view)
+        def envolvida(*args, **kwargs):
+            if request.method != 'GET' or session.get('_flashes'):
+                return view(*args, **kwargs)
+            expressoes = carimbo(**kwargs)
+            if not expressoes:
+                return view(*args, **kwargs)
+
+            etag = calcular_etag(expressoes)
+            if etag in request.if_none_match:
+                resposta = Response(status=304)
+            else:
+                resposta = make_response(view(*args, **kwargs))
+                # Redirecionamentos e erros não recebem ETag
+                if resposta.status_code != 200:
+                    return resposta
+            resposta.set_etag(etag)
+            resposta.headers['Cache-Control'] = cache_control
+            resposta.vary.add('Cookie')
+            return resposta
+        return envolvida
+    return decorador
@@ -0,0 +1,129 @@
+# app/consultas_lentas.py
+# Registro de consultas SQL lentas.
+#
+# Toda consulta que passar de CONSULTA_LENTA_MS milissegundos é registrada com
+# os parâmetros, a função da aplicação que a originou (ex.:
+# app.services.get_relatorio_acessos) e o endpoint da requisição. Os registros
+# ficam em um buffer circular em memória (os CONSULTA_LENTA_MAX mais recentes,
+# por worker), visível em /admin/consultas_lentas, e também vão para o log.
+#
+# Com CONSULTA_LENTA_EXPLAIN no PostgreSQL, o plano de SELECTs lentos é
+# capturado com EXPLAIN (ANALYZE, BUFFERS) em uma tarefa em segundo plano
+# (greenlet, com o gevent), em outra conexão, sem atrasar a requisição. O
+# ANALYZE executa a consulta de novo, por isso só vale para SELECT.
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from flask import has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger('easygate.consultas_lentas')
+
+# Diretório do pacote app, para achar no stack a função que originou a consulta
+_DIRETORIO_APP = os.path.dirname(os.path.abspath(__file__)) + os.sep
+# Opção de execução que marca as consultas do próprio EXPLAIN, que não são registradas
+_IGNORAR = 'consulta_lenta_ignorar'
+TAMANHO_MAXIMO_PARAMETROS = 500
+
+
+class RegistroConsultasLentas:
+    """
+    Buffer circular com as consultas lentas mais recentes do processo.
+    """
+
+    def __init__(self):
+        self.limite_ms = 500
+        self.explain = False
+        self.engine = None
+        self._registros = deque(maxlen=200)
+        self._lock = threading.Lock()
+
+    def init_app(self, app, engine):
+        self.engine = engine
+        self.limite_ms = app.config.get('CONSULTA_LENTA_MS', 500)
+        self.explain = app.config.get('CONSULTA_LENTA_EXPLAIN', False) and engine.dialect.name == 'postgresql'
+        self._registros = deque(maxlen=app.config.get('CONSULTA_LENTA_MAX', 200))
+        if self.limite_ms and not event.contains(engine, 'before_cursor_execute', _antes_consulta):
+            event.listen(engine, 'before_cursor_execute', _antes_consulta)
+            event.listen(engine, 'after_cursor_execute', _depois_consulta)
+
+    def registros(self):
+        """
+        Consultas registradas, da mais recente para a mais antiga.
+        """
+        with self._lock:
+            return list(reversed(self._registros))
+
+    def limpar(self):
+        with self._lock:
+            self._registros.clear()
+
+    def registrar(self, comando, parametros, executemany, duracao):
+        registro = {
+            'quando': datetime.now(),
+            'duracao_ms': round(duracao * 1000, 1),
+            'comando': comando,
+            'parametros': _resumir_parametros(parametros, executemany),
+            'origem': _funcao_de_origem(),
+            'endpoint': request.endpoint if has_request_context() else None,
+            'plano': None,
+        }
+        with self._lock:
+            self._registros.append(registro)
+        logger.warning('Consulta lenta (%.1f ms) em %s: %s | parâmetros: %s',
+                       registro['duracao_ms'], registro['origem'], comando, registro['parametros'])
+
+        if self.explain and not executemany and comando.lstrip()[:6].upper() == 'SELECT':
+            from app import socketio
+            socketio.start_background_task(self._capturar_plano, registro, comando, parametros)
+
+    def _capturar_plano(self, registro, comando, parametros):
+        try:
+            with self.engine.connect() as conexao:
+                conexao = conexao.execution_options(**{_IGNORAR: True})
+                linhas = conexao.exec_driver_sql(f'EXPLAIN (ANALYZE, BUFFERS) {comando}', parametros)
+                registro['plano'] = '\n'.join(linha[0] for linha in linhas)
+                conexao.rollback()
+        except Exception as e:
+            registro['plano'] = f'Não foi possível capturar o plano: {e}'
+
+
+def _resumir_parametros(parametros, executemany):
+    if executemany and parametros:
+        texto = f'{len(parametros)} linhas; primeira: {parametros[0]!r}'
+    else:
+        texto = repr(parametros)
+    if len(texto) > TAMANHO_MAXIMO_PARAMETROS:
+        texto = texto[:TAMANHO_MAXIMO_PARAMETROS] + '...'
+    return texto
+
+def _funcao_de_origem():
+    """
+    Primeira função do pacote app no stack, de dentro para fora (normalmente o
+    serviço que montou a consulta), como 'modulo.funcao:linha'.
+    """
+    quadro = sys._getframe(1)
+    while quadro is not None:
+        arquivo = os.path.abspath(quadro.f_code.co_filename)
+        if arquivo.startswith(_DIRETORIO_APP) and arquivo != os.path.abspath(__file__):
+            return f"{quadro.f_globals.get('__name__')}.{quadro.f_code.co_name}:{quadro.f_lineno}"
+        quadro = quadro.f_back
+    return None
+
+
+registro_consultas_lentas = RegistroConsultasLentas()
+
+
+def _antes_consulta(conexao, cursor, comando, parametros, contexto, executemany):
+    contexto._inicio_consulta_lenta = time.perf_counter()
+
+def _depois_consulta(conexao, cursor, comando, parametros, contexto, executemany):
+    duracao = time.perf_counter() - contexto._inicio_consulta_lenta
+    if duracao * 1000 < registro_consultas_lentas.limite_ms or contexto.execution_options.get(_IGNORAR):
+        return
+    registro_consultas_lentas.registrar(comando, parametros, executemany, duracao)
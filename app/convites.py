@@ -0,0 +1,51 @@
+# app/convites.py
+# Convites para definir a senha dos usuários importados pela tela do síndico.
+#
+# A importação pela web não gera hashes de senha, caros demais para uma
+# requisição: os usuários são gravados com senha_hash vazio (que nunca confere
+# no login) e cada um recebe um link assinado para definir a sua. O token leva
+# o id do usuário e um resumo do senha_hash atual, então deixa de valer assim
+# que a senha é definida. Expira em CONVITE_VALIDADE_DIAS.
+
+import hashlib
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from app.models import User, db
+
+SALT_CONVITE = 'easygate-convite-senha'
+
+
+class ConviteInvalido(Exception):
+    """
+    Convite malformado, expirado ou já usado.
+    """
+
+
+def _serializador():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=SALT_CONVITE)
+
+def _resumo(senha_hash):
+    return hashlib.sha256((senha_hash or '').encode()).hexdigest()[:16]
+
+
+def gerar_convite(user_id, senha_hash=''):
+    """
+    Token do convite de um usuário que ainda tem o senha_hash informado.
+    """
+    return _serializador().dumps([user_id, _resumo(senha_hash)])
+
+def usuario_do_convite(token):
+    """
+    Retorna o usuário do convite. Levanta ConviteInvalido se o token não
+    confere, expirou ou a senha já foi definida depois dele.
+    """
+    validade = current_app.config.get('CONVITE_VALIDADE_DIAS', 7) * 86400
+    try:
+        user_id, resumo = _serializador().loads(token, max_age=validade)
+    except (BadSignature, TypeError, ValueError):
+        raise ConviteInvalido('Convite inválido ou expirado.')
+
+    user = db.session.get(User, user_id)
+    if user is None or _resumo(user.senha_hash) != resumo:
+        raise ConviteInvalido('Convite inválido ou já utilizado.')
+    return user
@@ -1,10 +1,148 @@
 # app/events.py
+# Eventos em tempo real (Socket.IO).
+# Os serviços publicam pequenos "deltas" de acesso nas salas do condomínio e da
+# portaria, e os painéis do porteiro e do síndico atualizam suas tabelas no lugar,
+# sem recarregar a página inteira.
+
+import logging
+from datetime import date
+from flask_login import current_user
 from flask_socketio import join_room
+from app import socketio
+
+logger = logging.getLogger('easygate.events')
+
+# Nome do evento recebido pelos painéis
+EVENTO_ACESSO = 'acesso_atualizado'
+
+# Ids por evento de saída em lote. Com ids de até 10 dígitos, a mensagem fica
+# bem abaixo do limite de 8000 bytes do NOTIFY (ver app/pubsub.py)
+IDS_POR_EVENTO_LOTE = 250
+
+# Contador do painel afetado por cada status
+CONTADOR_POR_STATUS = {
+    'pendente': 'pendentes',
+    'em_andamento': 'em_andamento',
+}
+
+
+def sala_condominio(condominio_id):
+    return f'condominio_{condominio_id}'
+
+def sala_portaria(portaria_id):
+    return f'portaria_{portaria_id}'
+
+def salas_do_usuario(user):
+    """
+    Salas que um usuário logado pode acompanhar.
+    Porteiros e síndicos acompanham o próprio condomínio; porteiros também a sua portaria.
+    """
+    salas = set()
+    if user.role in ('porteiro', 'sindico') and user.condominio_id:
+        salas.add(sala_condominio(user.condominio_id))
+    if user.role == 'porteiro' and user.portaria_id:
+        salas.add(sala_portaria(user.portaria_id))
+    return salas
+
+
+def montar_evento_acesso(tipo, acesso, status_anterior=None, data_acesso_anterior=None):
+    """
+    Monta o delta JSON de um acesso. Deve ser chamado antes do commit, enquanto
+    o objeto (e seus relacionamentos já carregados) ainda está disponível.
+
+    tipo: 'pre_autorizacao', 'checkin', 'entrada' ou 'saida' ('saida_lote' em montar_eventos_lote).
+    """
+    profissional = acesso.profissional
+    morador = acesso.morador
+    return montar_evento(tipo, {
+        'id': acesso.id,
+        'condominio_id': acesso.condominio_id,
+        'portaria_id': acesso.portaria_id,
+        'status': acesso.status,
+        'servico': acesso.servico,
+        'data_acesso': acesso.data_acesso,
+        'data_saida': acesso.data_saida,
+        'nome_profissional': profissional.nome if profissional else None,
+        'morador_nome': morador.nome if morador else None,
+        'apartamento': morador.apartamento if morador else None,
+    }, status_anterior, data_acesso_anterior)
+
+def montar_evento(tipo, dados, status_anterior=None, data_acesso_anterior=None):
+    """
+    Monta o delta a partir de um dicionário com as colunas do acesso (ex.: uma
+    linha do RETURNING de app/transicoes.py), sem precisar do objeto do ORM.
+    """
+    contadores = {}
+    if status_anterior in CONTADOR_POR_STATUS:
+        chave = CONTADOR_POR_STATUS[status_anterior]
+        contadores[chave] = contadores.get(chave, 0) - 1
+    if dados['status'] in CONTADOR_POR_STATUS:
+        chave = CONTADOR_POR_STATUS[dados['status']]
+        contadores[chave] = contadores.get(chave, 0) + 1
+
+    # Entradas do dia: conta apenas quando o acesso passa a ter data_acesso hoje
+    hoje = date.today()
+    data_acesso, data_saida = dados['data_acesso'], dados['data_saida']
+    entrou_hoje = data_acesso is not None and data_acesso.date() == hoje
+    ja_contado = data_acesso_anterior is not None and data_acesso_anterior.date() == hoje
+    if entrou_hoje and not ja_contado:
+        contadores['entradas_hoje'] = 1
+
+    return {
+        'tipo': tipo,
+        'acesso_id': dados['id'],
+        'condominio_id': dados['condominio_id'],
+        'portaria_id': dados['portaria_id'],
+        'status': dados['status'],
+        'status_anterior': status_anterior,
+        'nome_profissional': dados['nome_profissional'],
+        'morador_nome': dados['morador_nome'],
+        'apartamento': dados['apartamento'],
+        'servico': dados['servico'],
+        'data_acesso': data_acesso.strftime('%H:%M') if data_acesso else None,
+        'data_saida': data_saida.strftime('%H:%M') if data_saida else None,
+        'contadores': {k: v for k, v in contadores.items() if v},
+    }
+
+def montar_eventos_lote(condominio_id, acesso_ids, data_saida, automatico=False):
+    """
+    Deltas para vários acessos finalizados de uma vez (ver encerrar_acessos em
+    app/transicoes.py), com até IDS_POR_EVENTO_LOTE ids cada, para caber no
+    NOTIFY da fila do Socket.IO. Vão só para a sala do condomínio.
+    """
+    acesso_ids = list(acesso_ids)
+    return [{
+        'tipo': 'saida_lote',
+        'acesso_ids': parte,
+        'condominio_id': condominio_id,
+        'portaria_id': None,
+        'status': 'finalizado',
+        'status_anterior': 'em_andamento',
+        'data_saida': data_saida.strftime('%H:%M'),
+        'automatico': automatico,
+        'contadores': {'em_andamento': -len(parte)},
+    } for parte in (acesso_ids[inicio:inicio + IDS_POR_EVENTO_LOTE]
+                    for inicio in range(0, len(acesso_ids), IDS_POR_EVENTO_LOTE))]
+
+def publicar_evento_acesso(evento):
+    """
+    Envia o delta para as salas do condomínio e da portaria do acesso.
+    Deve ser chamado após o commit. Falhas de envio não afetam a operação.
+    """
+    try:
+        if evento.get('condominio_id'):
+            socketio.emit(EVENTO_ACESSO, evento, to=sala_condominio(evento['condominio_id']))
+        if evento.get('portaria_id'):
+            socketio.emit(EVENTO_ACESSO, evento, to=sala_portaria(evento['portaria_id']))
+    except Exception as e:
+        logger.warning('Erro ao publicar evento de acesso: %s', e)
+
 
 def setup_events(socketio):
     @socketio.on('join')
     def on_join(data):
-        room = data.get('room')
-        if room:
+        room = (data or {}).get('room')
+        # Só permite entrar nas salas do próprio condomínio/portaria
+        if room and current_user.is_authenticated and room in salas_do_usuario(current_user):
             join_room(room)
-            print(f"Cliente entrou na sala: {room}")
\ No newline at end of file
+            logger.debug('Cliente entrou na sala: %s', room)
@@ -2,13 +2,18 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, SelectField, DecimalField, IntegerField, TextAreaField, DateField, FloatField, BooleanField
 from wtforms.validators import DataRequired, Email, ValidationError, Optional, Length, NumberRange, EqualTo, Regexp
-from app.models import User, Profissional
+from app.models import User, Profissional, normalizar_cpf
 
 class LoginForm(FlaskForm):
     email = StringField('Email', validators=[DataRequired(), Email()])
     password = PasswordField('Senha', validators=[DataRequired()])
     submit = SubmitField('Entrar')
 
+class DefinirSenhaForm(FlaskForm):
+    password = PasswordField('Nova Senha', validators=[DataRequired(), Length(min=6)])
+    password_confirm = PasswordField('Confirmar Senha', validators=[DataRequired(), EqualTo('password', message='As senhas devem ser iguais.')])
+    submit = SubmitField('Definir Senha')
+
 class UserForm(FlaskForm):
     nome = StringField('Nome', validators=[DataRequired()])
     email = StringField('Email', validators=[DataRequired(), Email()])
@@ -119,10 +124,12 @@ class ProfissionalRegistrationForm(FlaskForm):
             raise ValidationError('Este email já está cadastrado. Por favor, use um email diferente.')
 
     def validate_cpf_exists(self, cpf):
-        profissional = Profissional.query.filter_by(cpf=cpf.data).first()
+        profissional = Profissional.query.filter_by(cpf_normalizado=normalizar_cpf(cpf.data)).first()
         if profissional is not None:
             raise ValidationError('Já existe um profissional cadastrado com este CPF.')
         
 class PortariaForm(FlaskForm):
     nome = StringField('Nome da Portaria', validators=[DataRequired()])
-    submit = SubmitField('Salvar')
\ No newline at end of file
+    submit = SubmitField('Salvar')
+class ConfirmarCheckinForm(FlaskForm):
+    submit = SubmitField('Solicitar Entrada')
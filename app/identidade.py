@@ -0,0 +1,89 @@
+# app/identidade.py
+# Identidade do usuário logado guardada na sessão assinada do Flask, para que
+# o user_loader do Flask-Login não consulte o banco a cada requisição.
+#
+# A sessão guarda os campos usados por rotas, decoradores e templates (id,
+# nome, papel, condomínio, portaria...) junto com a "versão" do usuário no
+# backend de cache (ver app/cache.py). Commits que alteram o usuário
+# incrementam essa versão; a identidade também expira após IDENTIDADE_TTL
+# segundos, o que limita a defasagem quando o cache é apenas em processo.
+# Sem versão (CACHE_BACKEND='nenhum' ou backend indisponível) não há como
+# saber se a identidade guardada mudou, e o usuário é lido do banco.
+
+import time
+from flask import current_app, session
+from flask_login import UserMixin
+from app.cache import cache_condominio
+from app.models import User, db
+
+CHAVE_SESSAO = '_identidade'
+CAMPOS_IDENTIDADE = ('id', 'nome', 'email', 'role', 'condominio_id', 'portaria_id', 'profissional_id')
+
+
+class IdentidadeUsuario(UserMixin):
+    """
+    Usuário logado montado a partir da sessão. Atributos fora de
+    CAMPOS_IDENTIDADE (ex.: relacionamentos) carregam o User do banco sob demanda.
+    """
+
+    def __init__(self, dados):
+        for campo in CAMPOS_IDENTIDADE:
+            setattr(self, campo, dados.get(campo))
+
+    @property
+    def usuario(self):
+        if '_usuario' not in self.__dict__:
+            self._usuario = db.session.get(User, self.id)
+        return self._usuario
+
+    def __getattr__(self, nome):
+        # Chamado apenas para atributos que não estão na identidade
+        if nome.startswith('_'):
+            raise AttributeError(nome)
+        return getattr(self.usuario, nome)
+
+    def get_id(self):
+        return str(self.id)
+
+    def __repr__(self):
+        return f'<IdentidadeUsuario {self.nome} ({self.role})>'
+
+
+def invalidar_identidade(user_id):
+    """
+    Força a releitura do usuário no banco na próxima requisição dele.
+    Commits que alteram o User já fazem isso (ver app/cache.py).
+    """
+    cache_condominio.invalidar_usuario(user_id)
+
+def carregar_identidade(user_id):
+    """
+    user_loader do Flask-Login: usa a identidade da sessão se ela for do mesmo
+    usuário, estiver na versão atual e dentro do TTL; senão, lê do banco.
+    Sem versão, lê sempre do banco e não guarda a identidade na sessão.
+    """
+    user_id = int(user_id)
+    versao = cache_condominio.versao_usuario(user_id)
+    dados = session.get(CHAVE_SESSAO)
+
+    if (dados and dados.get('id') == user_id and versao is not None
+            and dados.get('versao') == versao
+            and time.time() - dados.get('carregado_em', 0) < current_app.config.get('IDENTIDADE_TTL', 300)):
+        return IdentidadeUsuario(dados)
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        session.pop(CHAVE_SESSAO, None)
+        return None
+
+    dados = {campo: getattr(user, campo) for campo in CAMPOS_IDENTIDADE}
+    if versao is None:
+        if CHAVE_SESSAO in session:
+            session.pop(CHAVE_SESSAO)
+    else:
+        dados['versao'] = versao
+        dados['carregado_em'] = time.time()
+        session[CHAVE_SESSAO] = dados
+    identidade = IdentidadeUsuario(dados)
+    identidade._usuario = user
+    return identidade
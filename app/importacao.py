@@ -0,0 +1,265 @@
+# app/importacao.py
+# Importação em massa de moradores e porteiros a partir de CSV/XLSX.
+#
+# O fluxo é: ler a planilha, validar todas as linhas antes de gravar qualquer
+# coisa (inclusive e-mails já cadastrados, numa única consulta), gerar os hashes
+# de senha em um pool de processos e inserir em lotes com INSERT de várias
+# linhas. Em modo simulação, apenas o relatório de validação é devolvido.
+#
+# Os hashes custam centenas de milissegundos por linha e não cabem no tempo de
+# uma requisição, nem o pool de processos cabe no worker do gevent. Por isso a
+# tela do síndico importa com convites=True: os usuários são gravados sem senha
+# e recebem um link para defini-la (ver app/convites.py). O comando
+# 'flask usuarios importar' (ver app/cli.py) grava com senhas.
+
+import csv
+import io
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from multiprocessing import get_context
+from email_validator import validate_email, EmailNotValidError
+from werkzeug.security import generate_password_hash
+from app.busca import termos_usuario
+from app.cache import cache_condominio
+from app.convites import gerar_convite
+from app.models import User, Portaria, db
+from app.senhas import metodo_configurado
+
+PAPEIS_IMPORTACAO = ('morador', 'porteiro')
+TAMANHO_LOTE_IMPORTACAO = 1000
+# Abaixo disso, subir processos custa mais do que gerar os hashes em sequência
+MINIMO_LINHAS_POOL = 50
+
+# Colunas obrigatórias da planilha (cabeçalho, sem diferenciar maiúsculas).
+# A coluna 'senha' é opcional: sem ela, uma senha temporária é gerada.
+COLUNAS_OBRIGATORIAS = {
+    'morador': ('nome', 'email', 'apartamento'),
+    'porteiro': ('nome', 'email', 'portaria'),
+}
+
+
+@dataclass
+class ResultadoImportacao:
+    """
+    Relatório de uma importação (ou simulação).
+    """
+    papel: str
+    simulacao: bool
+    total_linhas: int = 0
+    validas: int = 0
+    inseridos: int = 0
+    erros: list = field(default_factory=list)  # [(numero_da_linha, mensagem)]
+    senhas_geradas: list = field(default_factory=list)  # [(email, senha)] para quem veio sem senha
+    convites: list = field(default_factory=list)  # [(email, token)] quando importado com convites
+
+    @property
+    def sucesso(self):
+        return not self.erros
+
+
+class ErroImportacao(ValueError):
+    """
+    Arquivo ilegível ou sem as colunas obrigatórias.
+    """
+
+
+def ler_planilha(arquivo, nome_arquivo):
+    """
+    Lê um CSV (',' ou ';', UTF-8 com ou sem BOM) ou XLSX e devolve uma lista
+    de (numero_da_linha, {coluna: valor}).
+    """
+    if nome_arquivo.lower().endswith('.xlsx'):
+        return _ler_xlsx(arquivo)
+    return _ler_csv(arquivo)
+
+def _normalizar_cabecalho(cabecalho):
+    return [str(coluna or '').strip().lower() for coluna in cabecalho]
+
+def _ler_csv(arquivo):
+    conteudo = arquivo.read()
+    if isinstance(conteudo, bytes):
+        try:
+            conteudo = conteudo.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            conteudo = conteudo.decode('latin-1')
+    try:
+        dialeto = csv.Sniffer().sniff(conteudo[:4096], delimiters=',;')
+    except csv.Error:
+        dialeto = csv.excel
+
+    leitor = csv.reader(io.StringIO(conteudo), dialeto)
+    cabecalho = _normalizar_cabecalho(next(leitor, []))
+    return [
+        (numero, dict(zip(cabecalho, (valor.strip() for valor in valores))))
+        for numero, valores in enumerate(leitor, start=2)
+        if any(valor.strip() for valor in valores)
+    ]
+
+def _ler_xlsx(arquivo):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ErroImportacao('Importação de XLSX indisponível: instale o pacote openpyxl.')
+
+    planilha = load_workbook(arquivo, read_only=True, data_only=True).active
+    linhas = planilha.iter_rows(values_only=True)
+    cabecalho = _normalizar_cabecalho(next(linhas, ()))
+    resultado = []
+    for numero, valores in enumerate(linhas, start=2):
+        valores = ['' if valor is None else str(valor).strip() for valor in valores]
+        if any(valores):
+            resultado.append((numero, dict(zip(cabecalho, valores))))
+    return resultado
+
+
+def validar_linhas(linhas, papel, condominio_id):
+    """
+    Valida todas as linhas e devolve (registros_validos, erros).
+    Os e-mails já cadastrados são verificados com uma única consulta.
+    """
+    obrigatorias = COLUNAS_OBRIGATORIAS[papel]
+    if linhas:
+        faltando = [coluna for coluna in obrigatorias if coluna not in linhas[0][1]]
+        if faltando:
+            raise ErroImportacao(f"Colunas obrigatórias ausentes: {', '.join(faltando)}.")
+
+    portarias = {}
+    if papel == 'porteiro':
+        for portaria in Portaria.query.filter_by(condominio_id=condominio_id, is_ativo=True):
+            portarias[str(portaria.id)] = portaria.id
+            portarias[portaria.nome.strip().lower()] = portaria.id
+
+    registros, erros, emails_no_arquivo = [], [], {}
+    for numero, linha in linhas:
+        problemas = [f"'{coluna}' não preenchido" for coluna in obrigatorias if not linha.get(coluna)]
+
+        email = linha.get('email', '')
+        if email:
+            try:
+                email = validate_email(email, check_deliverability=False).normalized
+            except EmailNotValidError:
+                problemas.append(f"e-mail inválido: {email}")
+            if email in emails_no_arquivo:
+                problemas.append(f"e-mail repetido na linha {emails_no_arquivo[email]}")
+            else:
+                emails_no_arquivo[email] = numero
+
+        if len(linha.get('nome', '')) > 128 or len(email) > 128:
+            problemas.append('nome e e-mail devem ter até 128 caracteres')
+        if len(linha.get('apartamento', '')) > 32:
+            problemas.append('apartamento deve ter até 32 caracteres')
+
+        senha = linha.get('senha', '')
+        if senha and len(senha) < 6:
+            problemas.append('senha deve ter pelo menos 6 caracteres')
+
+        portaria_id = None
+        if papel == 'porteiro' and linha.get('portaria'):
+            portaria_id = portarias.get(linha['portaria'].strip().lower())
+            if portaria_id is None:
+                problemas.append(f"portaria não encontrada: {linha['portaria']}")
+
+        if problemas:
+            erros.append((numero, '; '.join(problemas)))
+            continue
+
+        registros.append({
+            'linha': numero,
+            'nome': linha['nome'],
+            'email': email,
+            'senha': senha,
+            'role': papel,
+            'apartamento': (linha.get('apartamento') or None) if papel == 'morador' else None,
+            'condominio_id': condominio_id,
+            'portaria_id': portaria_id,
+        })
+
+    if registros:
+        existentes = set(db.session.scalars(
+            db.select(User.email).where(User.email.in_([registro['email'] for registro in registros]))
+        ))
+        if existentes:
+            erros.extend((registro['linha'], f"e-mail já cadastrado: {registro['email']}")
+                         for registro in registros if registro['email'] in existentes)
+            registros = [registro for registro in registros if registro['email'] not in existentes]
+
+    erros.sort()
+    return registros, erros
+
+
+def gerar_hashes(senhas, processos=None):
+    """
+    Gera os hashes das senhas em paralelo (um processo por núcleo, por padrão).
+    Apenas para a linha de comando: não use no processo web.
+    """
+    processos = processos or os.cpu_count() or 1
+    gerar = partial(generate_password_hash, method=metodo_configurado())
+    if processos <= 1 or len(senhas) < MINIMO_LINHAS_POOL:
+        return [gerar(senha) for senha in senhas]
+
+    # 'spawn' evita herdar o estado do gevent e as conexões do processo web
+    with ProcessPoolExecutor(max_workers=processos, mp_context=get_context('spawn')) as pool:
+        return list(pool.map(gerar, senhas,
+                             chunksize=max(1, len(senhas) // (processos * 4))))
+
+
+def importar_usuarios(arquivo, nome_arquivo, papel, condominio_id, simular=False, processos=None,
+                      convites=False):
+    """
+    Importa moradores ou porteiros de uma planilha para o condomínio.
+    Nada é gravado se alguma linha for inválida ou se simular=True.
+    Com convites=True, a coluna 'senha' é ignorada: os usuários são gravados
+    sem senha e o resultado traz o token do convite de cada um.
+    """
+    if papel not in PAPEIS_IMPORTACAO:
+        raise ErroImportacao(f"Papel inválido: {papel}.")
+
+    linhas = ler_planilha(arquivo, nome_arquivo)
+    resultado = ResultadoImportacao(papel=papel, simulacao=simular, total_linhas=len(linhas))
+    registros, resultado.erros = validar_linhas(linhas, papel, condominio_id)
+    resultado.validas = len(registros)
+    if simular or resultado.erros or not registros:
+        return resultado
+
+    if convites:
+        hashes = [''] * len(registros)
+    else:
+        for registro in registros:
+            if not registro['senha']:
+                registro['senha'] = secrets.token_urlsafe(9)
+                resultado.senhas_geradas.append((registro['email'], registro['senha']))
+        hashes = gerar_hashes([registro['senha'] for registro in registros], processos)
+
+    tabela = User.__table__
+    colunas = ('nome', 'email', 'role', 'apartamento', 'condominio_id', 'portaria_id')
+    try:
+        for inicio in range(0, len(registros), TAMANHO_LOTE_IMPORTACAO):
+            lote = [
+                dict({coluna: registro[coluna] for coluna in colunas}, senha_hash=senha_hash,
+                     termos_busca=termos_usuario(registro['nome'], registro['apartamento']))
+                for registro, senha_hash in zip(registros[inicio:inicio + TAMANHO_LOTE_IMPORTACAO],
+                                                hashes[inicio:inicio + TAMANHO_LOTE_IMPORTACAO])
+            ]
+            db.session.execute(tabela.insert().values(lote))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # O INSERT em massa não passa pelo ORM, então os hooks do cache e da busca
+    # não o veem (termos_busca é preenchido acima)
+    cache_condominio.invalidar(condominio_id, 'User')
+    resultado.inseridos = len(registros)
+
+    if convites:
+        emails = [registro['email'] for registro in registros]
+        ids = {}
+        for inicio in range(0, len(emails), TAMANHO_LOTE_IMPORTACAO):
+            ids.update(db.session.execute(
+                db.select(User.email, User.id).where(User.email.in_(emails[inicio:inicio + TAMANHO_LOTE_IMPORTACAO]))
+            ).all())
+        resultado.convites = [(email, gerar_convite(ids[email])) for email in emails]
+    return resultado
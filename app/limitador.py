@@ -0,0 +1,203 @@
+# app/limitador.py
+# Limite de tentativas de login por IP e por e-mail (token bucket).
+#
+# Cada chave ('ip:<endereço>' ou 'email:<e-mail>') tem um balde com até
+# 'capacidade' fichas, reabastecido continuamente à taxa configurada. Cada
+# tentativa de login gasta uma ficha; sem fichas, a tentativa é recusada com
+# 429 antes de qualquer consulta ao banco ou cálculo de hash (ver main.login).
+# Uma rajada de credential stuffing esgota o balde do IP em poucos segundos e
+# deixa os workers livres para as portarias.
+#
+# Backends (Config.LIMITE_LOGIN_BACKEND):
+#   - 'memoria': em processo, sem locks: o balde é uma tupla imutável trocada
+#     inteira no dicionário. Com o gevent não há troca de greenlet entre a
+#     leitura e a escrita; com threads, duas tentativas simultâneas na mesma
+#     chave podem gastar uma ficha só, o que é aceitável para um limite. Cada
+#     worker tem os seus baldes.
+#   - 'redis': compartilhado entre workers, atualizado atomicamente por um script Lua
+#   - 'nenhum': desativa o limite
+
+import logging
+import time
+from datetime import datetime
+from itertools import islice
+
+logger = logging.getLogger('easygate.limitador')
+
+# Ocupação de BaldesMemoria depois de uma poda (fração de max_baldes)
+FRACAO_APOS_PODA = 0.9
+
+# Script do balde no Redis: reabastece, tenta gastar e grava (fichas, atualizado_em)
+_SCRIPT_REDIS = """
+local capacidade = tonumber(ARGV[1])
+local taxa = tonumber(ARGV[2])
+local agora = tonumber(ARGV[3])
+local custo = tonumber(ARGV[4])
+local balde = redis.call('HMGET', KEYS[1], 'fichas', 'atualizado_em')
+local fichas = tonumber(balde[1]) or capacidade
+local atualizado_em = tonumber(balde[2]) or agora
+fichas = math.min(capacidade, fichas + math.max(0, agora - atualizado_em) * taxa)
+local permitido = 0
+if fichas >= custo then
+    fichas = fichas - custo
+    permitido = 1
+end
+redis.call('HSET', KEYS[1], 'fichas', tostring(fichas), 'atualizado_em', tostring(agora))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacidade / taxa) + 1)
+return {permitido, tostring(fichas)}
+"""
+
+
+def _reabastecer(fichas, atualizado_em, capacidade, taxa, agora):
+    return min(capacidade, fichas + max(0.0, agora - atualizado_em) * taxa)
+
+
+class BaldesMemoria:
+    """
+    Baldes em processo, na ordem do último uso. Quando o dicionário passa de
+    'max_baldes', os usados há mais tempo são descartados até sobrarem
+    FRACAO_APOS_PODA deles; descartar um balde equivale a devolvê-lo cheio.
+    """
+
+    def __init__(self, max_baldes=10000):
+        self.max_baldes = max_baldes
+        self._baldes = {}
+
+    def consumir(self, chave, capacidade, taxa, agora, custo=1):
+        fichas, atualizado_em = self._baldes.get(chave, (capacidade, agora))
+        fichas = _reabastecer(fichas, atualizado_em, capacidade, taxa, agora)
+        permitido = fichas >= custo
+        if permitido:
+            fichas -= custo
+        # Reinsere no fim: a ordem do dicionário passa a ser a do último uso
+        self._baldes.pop(chave, None)
+        self._baldes[chave] = (fichas, agora)
+        if len(self._baldes) > self.max_baldes:
+            self._podar()
+        return permitido, fichas
+
+    def _podar(self):
+        # Remove do início (uso mais antigo) uma folga de max_baldes: cada poda
+        # custa o que foi removido, O(1) amortizado por tentativa de login
+        excesso = len(self._baldes) - int(self.max_baldes * FRACAO_APOS_PODA)
+        for chave in list(islice(self._baldes, max(excesso, 0))):
+            self._baldes.pop(chave, None)
+
+    def estados(self, limite):
+        return [(chave, fichas, atualizado_em)
+                for chave, (fichas, atualizado_em) in list(self._baldes.items())[-limite:]]
+
+    def excluir(self, chave):
+        self._baldes.pop(chave, None)
+
+
+class BaldesRedis:
+    """
+    Baldes compartilhados em um servidor Redis (ou compatível).
+    """
+
+    def __init__(self, url, prefixo='easygate:limite:'):
+        import redis
+        self.redis = redis.Redis.from_url(url)
+        self.prefixo = prefixo
+        self._script = self.redis.register_script(_SCRIPT_REDIS)
+
+    def consumir(self, chave, capacidade, taxa, agora, custo=1):
+        permitido, fichas = self._script(keys=[self.prefixo + chave], args=[capacidade, taxa, agora, custo])
+        return bool(permitido), float(fichas)
+
+    def estados(self, limite):
+        estados = []
+        for nome in self.redis.scan_iter(match=self.prefixo + '*', count=500):
+            fichas, atualizado_em = self.redis.hmget(nome, 'fichas', 'atualizado_em')
+            if fichas is not None:
+                estados.append((nome.decode()[len(self.prefixo):], float(fichas), float(atualizado_em)))
+            if len(estados) >= limite:
+                break
+        return estados
+
+    def excluir(self, chave):
+        self.redis.delete(self.prefixo + chave)
+
+
+class LimitadorLogin:
+    """
+    Limites de tentativas de login por IP e por e-mail, com contadores de recusas.
+    """
+
+    def __init__(self):
+        self.backend = None
+        # tipo -> (capacidade, fichas por segundo)
+        self.limites = {'ip': (20, 20 / 60), 'email': (5, 5 / 300)}
+        self.recusadas = {'ip': 0, 'email': 0}
+
+    def init_app(self, app):
+        tipo = app.config.get('LIMITE_LOGIN_BACKEND', 'memoria')
+        # Capacidade de N tentativas, reabastecida por completo em JANELA segundos
+        por_ip = app.config.get('LIMITE_LOGIN_IP', 20)
+        por_email = app.config.get('LIMITE_LOGIN_EMAIL', 5)
+        self.limites = {
+            'ip': (por_ip, por_ip / app.config.get('LIMITE_LOGIN_IP_JANELA', 60)),
+            'email': (por_email, por_email / app.config.get('LIMITE_LOGIN_EMAIL_JANELA', 300)),
+        }
+        if tipo == 'redis':
+            self.backend = BaldesRedis(app.config.get('LIMITE_LOGIN_REDIS_URL') or app.config['CACHE_REDIS_URL'])
+        elif tipo == 'nenhum':
+            self.backend = None
+        else:
+            self.backend = BaldesMemoria(app.config.get('LIMITE_LOGIN_MAX_BALDES', 10000))
+
+    def limite_da_chave(self, chave):
+        return self.limites[chave.split(':', 1)[0]]
+
+    def consumir(self, tipo, valor):
+        """
+        Gasta uma ficha do balde de (tipo, valor). Retorna 0 se a tentativa é
+        permitida, ou quantos segundos faltam para a próxima ficha.
+        """
+        if self.backend is None or not valor:
+            return 0
+        capacidade, taxa = self.limites[tipo]
+        try:
+            permitido, fichas = self.backend.consumir(f'{tipo}:{valor}', capacidade, taxa, time.time())
+        except Exception as e:
+            # Um backend indisponível não pode impedir o login
+            logger.warning('Erro ao consultar o limite de login: %s', e)
+            return 0
+        if permitido:
+            return 0
+        self.recusadas[tipo] += 1
+        return (1 - fichas) / taxa
+
+    def estados(self, limite=500):
+        """
+        Baldes conhecidos com as fichas disponíveis agora, os mais vazios primeiro.
+        """
+        if self.backend is None:
+            return []
+        agora = time.time()
+        estados = []
+        for chave, fichas, atualizado_em in self.backend.estados(limite):
+            capacidade, taxa = self.limite_da_chave(chave)
+            disponiveis = _reabastecer(fichas, atualizado_em, capacidade, taxa, agora)
+            estados.append({
+                'chave': chave,
+                'fichas': round(disponiveis, 2),
+                'capacidade': capacidade,
+                'bloqueado': disponiveis < 1,
+                'ultimo_uso': datetime.fromtimestamp(atualizado_em),
+            })
+        return sorted(estados, key=lambda estado: (estado['fichas'] / estado['capacidade'], estado['chave']))
+
+    def liberar(self, chave):
+        if self.backend is not None:
+            self.backend.excluir(chave)
+
+    def estatisticas(self):
+        return {
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'recusadas': dict(self.recusadas),
+        }
+
+
+limitador_login = LimitadorLogin()
@@ -0,0 +1,244 @@
+# app/metricas.py
+# Métricas por endpoint: tempo total da requisição, quantidade e tempo das
+# consultas SQL, tempo de renderização dos templates e tamanho da resposta.
+#
+# As consultas são medidas nos eventos before/after_cursor_execute do engine e
+# somadas à requisição corrente (flask.g); a renderização, pelos sinais
+# before_render_template/template_rendered do Flask. Os totais ficam em memória
+# no processo e são expostos em /metrics no formato texto do Prometheus, junto
+# com as métricas do pool de conexões (app/banco.py) e do cache (app/cache.py).
+# /metrics só responde com METRICAS_TOKEN definido (obrigatório em produção).
+# Cada worker tem os seus contadores: o Prometheus deve coletar cada um.
+#
+# Com METRICAS_SERVER_TIMING, cada resposta leva o cabeçalho Server-Timing,
+# que aparece na aba de rede do navegador.
+
+import hmac
+import threading
+import time
+from flask import Blueprint, Response, abort, current_app, g, has_request_context, request
+from flask import before_render_template, template_rendered
+from sqlalchemy import event
+
+# Limites (em segundos) do histograma de duração das requisições
+FAIXAS_DURACAO = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class TotaisEndpoint:
+    """
+    Somatórios de um endpoint desde o início do processo.
+    """
+
+    def __init__(self):
+        self.requisicoes = {}  # (metodo, status) -> quantidade
+        self.duracoes_por_faixa = [0] * (len(FAIXAS_DURACAO) + 1)
+        self.duracao_total = 0.0
+        self.consultas = 0
+        self.tempo_banco = 0.0
+        self.tempo_render = 0.0
+        self.bytes_resposta = 0
+
+    @property
+    def quantidade(self):
+        return sum(self.requisicoes.values())
+
+
+class MetricasRequisicao:
+    """
+    Coleta as métricas de cada requisição e as agrega por endpoint.
+    """
+
+    def __init__(self):
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app, engine):
+        app.before_request(self._iniciar)
+        app.after_request(self._finalizar)
+        before_render_template.connect(self._antes_render, app)
+        template_rendered.connect(self._depois_render, app)
+        if not event.contains(engine, 'before_cursor_execute', _antes_consulta):
+            event.listen(engine, 'before_cursor_execute', _antes_consulta)
+            event.listen(engine, 'after_cursor_execute', _depois_consulta)
+        app.register_blueprint(metricas)
+
+    # Requisição -----------------------------------------------------------------
+
+    @staticmethod
+    def _iniciar():
+        g.metricas = {'inicio': time.perf_counter(), 'consultas': 0, 'tempo_banco': 0.0,
+                      'tempo_render': 0.0, 'inicio_render': None}
+
+    def _finalizar(self, response):
+        dados = g.pop('metricas', None)
+        if dados is None:
+            return response
+        duracao = time.perf_counter() - dados['inicio']
+        tamanho = response.calculate_content_length() if not response.is_streamed else None
+        endpoint = request.endpoint or 'sem_rota'
+
+        with self._lock:
+            totais = self.endpoints.get(endpoint)
+            if totais is None:
+                totais = self.endpoints[endpoint] = TotaisEndpoint()
+            chave = (request.method, response.status_code)
+            totais.requisicoes[chave] = totais.requisicoes.get(chave, 0) + 1
+            totais.duracao_total += duracao
+            totais.consultas += dados['consultas']
+            totais.tempo_banco += dados['tempo_banco']
+            totais.tempo_render += dados['tempo_render']
+            totais.bytes_resposta += tamanho or 0
+            for indice, limite in enumerate(FAIXAS_DURACAO):
+                if duracao <= limite:
+                    totais.duracoes_por_faixa[indice] += 1
+                    break
+            else:
+                totais.duracoes_por_faixa[-1] += 1
+
+        if current_app.config.get('METRICAS_SERVER_TIMING'):
+            response.headers['Server-Timing'] = ', '.join((
+                f"app;dur={duracao * 1000:.1f}",
+                f"db;dur={dados['tempo_banco'] * 1000:.1f};desc=\"{dados['consultas']} consultas\"",
+                f"render;dur={dados['tempo_render'] * 1000:.1f}",
+            ))
+        return response
+
+    @staticmethod
+    def _antes_render(app, template, context, **extra):
+        dados = g.get('metricas')
+        # Templates incluídos por outro não são contados duas vezes
+        if dados is not None and dados['inicio_render'] is None:
+            dados['inicio_render'] = time.perf_counter()
+
+    @staticmethod
+    def _depois_render(app, template, context, **extra):
+        dados = g.get('metricas')
+        if dados is not None and dados['inicio_render'] is not None:
+            dados['tempo_render'] += time.perf_counter() - dados['inicio_render']
+            dados['inicio_render'] = None
+
+    # Exportação -----------------------------------------------------------------
+
+    def exportar(self):
+        """
+        Texto no formato de exposição do Prometheus.
+        """
+        from app.banco import FAIXAS_ESPERA, estatisticas_pool
+        from app.cache import cache_condominio
+        from app.limitador import limitador_login
+
+        linhas = []
+
+        def metrica(nome, tipo, ajuda, valores):
+            linhas.append(f'# HELP easygate_{nome} {ajuda}')
+            linhas.append(f'# TYPE easygate_{nome} {tipo}')
+            for rotulos, valor in valores:
+                texto_rotulos = ','.join(f'{chave}="{_escapar_rotulo(valor_rotulo)}"'
+                                         for chave, valor_rotulo in rotulos.items())
+                linhas.append(f'easygate_{nome}{{{texto_rotulos}}} {valor}' if texto_rotulos
+                              else f'easygate_{nome} {valor}')
+
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+            metrica('requisicoes_total', 'counter', 'Requisições atendidas.', [
+                ({'endpoint': endpoint, 'metodo': metodo, 'status': status}, quantidade)
+                for endpoint, totais in endpoints
+                for (metodo, status), quantidade in sorted(totais.requisicoes.items())
+            ])
+
+            histograma = []
+            for endpoint, totais in endpoints:
+                acumulado = 0
+                for limite, quantidade in zip(FAIXAS_DURACAO, totais.duracoes_por_faixa):
+                    acumulado += quantidade
+                    histograma.append(({'endpoint': endpoint, 'le': limite}, acumulado))
+                histograma.append(({'endpoint': endpoint, 'le': '+Inf'}, totais.quantidade))
+            linhas.append('# HELP easygate_requisicao_duracao_segundos Duração das requisições.')
+            linhas.append('# TYPE easygate_requisicao_duracao_segundos histogram')
+            for rotulos, valor in histograma:
+                linhas.append(f'easygate_requisicao_duracao_segundos_bucket'
+                              f'{{endpoint="{_escapar_rotulo(rotulos["endpoint"])}",le="{rotulos["le"]}"}} {valor}')
+            for endpoint, totais in endpoints:
+                rotulo = _escapar_rotulo(endpoint)
+                linhas.append(f'easygate_requisicao_duracao_segundos_sum{{endpoint="{rotulo}"}} {totais.duracao_total:.6f}')
+                linhas.append(f'easygate_requisicao_duracao_segundos_count{{endpoint="{rotulo}"}} {totais.quantidade}')
+
+            metrica('sql_consultas_total', 'counter', 'Consultas SQL executadas nas requisições.',
+                    [({'endpoint': endpoint}, totais.consultas) for endpoint, totais in endpoints])
+            metrica('sql_segundos_total', 'counter', 'Tempo gasto em consultas SQL nas requisições.',
+                    [({'endpoint': endpoint}, f'{totais.tempo_banco:.6f}') for endpoint, totais in endpoints])
+            metrica('render_segundos_total', 'counter', 'Tempo gasto renderizando templates.',
+                    [({'endpoint': endpoint}, f'{totais.tempo_render:.6f}') for endpoint, totais in endpoints])
+            metrica('resposta_bytes_total', 'counter', 'Bytes enviados no corpo das respostas.',
+                    [({'endpoint': endpoint}, totais.bytes_resposta) for endpoint, totais in endpoints])
+
+        pool = estatisticas_pool.resumo()
+        if pool['tamanho'] is not None:
+            metrica('pool_conexoes', 'gauge', 'Conexões do pool por estado.', [
+                ({'estado': 'em_uso'}, pool['em_uso']),
+                ({'estado': 'livres'}, pool['livres']),
+                ({'estado': 'overflow'}, max(pool['overflow'], 0)),
+            ])
+        metrica('pool_checkouts_total', 'counter', 'Conexões retiradas do pool.', [({}, pool['checkouts'])])
+        metrica('pool_espera_segundos_total', 'counter', 'Tempo esperando por uma conexão livre.',
+                [({}, pool['espera_total_s'])])
+        metrica('pool_timeouts_total', 'counter', 'Checkouts que estouraram DB_POOL_TIMEOUT.', [({}, pool['timeouts'])])
+        metrica('pool_esperas_total', 'counter', 'Checkouts por faixa de espera, em segundos (não acumulado).', [
+            ({'faixa': rotulo}, quantidade)
+            for rotulo, quantidade in zip([str(limite) for limite in FAIXAS_ESPERA] + ['+Inf'],
+                                          estatisticas_pool.esperas_por_faixa)
+        ])
+
+        cache = cache_condominio.estatisticas()
+        metrica('cache_consultas_total', 'counter', 'Consultas ao cache por condomínio.', [
+            ({'resultado': 'acerto'}, cache['acertos']),
+            ({'resultado': 'falha'}, cache['falhas']),
+        ])
+        metrica('cache_invalidacoes_total', 'counter', 'Invalidações do cache por condomínio.',
+                [({}, cache['invalidacoes'])])
+
+        metrica('login_recusas_total', 'counter', 'Tentativas de login recusadas pelo limite, por tipo de balde.',
+                [({'tipo': tipo}, quantidade) for tipo, quantidade in sorted(limitador_login.recusadas.items())])
+        return '\n'.join(linhas) + '\n'
+
+
+def _escapar_rotulo(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+metricas_requisicao = MetricasRequisicao()
+
+
+# ==============================================================================
+# Consultas SQL
+# ==============================================================================
+
+def _antes_consulta(conexao, cursor, comando, parametros, contexto, executemany):
+    contexto._inicio_consulta = time.perf_counter()
+
+def _depois_consulta(conexao, cursor, comando, parametros, contexto, executemany):
+    # Consultas fora de uma requisição (CLI, tarefas em segundo plano) não entram
+    if not has_request_context():
+        return
+    dados = g.get('metricas')
+    if dados is not None:
+        dados['consultas'] += 1
+        dados['tempo_banco'] += time.perf_counter() - contexto._inicio_consulta
+
+
+# ==============================================================================
+# Endpoint /metrics
+# ==============================================================================
+
+metricas = Blueprint('metricas', __name__)
+
+@metricas.route('/metrics')
+def exportar_metricas():
+    # Sem login: o coletor do Prometheus se autentica com METRICAS_TOKEN. Sem
+    # token configurado, o endpoint não existe (404)
+    token = current_app.config.get('METRICAS_TOKEN')
+    if not token:
+        abort(404)
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()):
+        abort(401)
+    return Response(metricas_requisicao.exportar(), mimetype='text/plain; version=0.0.4')
@@ -1,8 +1,24 @@
 # app/models.py
+import re
 from app import db
 from datetime import datetime
+from sqlalchemy.orm import validates
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.senhas import gerar_hash, verificar_senha
+
+def normalizar_cpf(cpf):
+    """
+    Apenas os dígitos do CPF (ex.: '123.456.789-00' -> '12345678900'), ou None.
+    """
+    digitos = re.sub(r'\D', '', cpf or '')
+    return digitos or None
+
+def normalizar_placa(placa):
+    """
+    Placa em maiúsculas, sem hífen ou espaços (ex.: 'abc-1d23' -> 'ABC1D23'), ou None.
+    """
+    placa = re.sub(r'[^0-9A-Za-z]', '', placa or '').upper()
+    return placa or None
 
 class User(UserMixin, db.Model):
     __tablename__ = 'usuarios'
@@ -21,6 +37,13 @@ class User(UserMixin, db.Model):
     
     # RELAÇÃO COM A PORTARIA (NOVO)
     portaria_id = db.Column(db.Integer, db.ForeignKey('portarias.id'))
+
+    # Nome e apartamento normalizados para a busca (mantido por app/busca.py)
+    termos_busca = db.Column(db.String(512))
+
+    # Última alteração da linha, usada no ETag das páginas (ver app/condicional.py)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now,
+                           server_default=db.func.now())
     
     # Relações
     condominio = db.relationship('Condominio', back_populates='usuarios')
@@ -32,11 +55,20 @@ class User(UserMixin, db.Model):
         backref=db.backref('referred_by', remote_side=[id])
     )
 
+    # Listagens e contagens de moradores/porteiros filtram sempre por condomínio e papel.
+    # O índice de trigramas (só no PostgreSQL) atende a busca por trechos de texto.
+    __table_args__ = (
+        db.Index('ix_usuarios_condominio_role', 'condominio_id', 'role'),
+        db.Index('ix_usuarios_condominio_updated_at', 'condominio_id', 'updated_at'),
+        db.Index('ix_usuarios_termos_busca_trgm', 'termos_busca',
+                 postgresql_using='gin', postgresql_ops={'termos_busca': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
+
     def set_senha(self, senha):
-        self.senha_hash = generate_password_hash(senha)
+        self.senha_hash = gerar_hash(senha)
 
     def check_senha(self, senha):
-        return check_password_hash(self.senha_hash, senha)
+        return verificar_senha(self.senha_hash, senha)
     
     def get_id(self):
         return str(self.id)
@@ -53,6 +85,10 @@ class Condominio(db.Model):
     data_fim_carencia = db.Column(db.DateTime)
     
     plano_id = db.Column(db.Integer, db.ForeignKey('planos.id'))
+
+    # Última alteração da linha, usada no ETag das páginas (ver app/condicional.py)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now,
+                           server_default=db.func.now())
     
     # Relações
     plano = db.relationship('Plano', back_populates='condominios')
@@ -84,8 +120,19 @@ class Profissional(db.Model):
     nome = db.Column(db.String(128), nullable=False)
     cpf = db.Column(db.String(14), unique=True, nullable=True)
     placa_veiculo = db.Column(db.String(10))
+    # Formas normalizadas usadas nas consultas da portaria (preenchidas pelos validates abaixo).
+    # O CPF normalizado é único: '123.456.789-00' e '12345678900' são o mesmo profissional.
+    cpf_normalizado = db.Column(db.String(14), unique=True, index=True)
+    placa_normalizada = db.Column(db.String(10), index=True)
     empresa = db.Column(db.String(128)) 
     url_foto = db.Column(db.String(256)) 
+
+    # Nome, CPF, placa e empresa normalizados para a busca (mantido por app/busca.py)
+    termos_busca = db.Column(db.String(512))
+
+    # Última alteração da linha, usada no ETag das páginas (ver app/condicional.py)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now,
+                           server_default=db.func.now())
     
     # Relações
     acessos = db.relationship('Acesso', back_populates='profissional')
@@ -93,6 +140,21 @@ class Profissional(db.Model):
     # NOVA RELAÇÃO COM O USUÁRIO DE ACESSO
     usuario_acesso = db.relationship('User', back_populates='profissional', uselist=False)
 
+    __table_args__ = (
+        db.Index('ix_profissionais_termos_busca_trgm', 'termos_busca',
+                 postgresql_using='gin', postgresql_ops={'termos_busca': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
+
+    @validates('cpf')
+    def _normalizar_cpf(self, chave, cpf):
+        self.cpf_normalizado = normalizar_cpf(cpf)
+        return cpf
+
+    @validates('placa_veiculo')
+    def _normalizar_placa(self, chave, placa_veiculo):
+        self.placa_normalizada = normalizar_placa(placa_veiculo)
+        return placa_veiculo
+
     def __repr__(self):
         return f'<Profissional {self.nome}>'
 
@@ -113,6 +175,13 @@ class Acesso(db.Model):
     profissional_id = db.Column(db.Integer, db.ForeignKey('profissionais.id'))
     usuario_morador_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'))
     usuario_porteiro_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'))
+    # Quem registrou a saída; vazio nas saídas do encerramento automático
+    usuario_porteiro_saida_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'))
+    saida_automatica = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+
+    # Última alteração da linha, usada no ETag das páginas (ver app/condicional.py)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now,
+                           server_default=db.func.now())
     
     # NOVO CAMPO PARA A PORTARIA
     portaria_id = db.Column(db.Integer, db.ForeignKey('portarias.id'))
@@ -122,8 +191,25 @@ class Acesso(db.Model):
     profissional = db.relationship('Profissional', back_populates='acessos')
     morador = db.relationship('User', foreign_keys=[usuario_morador_id])
     porteiro = db.relationship('User', foreign_keys=[usuario_porteiro_id])
+    porteiro_saida = db.relationship('User', foreign_keys=[usuario_porteiro_saida_id])
     portaria = db.relationship('Portaria', back_populates='acessos')
 
+    # Índices para as consultas mais frequentes dos painéis (ver app/services.py).
+    # O índice parcial cobre apenas os acessos em aberto, que são poucos em
+    # relação ao histórico e consultados a cada atualização da portaria.
+    __table_args__ = (
+        db.Index('ix_acessos_condominio_status', 'condominio_id', 'status'),
+        db.Index('ix_acessos_condominio_data_acesso', 'condominio_id', 'data_acesso'),
+        db.Index('ix_acessos_morador_data_prevista', 'usuario_morador_id', 'data_prevista_acesso'),
+        db.Index('ix_acessos_profissional_data_acesso', 'profissional_id', 'data_acesso'),
+        db.Index(
+            'ix_acessos_abertos',
+            'condominio_id', 'status', 'data_acesso',
+            postgresql_where=db.text("status IN ('pendente', 'em_andamento')"),
+            sqlite_where=db.text("status IN ('pendente', 'em_andamento')"),
+        ),
+    )
+
     def __repr__(self):
         return f'<Acesso {self.id} | Status: {self.status}>'
 
@@ -134,8 +220,47 @@ class Portaria(db.Model):
     condominio_id = db.Column(db.Integer, db.ForeignKey('condominios.id'), nullable=False)
     qr_code_portaria = db.Column(db.String(256), nullable=True) # Campo para o QR Code
     is_ativo = db.Column(db.Boolean, default=True) # Campo para 'soft-delete'
+
+    # Última alteração da linha, usada no ETag das páginas (ver app/condicional.py)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now,
+                           server_default=db.func.now())
     
     # Relação com usuários (porteiros)
     usuarios = db.relationship('User', backref='portaria', lazy=True)
     # RELAÇÃO COM ACESSOS (NOVO)
-    acessos = db.relationship('Acesso', back_populates='portaria', lazy=True)
\ No newline at end of file
+    acessos = db.relationship('Acesso', back_populates='portaria', lazy=True)
+
+class AcessoDiario(db.Model):
+    """
+    Consolidado diário de acessos por condomínio e portaria, mantido de forma
+    incremental (ver app/rollup.py). Painéis e relatórios somam dias em vez de
+    contar o histórico inteiro de acessos.
+    """
+    __tablename__ = 'acessos_diarios'
+    condominio_id = db.Column(db.Integer, db.ForeignKey('condominios.id'), primary_key=True)
+    # 0 = acessos sem portaria (ex.: pré-autorizações e check-ins sem portaria definida)
+    portaria_id = db.Column(db.Integer, primary_key=True, default=0)
+    dia = db.Column(db.Date, primary_key=True)
+
+    total = db.Column(db.Integer, nullable=False, default=0)
+    pendentes = db.Column(db.Integer, nullable=False, default=0)
+    em_andamento = db.Column(db.Integer, nullable=False, default=0)
+    finalizados = db.Column(db.Integer, nullable=False, default=0)
+    # Soma e quantidade das permanências (entrada até saída) dos acessos finalizados
+    permanencia_total_segundos = db.Column(db.BigInteger, nullable=False, default=0)
+    permanencia_quantidade = db.Column(db.Integer, nullable=False, default=0)
+
+    @property
+    def permanencia_media_segundos(self):
+        if not self.permanencia_quantidade:
+            return None
+        return self.permanencia_total_segundos / self.permanencia_quantidade
+
+    def __repr__(self):
+        return f'<AcessoDiario {self.condominio_id}/{self.portaria_id} {self.dia}>'
+
+# Os índices de trigramas dependem da extensão pg_trgm
+db.event.listen(
+    db.metadata, 'before_create',
+    db.DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
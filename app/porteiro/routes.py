@@ -2,7 +2,8 @@
 
 # Este arquivo define as rotas e a lógica para o Blueprint do porteiro.
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+import math
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from app.decorators import permission_required
 from app.forms import (
@@ -16,9 +17,12 @@ from app.services import (
     get_ultimos_acessos_hoje,
     registrar_entrada_acesso_autorizado,
     registrar_saida_acesso,
+    registrar_saidas_em_lote,
     buscar_profissional_por_cpf,
+    buscar_profissionais_por_placa,
     criar_profissional_acesso_imediato
 )
+from app.busca import buscar_para_acesso_imediato
 
 # Cria o Blueprint do Porteiro com o prefixo de URL
 porteiro = Blueprint('porteiro', __name__, url_prefix='/porteiro', template_folder='templates')
@@ -33,35 +37,153 @@ def porteiro_dashboard():
     ultimos_acessos = get_ultimos_acessos_hoje(current_user.condominio_id)
     
     # CORREÇÃO: Usar o nome do arquivo HTML diretamente.
+    # Os nomes das variáveis seguem os usados em dashboard_porteiro.html.
     return render_template('dashboard_porteiro.html', 
                            acessos_em_andamento=acessos_em_andamento,
+                           acessos_em_andamento_count=len(acessos_em_andamento),
                            pre_autorizacoes_pendentes=pre_autorizacoes_pendentes,
-                           total_acessos=total_acessos,
-                           ultimos_acessos=ultimos_acessos)
+                           pre_autorizacoes_pendentes_count=len(pre_autorizacoes_pendentes),
+                           total_acessos_hoje=total_acessos,
+                           ultimos_acessos_hoje=ultimos_acessos)
+
+# Mensagens de erro por motivo de falha da transição (ver app/transicoes.py)
+MENSAGENS_TRANSICAO = {
+    'nao_encontrado': 'Acesso não encontrado neste condomínio.',
+    'status_invalido': 'O acesso já foi atualizado por outra portaria.',
+}
+
+def _responder_acao(resultado, mensagem_sucesso, mensagem_erro):
+    """
+    Responde a uma ação do porteiro. Chamadas feitas pelo painel via fetch
+    (Accept: application/json) recebem só o resultado, e a tabela é atualizada
+    pelo evento em tempo real; formulários comuns seguem com redirect.
+    """
+    sucesso = bool(resultado)
+    if not sucesso:
+        mensagem_erro = MENSAGENS_TRANSICAO.get(getattr(resultado, 'motivo', None), mensagem_erro)
+
+    if request.accept_mimetypes.best == 'application/json':
+        mensagem = mensagem_sucesso if sucesso else mensagem_erro
+        corpo = {'sucesso': sucesso, 'mensagem': mensagem}
+        if hasattr(resultado, 'status'):
+            corpo['status'] = resultado.status
+        return jsonify(corpo), (200 if sucesso else 409)
+
+    if sucesso:
+        flash(mensagem_sucesso, 'success')
+    else:
+        flash(mensagem_erro, 'danger')
+    # CORREÇÃO: O endpoint correto é o nome da função que renderiza o dashboard.
+    return redirect(url_for('porteiro.porteiro_dashboard'))
 
 @porteiro.route('/autorizar-acesso/<int:acesso_id>', methods=['POST'])
 @login_required
 @permission_required('porteiro')
 def autorizar_acesso(acesso_id):
-    if registrar_entrada_acesso_autorizado(acesso_id, current_user.id):
-        flash('Acesso autorizado com sucesso!', 'success')
-    else:
-        flash('Erro ao autorizar acesso. Tente novamente.', 'danger')
-        
-    # CORREÇÃO: O endpoint correto é o nome da função que renderiza o dashboard.
-    return redirect(url_for('porteiro.porteiro_dashboard'))
+    return _responder_acao(
+        registrar_entrada_acesso_autorizado(acesso_id, current_user.id,
+                                            current_user.condominio_id, current_user.portaria_id),
+        'Acesso autorizado com sucesso!',
+        'Erro ao autorizar acesso. Tente novamente.'
+    )
 
 @porteiro.route('/registrar-saida/<int:acesso_id>', methods=['POST'])
 @login_required
 @permission_required('porteiro')
 def registrar_saida(acesso_id):
-    if registrar_saida_acesso(acesso_id, current_user.id):
-        flash('Saída registrada com sucesso!', 'success')
+    return _responder_acao(
+        registrar_saida_acesso(acesso_id, current_user.id, current_user.condominio_id),
+        'Saída registrada com sucesso!',
+        'Erro ao registrar saída. O acesso pode já ter sido finalizado.'
+    )
+
+# Máximo de ids por chamada da saída em lote
+LIMITE_SAIDAS_LOTE = 500
+# Maior valor aceito para 'horas' (um ano)
+LIMITE_HORAS_LOTE = 24 * 365
+
+def _ler_saidas_em_lote(dados):
+    """
+    Valida o corpo da saída em lote. Retorna (acesso_ids, portaria_id, horas)
+    ou levanta ValueError com a mensagem para o porteiro.
+    """
+    if not isinstance(dados, dict):
+        raise ValueError('Parâmetros inválidos.')
+    acesso_ids = dados.get('acesso_ids')
+    portaria_id = dados.get('portaria_id')
+    horas = dados.get('horas')
+    try:
+        if acesso_ids is not None:
+            if not isinstance(acesso_ids, list) or not all(
+                    isinstance(i, int) and not isinstance(i, bool) for i in acesso_ids):
+                raise ValueError
+        if portaria_id is not None:
+            portaria_id = int(portaria_id)
+        if horas is not None:
+            horas = float(horas)
+            if not math.isfinite(horas) or not 0 <= horas <= LIMITE_HORAS_LOTE:
+                raise ValueError
+    except (TypeError, ValueError):
+        raise ValueError('Parâmetros inválidos.')
+
+    if acesso_ids is None and portaria_id is None and horas is None:
+        raise ValueError('Informe acesso_ids, portaria_id ou horas.')
+    if acesso_ids is not None and not 0 < len(acesso_ids) <= LIMITE_SAIDAS_LOTE:
+        raise ValueError(f'Selecione de 1 a {LIMITE_SAIDAS_LOTE} acessos.')
+    return acesso_ids, portaria_id, horas
+
+@porteiro.route('/api/saidas-em-lote', methods=['POST'])
+@login_required
+@permission_required('porteiro')
+def api_saidas_em_lote():
+    """
+    Fim de turno: finaliza de uma vez os acessos em andamento selecionados
+    (acesso_ids), de uma portaria (portaria_id) e/ou abertos há mais de 'horas'.
+    Os filtros informados são combinados; ao menos um é obrigatório.
+    """
+    try:
+        acesso_ids, portaria_id, horas = _ler_saidas_em_lote(request.get_json(silent=True) or {})
+    except ValueError as erro:
+        return jsonify({'sucesso': False, 'mensagem': str(erro)}), 400
+
+    finalizados = registrar_saidas_em_lote(current_user.id, current_user.condominio_id,
+                                           acesso_ids=acesso_ids, portaria_id=portaria_id, horas=horas)
+    return jsonify({
+        'sucesso': True,
+        'mensagem': f'{len(finalizados)} saída(s) registrada(s).',
+        'acesso_ids': finalizados,
+    })
+
+@porteiro.route('/api/busca')
+@login_required
+@permission_required('porteiro')
+def api_busca():
+    """Typeahead do acesso imediato: profissionais e moradores do condomínio."""
+    return jsonify(buscar_para_acesso_imediato(current_user.condominio_id, request.args.get('q', '')))
+
+def _profissional_json(profissional):
+    return {
+        'id': profissional.id,
+        'nome': profissional.nome,
+        'cpf': profissional.cpf,
+        'placa_veiculo': profissional.placa_veiculo,
+        'empresa': profissional.empresa,
+        'url_foto': profissional.url_foto,
+    }
+
+@porteiro.route('/api/profissionais')
+@login_required
+@permission_required('porteiro')
+def api_consultar_profissional():
+    """Consulta exata por CPF ou placa (aceita com ou sem pontuação)."""
+    if request.args.get('cpf'):
+        profissional = buscar_profissional_por_cpf(request.args['cpf'])
+        profissionais = [profissional] if profissional else []
+    elif request.args.get('placa'):
+        profissionais = buscar_profissionais_por_placa(request.args['placa'])
     else:
-        flash('Erro ao registrar saída. O acesso pode já ter sido finalizado.', 'danger')
-        
-    # CORREÇÃO: O endpoint correto é o nome da função que renderiza o dashboard.
-    return redirect(url_for('porteiro.porteiro_dashboard'))
+        return jsonify({'erro': 'Informe cpf ou placa.'}), 400
+    return jsonify({'profissionais': [_profissional_json(p) for p in profissionais]})
 
 @porteiro.route('/acesso-imediato', methods=['GET', 'POST'])
 @login_required
@@ -1,10 +1,16 @@
 # app/profissional/routes.py
 
-from flask import Blueprint, render_template, request, url_for, redirect, flash
+from flask import Blueprint, render_template, request, url_for, redirect, flash, jsonify, abort
 from flask_login import current_user, login_required
 from app.decorators import permission_required
-from app.models import Profissional, Acesso, User, db, Condominio
-from app.forms import ProfissionalRegistrationForm
+from app.models import Profissional, Acesso, User, db, Condominio, Portaria
+from app.forms import ProfissionalRegistrationForm, ConfirmarCheckinForm
+from app.services import get_ultimos_acessos_profissional
+from app.events import montar_evento_acesso, publicar_evento_acesso
+from app.tokens_qr import TokenInvalido, verificar_token_portaria
+from app.qrcodes import conteudo_qrcode_profissional, responder_qrcode
+from app.condicional import linhas_alteradas, resposta_condicional
+from app.transicoes import registrar_checkin_qr
 from datetime import datetime
 import uuid
 
@@ -75,11 +81,24 @@ def cadastro():
 # Rotas do Painel do Profissional
 # ==============================================================================
 
+def _carimbo_dashboard():
+    # Cadastro e acessos do profissional, mais os condomínios e moradores
+    # exibidos na tabela de acessos.
+    profissional_id = current_user.profissional_id
+    if not profissional_id:
+        return None
+    do_profissional = Acesso.profissional_id == profissional_id
+    return (linhas_alteradas(Profissional, Profissional.id == profissional_id)
+            + linhas_alteradas(Acesso, do_profissional)
+            + linhas_alteradas(Condominio, Condominio.id.in_(db.select(Acesso.condominio_id).where(do_profissional)))
+            + linhas_alteradas(User, User.id.in_(db.select(Acesso.usuario_morador_id).where(do_profissional))))
+
 # NOVO: Rota para exibir o painel do profissional
 # Esta rota é a responsável por passar a variável 'profissional' para o template.
 @profissional.route('/dashboard')
 @login_required
 @permission_required('profissional')
+@resposta_condicional(_carimbo_dashboard)
 def dashboard():
     """
     Exibe o painel do profissional, mostrando suas informações e últimos acessos.
@@ -93,10 +112,7 @@ def dashboard():
     profissional_info = Profissional.query.get(current_user.profissional_id)
     
     # Obtém os últimos acessos do profissional para exibir na tabela
-    ultimos_acessos = Acesso.query.filter_by(profissional_id=profissional_info.id)\
-                                  .order_by(Acesso.data_acesso.desc())\
-                                  .limit(10)\
-                                  .all()
+    ultimos_acessos = get_ultimos_acessos_profissional(profissional_info.id, limite=10)
 
     # A ÚNICA ALTERAÇÃO é aqui, para ser consistente com o nome do arquivo
     return render_template('dashboard_profissional.html',
@@ -110,6 +126,8 @@ def dashboard():
 # Rota que será acessada pelo porteiro ao escanear o QR Code
 # Esta é uma rota pública para ser acessada sem login
 @profissional.route('/perfil_publico/<int:profissional_id>')
+@resposta_condicional(lambda profissional_id: linhas_alteradas(Profissional, Profissional.id == profissional_id),
+                      publica=True)
 def perfil_publico(profissional_id):
     """
     Exibe um perfil público e simplificado do profissional para ser acessado via QR Code.
@@ -117,6 +135,12 @@ def perfil_publico(profissional_id):
     profissional = Profissional.query.get_or_404(profissional_id)
     return render_template('perfil_publico.html', profissional=profissional)
 
+# Imagem do QR Code do perfil público. O conteúdo só depende do id, então a
+# rota não consulta o banco e responde 304 enquanto a imagem não muda.
+@profissional.route('/perfil_publico/<int:profissional_id>/qrcode.<formato>')
+def imagem_qrcode_profissional(profissional_id, formato):
+    return responder_qrcode(conteudo_qrcode_profissional(profissional_id), formato)
+
 # Rota para o checkin do profissional na portaria
 @profissional.route('/checkin_portaria/<int:condominio_id>')
 @login_required
@@ -143,12 +167,14 @@ def checkin_portaria(condominio_id):
             servico='Aguardando verificação',
             data_acesso=datetime.now()
         )
+        novo_acesso_pendente.profissional = profissional_logado
         db.session.add(novo_acesso_pendente)
+        db.session.flush()
+        evento = montar_evento_acesso('checkin', novo_acesso_pendente)
         db.session.commit()
 
-        # 4. AQUI É ONDE OCORRE A MÁGICA: Enviar a notificação para a tela do porteiro
-        # (Isso requer WebSockets ou polling, que faremos mais tarde)
-        print(f"Profissional {profissional_logado.nome} solicitou entrada no condomínio {condominio.nome}.")
+        # 4. Notifica os painéis da portaria/síndico com o delta do novo acesso
+        publicar_evento_acesso(evento)
 
         flash('Sua solicitação de entrada foi enviada ao porteiro. Por favor, aguarde.', 'info')
 
@@ -156,4 +182,52 @@ def checkin_portaria(condominio_id):
         db.session.rollback()
         flash(f'Erro ao solicitar entrada: {e}', 'danger')
     
-    return redirect(url_for('profissional.dashboard'))
\ No newline at end of file
+    return redirect(url_for('profissional.dashboard'))
+
+# Check-in pelo QR Code assinado da portaria (ver app/tokens_qr.py).
+# O GET (a leitura do código) só mostra a confirmação; o acesso é criado pelo
+# POST do formulário, com CSRF, para que links e pré-carregamentos do
+# navegador não registrem entradas. Portaria e condomínio vêm do token.
+@profissional.route('/checkin/<token>', methods=['GET', 'POST'])
+@login_required
+@permission_required('profissional')
+def checkin_qr(token):
+    if not current_user.profissional_id:
+        abort(403)
+    profissional_logado = db.get_or_404(Profissional, current_user.profissional_id)
+    json_aceito = request.accept_mimetypes.best == 'application/json'
+    form = ConfirmarCheckinForm()
+
+    try:
+        portaria_id, condominio_id = verificar_token_portaria(token)
+    except TokenInvalido:
+        resultado = None
+    else:
+        if request.method == 'GET':
+            portaria = Portaria.query.filter_by(id=portaria_id, condominio_id=condominio_id, is_ativo=True).first()
+            if portaria:
+                return render_template('confirmar_checkin.html', form=form, portaria=portaria,
+                                       profissional=profissional_logado)
+            resultado = None
+        elif not form.validate_on_submit():
+            mensagem = 'Solicitação expirada. Leia o QR Code novamente.'
+            if json_aceito:
+                return jsonify({'sucesso': False, 'mensagem': mensagem}), 400
+            flash(mensagem, 'danger')
+            return redirect(url_for('profissional.checkin_qr', token=token))
+        else:
+            resultado = registrar_checkin_qr(profissional_logado.id, profissional_logado.nome,
+                                             condominio_id, portaria_id)
+
+    if not resultado:
+        mensagem = 'QR Code inválido ou expirado. Peça ao porteiro um código atualizado.'
+        if json_aceito:
+            return jsonify({'sucesso': False, 'mensagem': mensagem}), 404
+        flash(mensagem, 'danger')
+        return redirect(url_for('profissional.dashboard'))
+
+    mensagem = 'Sua solicitação de entrada foi enviada ao porteiro. Por favor, aguarde.'
+    if json_aceito:
+        return jsonify({'sucesso': True, 'mensagem': mensagem, 'acesso_id': resultado.acesso_id}), 201
+    flash(mensagem, 'info')
+    return redirect(url_for('profissional.dashboard'))
@@ -0,0 +1,98 @@
+# app/pubsub.py
+# Fila de mensagens do Socket.IO para rodar vários workers/containers.
+# Sem fila, um porteiro conectado ao worker A não recebe eventos emitidos pelo
+# worker B. A fila é escolhida por Config.SOCKETIO_MESSAGE_QUEUE:
+#   - vazio: em processo (apenas um worker)
+#   - 'redis://...' (ou outra URL suportada pelo Flask-SocketIO): usa o gerenciador nativo
+#   - 'postgresql' ou 'postgresql://...': LISTEN/NOTIFY no próprio banco da aplicação
+
+import select
+import threading
+from socketio import PubSubManager
+
+# O NOTIFY do PostgreSQL aceita payloads de até 8000 bytes
+LIMITE_PAYLOAD_NOTIFY = 8000
+
+
+def _url_libpq(url):
+    """
+    Converte uma URL do SQLAlchemy (postgresql+psycopg2://...) para o formato do libpq.
+    """
+    esquema, separador, resto = url.partition('://')
+    return esquema.split('+', 1)[0] + separador + resto
+
+
+class PostgresNotifyManager(PubSubManager):
+    """
+    Gerenciador de clientes do Socket.IO que distribui as mensagens entre
+    workers usando LISTEN/NOTIFY do PostgreSQL, reaproveitando o banco existente.
+    """
+    name = 'postgresql'
+
+    def __init__(self, url, channel='socketio', write_only=False, logger=None, json=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self.url = _url_libpq(url)
+        self._conexao_publicacao = None
+        self._lock_publicacao = threading.Lock()
+
+    def _conectar(self):
+        import psycopg2
+        conexao = psycopg2.connect(self.url)
+        conexao.autocommit = True
+        return conexao
+
+    def _publish(self, data):
+        payload = self.json.dumps(data)
+        if len(payload.encode('utf-8')) >= LIMITE_PAYLOAD_NOTIFY:
+            self._get_logger().error('Mensagem do Socket.IO grande demais para NOTIFY (%d bytes)', len(payload))
+            return
+
+        with self._lock_publicacao:
+            # Uma nova tentativa caso a conexão tenha caído desde a última publicação
+            for tentativa in range(2):
+                try:
+                    if self._conexao_publicacao is None or self._conexao_publicacao.closed:
+                        self._conexao_publicacao = self._conectar()
+                    with self._conexao_publicacao.cursor() as cursor:
+                        cursor.execute('SELECT pg_notify(%s, %s)', (self.channel, payload))
+                    return
+                except Exception:
+                    self._conexao_publicacao = None
+                    if tentativa:
+                        self._get_logger().exception('Erro ao publicar mensagem via NOTIFY')
+
+    def _listen(self):
+        while True:
+            conexao = None
+            try:
+                conexao = self._conectar()
+                with conexao.cursor() as cursor:
+                    cursor.execute('LISTEN "{}"'.format(self.channel.replace('"', '""')))
+                while True:
+                    # select é cooperativo sob o gevent (monkey patch do worker)
+                    if select.select([conexao], [], [], 5) == ([], [], []):
+                        continue
+                    conexao.poll()
+                    while conexao.notifies:
+                        yield conexao.notifies.pop(0).payload
+            except Exception:
+                self._get_logger().exception('Conexão LISTEN perdida; reconectando')
+                if conexao is not None and not conexao.closed:
+                    conexao.close()
+                self.server.sleep(1)
+
+
+def opcoes_fila_socketio(config):
+    """
+    Retorna os argumentos extras de socketio.init_app para a fila configurada.
+    """
+    fila = config.get('SOCKETIO_MESSAGE_QUEUE')
+    canal = config.get('SOCKETIO_CHANNEL', 'socketio')
+    if not fila:
+        return {}
+
+    if fila == 'postgresql' or fila.startswith(('postgresql://', 'postgresql+', 'postgres://')):
+        url = config['SQLALCHEMY_DATABASE_URI'] if fila == 'postgresql' else fila
+        return {'client_manager': PostgresNotifyManager(url, channel=canal)}
+
+    return {'message_queue': fila, 'channel': canal}
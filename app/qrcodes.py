@@ -0,0 +1,259 @@
+# app/qrcodes.py
+# Imagens de QR Code geradas no servidor (PNG ou SVG), com cache por conteúdo.
+#
+# A chave de cada imagem é o hash do conteúdo codificado, do formato e da
+# versão do desenho (VERSAO_RENDER): o mesmo conteúdo sempre gera os mesmos
+# bytes. As imagens ficam em memória (LRU, QRCODE_CACHE_MAX_ITENS) e em disco
+# (QRCODE_CACHE_DIR), compartilhado entre os workers e preservado entre
+# reinícios. O ETag é a própria chave, calculável sem gerar a imagem: os
+# tablets que recarregam o código recebem 304 sem nenhum processamento.
+#
+# As rotas estáveis (ex.: /sindico/portarias/1/qrcode.png) respondem com
+# 'no-cache' e ETag, pois o conteúdo muda quando o código é gerado de novo;
+# /qrcodes/<chave>.<formato> é imutável e pode ficar no cache do navegador.
+#
+# A geração usa o pacote segno (puro Python). Nas rotas web as imagens são
+# geradas na própria requisição (poucas portarias por condomínio, e o cache
+# evita gerar de novo); o pool de processos fica para o comando
+# 'flask qrcodes exportar', que gera os códigos de todos os condomínios.
+
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from flask import Response, request, url_for
+from werkzeug.utils import secure_filename
+from app.tokens_qr import assinar_token_portaria
+
+logger = logging.getLogger('easygate.qrcodes')
+
+# Muda quando a aparência (escala, borda, correção de erros) muda, para não reaproveitar imagens antigas
+VERSAO_RENDER = 1
+FORMATOS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+ESCALA = 8
+BORDA = 4
+_CHAVE_VALIDA = re.compile(r'^[0-9a-f]{32}$')
+# Abaixo disso, subir processos custa mais do que gerar as imagens em sequência
+MINIMO_IMAGENS_POOL = 20
+
+
+class ErroQrcode(Exception):
+    """
+    Geração de QR Code indisponível (pacote segno ausente) ou formato inválido.
+    """
+
+
+def conteudo_qrcode_portaria(portaria):
+    """
+    URL de check-in do QR Code da portaria: a gravada por 'Gerar QR Code' ou,
+    se ainda não houver, uma assinada agora (ver app/tokens_qr.py).
+    """
+    return portaria.qr_code_portaria or url_for(
+        'profissional.checkin_qr', token=assinar_token_portaria(portaria.id, portaria.condominio_id), _external=True)
+
+def conteudo_qrcode_profissional(profissional_id):
+    return url_for('profissional.perfil_publico', profissional_id=profissional_id, _external=True)
+
+def chave_qrcode(conteudo, formato):
+    return hashlib.sha256(f'{VERSAO_RENDER}:{formato}:{conteudo}'.encode()).hexdigest()[:32]
+
+def renderizar_qrcode(conteudo, formato):
+    """
+    Bytes da imagem do QR Code, sem cache.
+    """
+    if formato not in FORMATOS:
+        raise ErroQrcode(f'Formato de QR Code inválido: {formato}.')
+    try:
+        import segno
+    except ImportError:
+        raise ErroQrcode('Geração de QR Code indisponível: instale o pacote segno.')
+    saida = io.BytesIO()
+    segno.make(conteudo, error='m', micro=False).save(saida, kind=formato, scale=ESCALA, border=BORDA)
+    return saida.getvalue()
+
+def _renderizar_item(item):
+    # Executada nos processos do pool: (chave, conteudo, formato) -> (chave, bytes)
+    chave, conteudo, formato = item
+    return chave, renderizar_qrcode(conteudo, formato)
+
+
+class CacheQrcodes:
+    """
+    Cache das imagens em memória (LRU) e em disco, endereçado pela chave do conteúdo.
+    """
+
+    def __init__(self):
+        self.diretorio = None
+        self.max_itens = 512
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.geradas = 0
+        self.acertos = 0
+
+    def init_app(self, app):
+        self.diretorio = app.config.get('QRCODE_CACHE_DIR') or os.path.join(app.instance_path, 'qrcodes')
+        self.max_itens = app.config.get('QRCODE_CACHE_MAX_ITENS', 512)
+
+    def _caminho(self, chave, formato):
+        return os.path.join(self.diretorio, f'{chave}.{formato}')
+
+    def ler(self, chave, formato):
+        """
+        Imagem já gerada com esta chave, ou None.
+        """
+        with self._lock:
+            dados = self._itens.get((chave, formato))
+            if dados is not None:
+                self._itens.move_to_end((chave, formato))
+                self.acertos += 1
+                return dados
+        try:
+            with open(self._caminho(chave, formato), 'rb') as arquivo:
+                dados = arquivo.read()
+        except OSError:
+            return None
+        self._guardar_memoria(chave, formato, dados)
+        self.acertos += 1
+        return dados
+
+    def obter(self, conteudo, formato):
+        """
+        (chave, bytes) da imagem do conteúdo, gerando e guardando se preciso.
+        """
+        chave = chave_qrcode(conteudo, formato)
+        dados = self.ler(chave, formato)
+        if dados is None:
+            dados = renderizar_qrcode(conteudo, formato)
+            self.guardar(chave, formato, dados)
+        return chave, dados
+
+    def obter_varios(self, conteudos, formato, processos=1):
+        """
+        Imagens de vários conteúdos, na mesma ordem. As que faltam no cache são
+        geradas aqui ou, com processos > 1 (apenas fora do processo web), em um pool.
+        """
+        chaves = [chave_qrcode(conteudo, formato) for conteudo in conteudos]
+        imagens = {chave: self.ler(chave, formato) for chave in chaves}
+        faltando = [(chave, conteudo, formato) for chave, conteudo in zip(chaves, conteudos) if imagens[chave] is None]
+
+        if processos <= 1 or len(faltando) < MINIMO_IMAGENS_POOL:
+            geradas = map(_renderizar_item, faltando)
+            for chave, dados in geradas:
+                imagens[chave] = dados
+                self.guardar(chave, formato, dados)
+        else:
+            # 'spawn' não herda as conexões nem o estado do processo que chamou
+            with ProcessPoolExecutor(max_workers=processos, mp_context=get_context('spawn')) as pool:
+                for chave, dados in pool.map(_renderizar_item, faltando,
+                                             chunksize=max(1, len(faltando) // (processos * 4))):
+                    imagens[chave] = dados
+                    self.guardar(chave, formato, dados)
+        return [(chave, imagens[chave]) for chave in chaves]
+
+    def guardar(self, chave, formato, dados):
+        self.geradas += 1
+        self._guardar_memoria(chave, formato, dados)
+        try:
+            os.makedirs(self.diretorio, exist_ok=True)
+            # Grava em um temporário e renomeia: outro worker nunca lê um arquivo pela metade
+            descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix='.tmp')
+            with os.fdopen(descritor, 'wb') as arquivo:
+                arquivo.write(dados)
+            os.replace(temporario, self._caminho(chave, formato))
+        except OSError as e:
+            logger.warning('Erro ao gravar QR Code em disco: %s', e)
+
+    def _guardar_memoria(self, chave, formato, dados):
+        with self._lock:
+            self._itens[(chave, formato)] = dados
+            self._itens.move_to_end((chave, formato))
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def estatisticas(self):
+        return {'itens_memoria': len(self._itens), 'geradas': self.geradas, 'acertos': self.acertos}
+
+
+cache_qrcodes = CacheQrcodes()
+
+
+# ==============================================================================
+# Respostas HTTP
+# ==============================================================================
+
+def _resposta_imagem(chave, formato, dados, cache_control):
+    resposta = Response(dados, mimetype=FORMATOS[formato])
+    resposta.set_etag(chave)
+    resposta.headers['Cache-Control'] = cache_control
+    return resposta
+
+def responder_qrcode(conteudo, formato):
+    """
+    Resposta de uma rota estável: 304 se o ETag do navegador ainda vale,
+    sem gerar nem ler a imagem; senão a imagem, que deve ser revalidada a cada uso.
+    """
+    if formato not in FORMATOS:
+        return Response(status=404)
+    chave = chave_qrcode(conteudo, formato)
+    if chave in request.if_none_match:
+        resposta = Response(status=304)
+        resposta.set_etag(chave)
+        resposta.headers['Cache-Control'] = 'no-cache'
+        return resposta
+    try:
+        chave, dados = cache_qrcodes.obter(conteudo, formato)
+    except ErroQrcode as e:
+        return Response(str(e), status=503, mimetype='text/plain')
+    return _resposta_imagem(chave, formato, dados, 'no-cache')
+
+def responder_qrcode_por_chave(chave, formato):
+    """
+    Resposta de /qrcodes/<chave>.<formato>: imutável, pois a chave é o hash do conteúdo.
+    """
+    if formato not in FORMATOS or not _CHAVE_VALIDA.match(chave):
+        return Response(status=404)
+    if chave in request.if_none_match:
+        return Response(status=304)
+    dados = cache_qrcodes.ler(chave, formato)
+    if dados is None:
+        return Response(status=404)
+    return _resposta_imagem(chave, formato, dados, 'public, max-age=31536000, immutable')
+
+
+# ==============================================================================
+# Geração em lote
+# ==============================================================================
+
+def urls_qrcodes(conteudos, formato='svg'):
+    """
+    URLs imutáveis (/qrcodes/<chave>.<formato>) das imagens, geradas agora as que
+    ainda não estiverem no cache. Com vários servidores, QRCODE_CACHE_DIR deve
+    ser um volume compartilhado.
+    """
+    return [url_for('main.qrcode_por_chave', chave=chave, formato=formato)
+            for chave, _ in cache_qrcodes.obter_varios(conteudos, formato)]
+
+def itens_qrcodes_portarias(portarias):
+    """
+    [(nome_arquivo, conteudo)] dos QR Codes das portarias, para exportar_zip.
+    """
+    return [(f'portaria_{portaria.id}_{secure_filename(portaria.nome) or "sem_nome"}', conteudo_qrcode_portaria(portaria))
+            for portaria in portarias]
+
+def exportar_zip(itens, formato='png', processos=1):
+    """
+    ZIP com um arquivo por item. itens: [(nome_arquivo_sem_extensao, conteudo)].
+    """
+    imagens = cache_qrcodes.obter_varios([conteudo for _, conteudo in itens], formato, processos)
+    saida = io.BytesIO()
+    with zipfile.ZipFile(saida, 'w', compression=zipfile.ZIP_DEFLATED) as arquivo_zip:
+        for (nome, _), (_, dados) in zip(itens, imagens):
+            arquivo_zip.writestr(f'{nome}.{formato}', dados)
+    return saida.getvalue()
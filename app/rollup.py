@@ -0,0 +1,201 @@
+# app/rollup.py
+# Manutenção do consolidado diário de acessos (tabela acessos_diarios).
+# Cada flush que cria, altera ou exclui um Acesso gera um "delta" por
+# (condomínio, portaria, dia), aplicado na mesma transação com um upsert.
+# Operações em massa que não passam pelo ORM devem chamar aplicar_deltas_rollup.
+
+from collections import defaultdict
+from sqlalchemy import event, func, inspect, select, case, cast, literal
+from sqlalchemy.orm import Session
+from app.models import Acesso, AcessoDiario, db
+
+# Colunas de contagem por status
+COLUNA_POR_STATUS = {
+    'pendente': 'pendentes',
+    'em_andamento': 'em_andamento',
+    'finalizado': 'finalizados',
+}
+
+COLUNAS_CONTADORES = (
+    'total', 'pendentes', 'em_andamento', 'finalizados',
+    'permanencia_total_segundos', 'permanencia_quantidade',
+)
+
+
+def contribuicao_acesso(condominio_id, portaria_id, status, data_acesso, data_saida):
+    """
+    Retorna (chave, valores) com o que um acesso soma no consolidado, ou None
+    se ele ainda não tem data de entrada (ex.: pré-autorização).
+    """
+    if condominio_id is None or data_acesso is None:
+        return None
+
+    valores = {'total': 1}
+    coluna = COLUNA_POR_STATUS.get(status)
+    if coluna:
+        valores[coluna] = 1
+    if status == 'finalizado' and data_saida is not None:
+        valores['permanencia_total_segundos'] = round((data_saida - data_acesso).total_seconds())
+        valores['permanencia_quantidade'] = 1
+
+    return (condominio_id, portaria_id or 0, data_acesso.date()), valores
+
+def _acumular(deltas, contribuicao, sinal):
+    if contribuicao is None:
+        return
+    chave, valores = contribuicao
+    for coluna, valor in valores.items():
+        deltas[chave][coluna] += sinal * valor
+
+def _valor_anterior(estado, atributo):
+    historico = estado.attrs[atributo].history
+    if historico.has_changes():
+        return historico.deleted[0] if historico.deleted else None
+    return getattr(estado.obj(), atributo)
+
+def _contribuicao_atual(acesso):
+    return contribuicao_acesso(acesso.condominio_id, acesso.portaria_id, acesso.status,
+                               acesso.data_acesso, acesso.data_saida)
+
+def _contribuicao_anterior(acesso):
+    estado = inspect(acesso)
+    return contribuicao_acesso(*(_valor_anterior(estado, atributo) for atributo in ATRIBUTOS_ROLLUP))
+
+
+def _upsert(conexao, chave, valores):
+    condominio_id, portaria_id, dia = chave
+    tabela = AcessoDiario.__table__
+    linha = dict(condominio_id=condominio_id, portaria_id=portaria_id, dia=dia)
+    linha.update({coluna: valores.get(coluna, 0) for coluna in COLUNAS_CONTADORES})
+
+    dialeto = conexao.dialect.name
+    if dialeto in ('postgresql', 'sqlite'):
+        if dialeto == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        comando = insert(tabela).values(**linha)
+        comando = comando.on_conflict_do_update(
+            index_elements=['condominio_id', 'portaria_id', 'dia'],
+            set_={coluna: tabela.c[coluna] + comando.excluded[coluna] for coluna in COLUNAS_CONTADORES}
+        )
+        conexao.execute(comando)
+        return
+
+    # Outros bancos: UPDATE e, se a linha do dia ainda não existir, INSERT
+    resultado = conexao.execute(
+        tabela.update()
+        .where(tabela.c.condominio_id == condominio_id,
+               tabela.c.portaria_id == portaria_id,
+               tabela.c.dia == dia)
+        .values({coluna: tabela.c[coluna] + valores.get(coluna, 0) for coluna in COLUNAS_CONTADORES})
+    )
+    if resultado.rowcount == 0:
+        conexao.execute(tabela.insert().values(**linha))
+
+def deltas_alteracao(anterior, atual, deltas=None):
+    """
+    Deltas de um acesso alterado fora do ORM (ex.: UPDATE ... RETURNING).
+    anterior/atual: tuplas (condominio_id, portaria_id, status, data_acesso, data_saida).
+    Com 'deltas', acumula nele (alterações em lote). anterior=None para inserções.
+    """
+    if deltas is None:
+        deltas = defaultdict(lambda: defaultdict(int))
+    if anterior is not None:
+        _acumular(deltas, contribuicao_acesso(*anterior), -1)
+    _acumular(deltas, contribuicao_acesso(*atual), 1)
+    return deltas
+
+def aplicar_deltas_rollup(conexao, deltas):
+    """
+    Aplica um dicionário {(condominio_id, portaria_id, dia): {coluna: delta}}.
+    """
+    for chave, valores in deltas.items():
+        if any(valores.values()):
+            _upsert(conexao, chave, valores)
+
+
+def _antes_do_flush(session, flush_context, instances):
+    deltas = defaultdict(lambda: defaultdict(int))
+    for objeto in session.new:
+        if isinstance(objeto, Acesso):
+            _acumular(deltas, _contribuicao_atual(objeto), 1)
+    for objeto in session.dirty:
+        if isinstance(objeto, Acesso) and session.is_modified(objeto, include_collections=False):
+            _acumular(deltas, _contribuicao_anterior(objeto), -1)
+            _acumular(deltas, _contribuicao_atual(objeto), 1)
+    for objeto in session.deleted:
+        if isinstance(objeto, Acesso):
+            _acumular(deltas, _contribuicao_anterior(objeto), -1)
+
+    if deltas:
+        aplicar_deltas_rollup(session.connection(), deltas)
+
+# Atributos do Acesso que determinam sua contribuição no consolidado
+ATRIBUTOS_ROLLUP = ('condominio_id', 'portaria_id', 'status', 'data_acesso', 'data_saida')
+
+def _manter_historico(alvo, valor, anterior, iniciador):
+    return valor
+
+def registrar_eventos_rollup():
+    """
+    Liga a manutenção incremental do consolidado às sessões do SQLAlchemy.
+    """
+    if event.contains(Session, 'before_flush', _antes_do_flush):
+        return
+    # active_history garante o valor anterior no histórico mesmo quando o
+    # atributo estava expirado (ex.: objeto alterado depois de um commit)
+    for atributo in ATRIBUTOS_ROLLUP:
+        event.listen(getattr(Acesso, atributo), 'set', _manter_historico,
+                     active_history=True, retval=True)
+    event.listen(Session, 'before_flush', _antes_do_flush)
+
+
+def _segundos_entre(inicio, fim, dialeto):
+    if dialeto == 'postgresql':
+        return func.extract('epoch', fim - inicio)
+    # SQLite (e fallback): diferença em dias julianos
+    return (func.julianday(fim) - func.julianday(inicio)) * 86400
+
+def recalcular_rollup(condominio_id=None):
+    """
+    Reconstrói o consolidado a partir da tabela de acessos (backfill).
+    Sem condominio_id, reconstrói todos os condomínios.
+    """
+    conexao = db.session.connection()
+    dialeto = conexao.dialect.name
+    tabela = AcessoDiario.__table__
+
+    exclusao = tabela.delete()
+    if condominio_id is not None:
+        exclusao = exclusao.where(tabela.c.condominio_id == condominio_id)
+    conexao.execute(exclusao)
+
+    finalizado_com_saida = (Acesso.status == 'finalizado') & Acesso.data_saida.isnot(None)
+    dia = func.date(Acesso.data_acesso)
+    portaria = func.coalesce(Acesso.portaria_id, 0)
+    consulta = select(
+        Acesso.condominio_id,
+        portaria,
+        dia,
+        func.count(),
+        func.count().filter(Acesso.status == 'pendente'),
+        func.count().filter(Acesso.status == 'em_andamento'),
+        func.count().filter(Acesso.status == 'finalizado'),
+        func.coalesce(func.sum(case(
+            (finalizado_com_saida, cast(func.round(_segundos_entre(Acesso.data_acesso, Acesso.data_saida, dialeto)), db.BigInteger)),
+            else_=literal(0)
+        )), 0),
+        func.count().filter(finalizado_com_saida),
+    ).where(
+        Acesso.condominio_id.isnot(None),
+        Acesso.data_acesso.isnot(None)
+    ).group_by(Acesso.condominio_id, portaria, dia)
+    if condominio_id is not None:
+        consulta = consulta.where(Acesso.condominio_id == condominio_id)
+
+    resultado = conexao.execute(tabela.insert().from_select(
+        ['condominio_id', 'portaria_id', 'dia'] + list(COLUNAS_CONTADORES), consulta
+    ))
+    db.session.commit()
+    return resultado.rowcount
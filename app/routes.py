@@ -2,14 +2,21 @@
 # Este arquivo define as rotas principais da aplicação e as rotas
 # que não se encaixam em outros módulos específicos (ex: admin e morador).
 
-from flask import render_template, redirect, url_for, flash, Blueprint, request, jsonify
+import math
+from flask import render_template, redirect, url_for, flash, Blueprint, request, jsonify, session, make_response
 from flask_login import login_user, logout_user, current_user, login_required
 from flask_wtf.csrf import generate_csrf
 from datetime import datetime, timedelta
 from app.decorators import permission_required
+from app.identidade import CHAVE_SESSAO
+from app.senhas import precisa_rehash
+from app.limitador import limitador_login
+from app.qrcodes import responder_qrcode_por_chave
 from app.models import User, Condominio, db, Plano
+from app.convites import ConviteInvalido, usuario_do_convite
 from app.forms import (
     LoginForm,
+    DefinirSenhaForm,
     AutorizarAcessoForm,
     UserForm,
     CondominioForm,
@@ -21,9 +28,10 @@ from app.services import (
     get_acessos_morador,
     create_user_admin,
     create_condominio_admin,
-    get_all_users,
     get_all_planos,
-    get_all_condominios,
+    listar_usuarios_admin,
+    listar_condominios_admin,
+    buscar_condominios_autocomplete,
     get_user_by_id,
     update_user_admin,
     delete_user_admin,
@@ -60,6 +68,17 @@ def index():
 
 @main.route('/login', methods=['GET', 'POST'])
 def login():
+    # Tentativas acima do limite são recusadas antes de consultar o banco ou calcular hashes
+    if request.method == 'POST':
+        espera = limitador_login.consumir('ip', request.remote_addr) or \
+            limitador_login.consumir('email', (request.form.get('email') or '').strip().lower())
+        if espera:
+            segundos = math.ceil(espera)
+            flash(f'Muitas tentativas de login. Tente novamente em {segundos} segundos.', 'danger')
+            resposta = make_response(render_template('login.html', form=LoginForm()), 429)
+            resposta.headers['Retry-After'] = str(segundos)
+            return resposta
+
     if current_user.is_authenticated:
         return redirect(url_for('main.index'))
     
@@ -70,6 +89,11 @@ def login():
         if user is None or not user.check_senha(form.password.data):
             flash('Email ou senha inválidos', 'danger')
             return redirect(url_for('main.login'))
+
+        # Hash gerado com outro método/parâmetros é refeito com os de SENHA_HASH_METODO
+        if precisa_rehash(user.senha_hash):
+            user.set_senha(form.password.data)
+            db.session.commit()
         
         login_user(user)
         flash('Login realizado com sucesso!', 'success')
@@ -82,8 +106,8 @@ def login():
             return redirect(url_for('porteiro.porteiro_dashboard'))
         elif user.role == 'morador':
             return redirect(url_for('main.morador_dashboard'))
-        # elif user.role == 'profissional':
-        #     return redirect(url_for('profissional.dashboard'))
+        elif user.role == 'profissional':
+            return redirect(url_for('profissional.dashboard'))
 
     return render_template('login.html', form=form)
 
@@ -91,9 +115,29 @@ def login():
 @login_required
 def logout():
     logout_user()
+    session.pop(CHAVE_SESSAO, None)
     flash('Você saiu do sistema.', 'info')
     return redirect(url_for('main.index'))
 
+@main.route('/convite/<token>', methods=['GET', 'POST'])
+def aceitar_convite(token):
+    """
+    Link do convite dos usuários importados pelo síndico: define a senha.
+    """
+    try:
+        user = usuario_do_convite(token)
+    except ConviteInvalido as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('main.login'))
+
+    form = DefinirSenhaForm()
+    if form.validate_on_submit():
+        user.set_senha(form.password.data)
+        db.session.commit()
+        flash('Senha definida. Entre com seu e-mail e a nova senha.', 'success')
+        return redirect(url_for('main.login'))
+    return render_template('definir_senha.html', form=form, user=user)
+
 # ==================================
 # Rotas do Morador
 # ==================================
@@ -126,16 +170,41 @@ def morador_dashboard():
 # ==================================
 # Rotas de Administrador
 # ==================================
+def _filtros_listagem(args, *filtros):
+    """
+    Lê paginação, ordenação e filtros opcionais dos parâmetros da URL.
+    """
+    parametros = {
+        'pagina': args.get('pagina', 1, type=int),
+        'ordem': args.get('ordem', 'nome'),
+        'direcao': 'desc' if args.get('direcao') == 'desc' else 'asc',
+        'busca': args.get('q', '').strip() or None,
+    }
+    for filtro in filtros:
+        parametros[filtro] = args.get(filtro, type=int) if filtro.endswith('_id') else (args.get(filtro) or None)
+    return parametros
+
+def _opcoes_condominio(condominio_id):
+    """
+    Opções do select de condomínio: 'Nenhum' e o condomínio escolhido.
+    Os demais são buscados sob demanda pelo autocomplete (api_admin_condominios_autocomplete).
+    """
+    opcoes = [(-1, 'Nenhum')]
+    if condominio_id and condominio_id != -1:
+        condominio = db.session.get(Condominio, condominio_id)
+        if condominio:
+            opcoes.append((condominio.id, condominio.nome))
+    return opcoes
+
 @main.route('/admin_dashboard')
 @login_required
 @permission_required('admin')
 def admin_dashboard():
-    users = get_all_users()
-    condominios = get_all_condominios()
+    # Apenas a primeira página; a lista completa fica em admin_condominio_list
+    condominios = listar_condominios_admin(por_pagina=10)
     
     now = datetime.now()
     return render_template('admin/dashboard.html', 
-                           users=users, 
                            condominios=condominios,
                            csrf_token=generate_csrf(),
                            now=now)
@@ -144,10 +213,13 @@ def admin_dashboard():
 @login_required
 @permission_required('admin')
 def admin_user_list():
-    users = get_all_users()
+    filtros = _filtros_listagem(request.args, 'role', 'condominio_id')
+    users = listar_usuarios_admin(**filtros)
     now = datetime.now()
     return render_template('admin/user_list.html', 
                            users=users, 
+                           filtros=filtros,
+                           opcoes_condominio=_opcoes_condominio(filtros['condominio_id']),
                            csrf_token=generate_csrf(),
                            now=now)
 
@@ -155,10 +227,12 @@ def admin_user_list():
 @login_required
 @permission_required('admin')
 def admin_condominio_list():
-    condominios = get_all_condominios()
+    filtros = _filtros_listagem(request.args, 'status')
+    condominios = listar_condominios_admin(**filtros)
     now = datetime.now()
     return render_template('admin/condominio_list.html', 
                            condominios=condominios, 
+                           filtros=filtros,
                            csrf_token=generate_csrf(),
                            now=now)
 
@@ -167,7 +241,7 @@ def admin_condominio_list():
 @permission_required('admin')
 def admin_novo_usuario():
     form = UserForm()
-    form.condominio_id.choices = [(-1, 'Nenhum')] + [(c.id, c.nome) for c in get_all_condominios()]
+    form.condominio_id.choices = _opcoes_condominio(request.form.get('condominio_id', type=int))
 
     if form.validate_on_submit():
         if create_user_admin(request.form):
@@ -206,7 +280,10 @@ def admin_editar_usuario(user_id):
         return redirect(url_for('main.admin_dashboard'))
 
     form = UserForm()
-    form.condominio_id.choices = [(-1, 'Nenhum')] + [(c.id, c.nome) for c in get_all_condominios()]
+    if request.method == 'GET':
+        form.condominio_id.choices = _opcoes_condominio(user.condominio_id)
+    else:
+        form.condominio_id.choices = _opcoes_condominio(request.form.get('condominio_id', type=int))
     
     if request.method == 'GET':
         form.nome.data = user.nome
@@ -387,6 +464,111 @@ def api_condominio_tipo(condominio_id):
         return jsonify({'tipo': condominio.tipo})
     return jsonify({'error': 'Condomínio não encontrado'}), 404
 
+@main.route('/api/admin/usuarios')
+@login_required
+@permission_required('admin')
+def api_admin_usuarios():
+    filtros = _filtros_listagem(request.args, 'role', 'condominio_id')
+    pagina = listar_usuarios_admin(**filtros)
+    return jsonify({
+        'itens': [{
+            'id': user.id,
+            'nome': user.nome,
+            'email': user.email,
+            'role': user.role,
+            'apartamento': user.apartamento,
+            'condominio': user.condominio.nome if user.condominio else None,
+        } for user in pagina.items],
+        'pagina': pagina.page,
+        'paginas': pagina.pages,
+        'total': pagina.total,
+    })
+
+@main.route('/api/admin/condominios')
+@login_required
+@permission_required('admin')
+def api_admin_condominios():
+    filtros = _filtros_listagem(request.args, 'status')
+    pagina = listar_condominios_admin(**filtros)
+    return jsonify({
+        'itens': [{
+            'id': condominio.id,
+            'nome': condominio.nome,
+            'endereco': condominio.endereco,
+            'status_assinatura': condominio.status_assinatura,
+            'plano': condominio.plano.nome if condominio.plano else None,
+        } for condominio in pagina.items],
+        'pagina': pagina.page,
+        'paginas': pagina.pages,
+        'total': pagina.total,
+    })
+
+@main.route('/api/admin/condominios/autocomplete')
+@login_required
+@permission_required('admin')
+def api_admin_condominios_autocomplete():
+    sugestoes = buscar_condominios_autocomplete(request.args.get('q', '').strip())
+    return jsonify([{'id': id, 'nome': nome} for id, nome in sugestoes])
+
+@main.route('/api/admin/cache')
+@login_required
+@permission_required('admin')
+def api_admin_cache():
+    from app.cache import cache_condominio
+    return jsonify(cache_condominio.estatisticas())
+
+@main.route('/admin/consultas_lentas')
+@login_required
+@permission_required('admin')
+def admin_consultas_lentas():
+    from app.consultas_lentas import registro_consultas_lentas
+    return render_template('admin/consultas_lentas.html',
+                           registros=registro_consultas_lentas.registros(),
+                           limite_ms=registro_consultas_lentas.limite_ms,
+                           explain=registro_consultas_lentas.explain,
+                           csrf_token=generate_csrf())
+
+@main.route('/admin/consultas_lentas/limpar', methods=['POST'])
+@login_required
+@permission_required('admin')
+def admin_limpar_consultas_lentas():
+    from app.consultas_lentas import registro_consultas_lentas
+    registro_consultas_lentas.limpar()
+    flash('Registro de consultas lentas limpo.', 'success')
+    return redirect(url_for('main.admin_consultas_lentas'))
+
+@main.route('/admin/limitador')
+@login_required
+@permission_required('admin')
+def admin_limitador():
+    return render_template('admin/limitador.html',
+                           estados=limitador_login.estados(),
+                           estatisticas=limitador_login.estatisticas(),
+                           limites=limitador_login.limites,
+                           csrf_token=generate_csrf())
+
+@main.route('/admin/limitador/liberar', methods=['POST'])
+@login_required
+@permission_required('admin')
+def admin_liberar_limitador():
+    chave = request.form.get('chave')
+    if chave:
+        limitador_login.liberar(chave)
+        flash(f'Limite de {chave} liberado.', 'success')
+    return redirect(url_for('main.admin_limitador'))
+
+@main.route('/api/admin/banco/pool')
+@login_required
+@permission_required('admin')
+def api_admin_banco_pool():
+    from app.banco import estatisticas_pool
+    return jsonify(estatisticas_pool.resumo())
+
+# Imagens de QR Code endereçadas pelo hash do conteúdo (ver app/qrcodes.py)
+@main.route('/qrcodes/<chave>.<formato>')
+def qrcode_por_chave(chave, formato):
+    return responder_qrcode_por_chave(chave, formato)
+
 @main.route('/prestadores')
 def prestadores():
     return render_template('prestadores.html')
\ No newline at end of file
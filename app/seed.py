@@ -0,0 +1,338 @@
+# app/seed.py
+# Geração de dados em volume (flask seed e python -m benchmark gerar): N
+# condomínios com M portarias, K moradores, um porteiro por portaria, um
+# síndico, um cadastro comum de profissionais e vários meses de histórico de
+# acessos, além das contas de demonstração (admin@autorizame.com.br etc.).
+#
+# Os dados são determinísticos para uma mesma semente (as datas são relativas
+# ao último dia do histórico, 'ate'). As linhas são geradas como tuplas, em
+# lotes, e carregadas sem passar pelo ORM: COPY no PostgreSQL e executemany nos
+# demais bancos. Por isso as colunas derivadas (termos_busca, cpf_normalizado,
+# placa_normalizada) são preenchidas aqui, e o consolidado diário é
+# reconstruído no final com recalcular_rollup.
+
+import csv
+import io
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from sqlalchemy import func, select
+from app.busca import termos_profissional, termos_usuario
+from app.models import Acesso, Condominio, Plano, Portaria, Profissional, User, db, normalizar_cpf, normalizar_placa
+from app.rollup import recalcular_rollup
+from app.senhas import gerar_hash
+
+TAMANHO_LOTE = 10000
+DOMINIO_EMAIL = 'bench.easygate.com.br'
+SENHA_PADRAO = 'benchmark'
+
+# Contas fixas para testar a aplicação à mão, no primeiro condomínio gerado
+CONTAS_DEMONSTRACAO = (
+    ('Admin', 'admin@autorizame.com.br', 'admin'),
+    ('Sindico', 'sindico@autorizame.com.br', 'sindico'),
+    ('Porteiro', 'porteiro@autorizame.com.br', 'porteiro'),
+    ('Morador', 'morador@autorizame.com.br', 'morador'),
+)
+SENHA_DEMONSTRACAO = '123'
+
+# Tabelas apagadas por limpar_tabelas, das dependentes para as referenciadas
+TABELAS_SEED = ('acessos_diarios', 'acessos', 'usuarios', 'profissionais', 'portarias', 'condominios', 'planos')
+
+NOMES = ('Ana', 'Bruno', 'Carla', 'Diego', 'Elisa', 'Fábio', 'Gabriela', 'Hugo', 'Íris', 'João',
+         'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sílvia', 'Tiago', 'Vânia', 'Wagner')
+SOBRENOMES = ('Silva', 'Souza', 'Oliveira', 'Santos', 'Pereira', 'Lima', 'Carvalho', 'Ferreira',
+              'Rodrigues', 'Almeida', 'Costa', 'Gomes', 'Martins', 'Araújo', 'Barbosa', 'Conceição')
+EMPRESAS = ('Entregas Já', 'Fibra Net', 'Encanamentos Brasil', 'Elétrica Luz', 'Mercado Bom Preço',
+            'Farmácia Saúde', 'Limpeza Total', 'Mudanças Rápidas', None)
+SERVICOS = ('Entrega', 'Manutenção', 'Instalação de internet', 'Limpeza', 'Reparo elétrico', 'Visita técnica')
+
+
+@dataclass
+class ParametrosGeracao:
+    condominios: int = 10
+    portarias: int = 2             # por condomínio
+    moradores: int = 100           # por condomínio
+    profissionais: int = 1000      # cadastro comum a todos os condomínios
+    dias: int = 90                 # dias de histórico de acessos
+    acessos_por_dia: int = 20      # por condomínio
+    pendentes: int = 20            # pré-autorizações para hoje, por condomínio
+    contas_profissionais: int = 20 # profissionais com login (check-in pelo QR Code)
+    semente: int = 42
+    senha: str = SENHA_PADRAO      # senha de todos os usuários gerados
+    ate: date = field(default_factory=date.today)
+    demonstracao: bool = False     # cria também as CONTAS_DEMONSTRACAO
+
+
+def _nome(aleatorio):
+    return f"{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)} {aleatorio.choice(SOBRENOMES)}"
+
+def _proximo_id(conexao, modelo):
+    return (conexao.execute(select(func.max(modelo.id))).scalar() or 0) + 1
+
+
+# ==============================================================================
+# Carga em massa
+# ==============================================================================
+
+def _copiar_postgresql(conexao, tabela, colunas, lote):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    # No CSV do COPY, campo vazio sem aspas é NULL
+    escritor.writerows(['' if valor is None else valor for valor in linha] for linha in lote)
+    comando = f"COPY {tabela.name} ({', '.join(colunas)}) FROM STDIN WITH (FORMAT csv)"
+
+    cursor = conexao.connection.cursor()
+    try:
+        if hasattr(cursor, 'copy_expert'):  # psycopg2
+            buffer.seek(0)
+            cursor.copy_expert(comando, buffer)
+        else:  # psycopg 3
+            with cursor.copy(comando) as copia:
+                copia.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
+def carregar(conexao, tabela, colunas, linhas, tamanho_lote=TAMANHO_LOTE):
+    """
+    Insere as tuplas de 'linhas' (um iterável, consumido em lotes) na tabela.
+    Retorna a quantidade de linhas inseridas.
+    """
+    postgresql = conexao.dialect.name == 'postgresql'
+    total = 0
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= tamanho_lote:
+            total += _carregar_lote(conexao, tabela, colunas, lote, postgresql)
+            lote = []
+    if lote:
+        total += _carregar_lote(conexao, tabela, colunas, lote, postgresql)
+    return total
+
+def _carregar_lote(conexao, tabela, colunas, lote, postgresql):
+    if postgresql:
+        _copiar_postgresql(conexao, tabela, colunas, lote)
+    elif conexao.dialect.name == 'sqlite':
+        # executemany direto no sqlite3, sem o processamento de parâmetros do
+        # SQLAlchemy linha a linha (as datas já vêm como texto, ver _data_hora)
+        cursor = conexao.connection.cursor()
+        try:
+            cursor.executemany(
+                f"INSERT INTO {tabela.name} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+                lote
+            )
+        finally:
+            cursor.close()
+    else:
+        conexao.execute(tabela.insert(), [dict(zip(colunas, linha)) for linha in lote])
+    return len(lote)
+
+# Data e hora como texto no formato que o SQLAlchemy grava no SQLite, também
+# aceito pelo COPY do PostgreSQL. Os horários são tabelados por minuto do dia.
+_HORARIOS = [f"{minuto // 60:02d}:{minuto % 60:02d}:00.000000" for minuto in range(24 * 60)]
+
+def _data_hora(dia, minuto_do_dia):
+    dia += timedelta(days=minuto_do_dia // 1440)
+    return f"{dia.isoformat()} {_HORARIOS[minuto_do_dia % 1440]}"
+
+def limpar_tabelas():
+    """
+    Apaga os dados de todas as tabelas da aplicação: TRUNCATE ... CASCADE no
+    PostgreSQL (reiniciando as sequências) e DELETE nos demais bancos.
+    """
+    conexao = db.session.connection()
+    if conexao.dialect.name == 'postgresql':
+        conexao.exec_driver_sql(f"TRUNCATE {', '.join(TABELAS_SEED)} RESTART IDENTITY CASCADE")
+    else:
+        for tabela in TABELAS_SEED:
+            conexao.execute(db.metadata.tables[tabela].delete())
+    db.session.commit()
+
+def _ajustar_sequencias(conexao, modelos):
+    # Os ids foram gerados aqui; a sequência do PostgreSQL precisa continuar depois deles
+    if conexao.dialect.name != 'postgresql':
+        return
+    for modelo in modelos:
+        tabela = modelo.__tablename__
+        conexao.exec_driver_sql(
+            f"SELECT setval(pg_get_serial_sequence('{tabela}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {tabela}), 1))"
+        )
+
+
+# ==============================================================================
+# Geração
+# ==============================================================================
+
+def gerar_dados(parametros, log=print):
+    """
+    Gera e grava os dados descritos em 'parametros' na sessão atual (um único
+    commit no final). Retorna {tabela: linhas_inseridas}.
+    """
+    aleatorio = random.Random(parametros.semente)
+    conexao = db.session.connection()
+    if conexao.dialect.name == 'postgresql':
+        # A carga pode ser refeita: não vale esperar o fsync de cada commit
+        conexao.exec_driver_sql('SET LOCAL synchronous_commit = off')
+    totais = {}
+    inicio = time.perf_counter()
+
+    def etapa(nome, modelo, colunas, linhas):
+        antes = time.perf_counter()
+        totais[nome] = carregar(conexao, modelo.__table__, colunas, linhas)
+        log(f"{nome}: {totais[nome]} linhas em {time.perf_counter() - antes:.1f}s")
+
+    plano_id = conexao.execute(select(Plano.id).where(Plano.nome == 'Plano Benchmark')).scalar()
+    if plano_id is None:
+        plano_id = conexao.execute(
+            Plano.__table__.insert().values(nome='Plano Benchmark', valor_mensal=500, dias_carencia=30)
+        ).inserted_primary_key[0]
+
+    # Condomínios e portarias
+    primeiro_condominio = _proximo_id(conexao, Condominio)
+    condominios = range(primeiro_condominio, primeiro_condominio + parametros.condominios)
+    etapa('condominios', Condominio, ('id', 'nome', 'endereco', 'status_assinatura', 'plano_id'), (
+        (cid, f"Condomínio Benchmark {cid}", f"Rua {aleatorio.choice(SOBRENOMES)}, {cid}", 'ativo', plano_id)
+        for cid in condominios
+    ))
+
+    primeira_portaria = _proximo_id(conexao, Portaria)
+    portarias_por_condominio = {
+        cid: list(range(primeira_portaria + i * parametros.portarias,
+                        primeira_portaria + (i + 1) * parametros.portarias))
+        for i, cid in enumerate(condominios)
+    }
+    etapa('portarias', Portaria, ('id', 'nome', 'condominio_id', 'is_ativo'), (
+        (pid, f"Portaria {numero}", cid, True)
+        for cid, portarias in portarias_por_condominio.items()
+        for numero, pid in enumerate(portarias, start=1)
+    ))
+
+    # Profissionais: CPF e placa derivados do id, portanto únicos
+    primeiro_profissional = _proximo_id(conexao, Profissional)
+    profissionais = range(primeiro_profissional, primeiro_profissional + parametros.profissionais)
+
+    def linhas_profissionais():
+        for prid in profissionais:
+            digitos = f"{prid:011d}"
+            cpf = f"{digitos[:3]}.{digitos[3:6]}.{digitos[6:9]}-{digitos[9:]}"
+            placa = None
+            if aleatorio.random() < 0.6:
+                placa = f"{chr(65 + prid % 26)}{chr(65 + prid // 26 % 26)}{chr(65 + prid // 676 % 26)}-{prid % 10}{chr(65 + prid // 10 % 26)}{prid % 100:02d}"
+            nome, empresa = _nome(aleatorio), aleatorio.choice(EMPRESAS)
+            yield (prid, nome, cpf, normalizar_cpf(cpf), placa, normalizar_placa(placa), empresa,
+                   termos_profissional(nome, cpf, placa, empresa))
+
+    etapa('profissionais', Profissional,
+          ('id', 'nome', 'cpf', 'cpf_normalizado', 'placa_veiculo', 'placa_normalizada', 'empresa', 'termos_busca'),
+          linhas_profissionais())
+
+    # Usuários: um síndico por condomínio, um porteiro por portaria e os moradores.
+    # O hash é gerado uma vez só; gerar um por usuário dominaria o tempo da carga.
+    senha_hash = gerar_hash(parametros.senha)
+    primeiro_usuario = _proximo_id(conexao, User)
+    moradores_por_condominio = {}
+    porteiros_por_portaria = {}
+
+    def linhas_usuarios():
+        uid = primeiro_usuario
+        for cid in condominios:
+            nome = _nome(aleatorio)
+            yield (uid, nome, f"sindico{cid}@{DOMINIO_EMAIL}", senha_hash, 'sindico', None, cid, None,
+                   termos_usuario(nome, None))
+            uid += 1
+            for numero, pid in enumerate(portarias_por_condominio[cid], start=1):
+                nome = _nome(aleatorio)
+                yield (uid, nome, f"porteiro{cid}.{numero}@{DOMINIO_EMAIL}", senha_hash, 'porteiro', None, cid, pid,
+                       termos_usuario(nome, None))
+                porteiros_por_portaria[pid] = uid
+                uid += 1
+            moradores = moradores_por_condominio[cid] = []
+            for numero in range(1, parametros.moradores + 1):
+                nome = _nome(aleatorio)
+                apartamento = f"{numero // 4 + 1:03d}-{'ABCD'[numero % 4]}"
+                yield (uid, nome, f"morador{cid}.{numero}@{DOMINIO_EMAIL}", senha_hash, 'morador', apartamento, cid,
+                       None, termos_usuario(nome, apartamento))
+                moradores.append(uid)
+                uid += 1
+
+    def linhas_demonstracao():
+        uid = primeiro_usuario + parametros.condominios * (1 + parametros.portarias + parametros.moradores)
+        hash_demonstracao = gerar_hash(SENHA_DEMONSTRACAO)
+        cid = condominios[0] if condominios else None
+        pid = portarias_por_condominio[cid][0] if cid and portarias_por_condominio[cid] else None
+        for indice, (nome, email, role) in enumerate(CONTAS_DEMONSTRACAO):
+            apartamento = '101-A' if role == 'morador' else None
+            yield (uid + indice, nome, email, hash_demonstracao, role, apartamento,
+                   cid if role != 'admin' else None, pid if role == 'porteiro' else None,
+                   termos_usuario(nome, apartamento))
+
+    colunas_usuarios = ('id', 'nome', 'email', 'senha_hash', 'role', 'apartamento', 'condominio_id', 'portaria_id',
+                        'termos_busca')
+    etapa('usuarios', User, colunas_usuarios, linhas_usuarios())
+    if parametros.demonstracao:
+        etapa('contas de demonstração', User, colunas_usuarios, linhas_demonstracao())
+
+    primeira_conta_profissional = _proximo_id(conexao, User)
+    etapa('contas de profissionais', User, ('id', 'nome', 'email', 'senha_hash', 'role', 'profissional_id'), (
+        (primeira_conta_profissional + indice, f"Profissional {prid}", f"profissional{prid}@{DOMINIO_EMAIL}",
+         senha_hash, 'profissional', prid)
+        for indice, prid in enumerate(profissionais[:parametros.contas_profissionais])
+    ))
+
+    # Acessos: histórico finalizado, alguns em andamento hoje e pré-autorizações pendentes para hoje
+    primeiro_acesso = _proximo_id(conexao, Acesso)
+    hoje = parametros.ate
+
+    def linhas_acessos():
+        # Sorteios com random() e índices: choice/randint custam várias vezes
+        # mais e este laço gera a maior parte das linhas
+        sortear = aleatorio.random
+        texto_hoje = hoje.isoformat()
+        aid = primeiro_acesso
+        lista_profissionais = list(profissionais) or [None]
+        for cid in condominios:
+            portarias = portarias_por_condominio[cid]
+            moradores = moradores_por_condominio[cid] or [None]
+            for dias_atras in range(parametros.dias, 0, -1):
+                dia = hoje - timedelta(days=dias_atras)
+                texto_dia = dia.isoformat()
+                for _ in range(parametros.acessos_por_dia):
+                    pid = portarias[int(sortear() * len(portarias))]
+                    minuto_entrada = 360 + int(sortear() * 960)  # 06:00 às 21:59
+                    entrada = _data_hora(dia, minuto_entrada)
+                    saida = _data_hora(dia, minuto_entrada + 5 + int(sortear() * 236))
+                    yield (aid, 'finalizado', SERVICOS[int(sortear() * len(SERVICOS))],
+                           EMPRESAS[int(sortear() * len(EMPRESAS))], 'pre_autorizado', texto_dia, entrada, saida, cid,
+                           lista_profissionais[int(sortear() * len(lista_profissionais))],
+                           moradores[int(sortear() * len(moradores))], porteiros_por_portaria.get(pid), pid)
+                    aid += 1
+            for _ in range(parametros.acessos_por_dia // 4):
+                pid = portarias[int(sortear() * len(portarias))]
+                entrada = _data_hora(hoje, 12 * 60 - 1 - int(sortear() * 240))
+                yield (aid, 'em_andamento', SERVICOS[int(sortear() * len(SERVICOS))],
+                       EMPRESAS[int(sortear() * len(EMPRESAS))], 'pre_autorizado', texto_hoje, entrada, None, cid,
+                       lista_profissionais[int(sortear() * len(lista_profissionais))],
+                       moradores[int(sortear() * len(moradores))], porteiros_por_portaria.get(pid), pid)
+                aid += 1
+            for _ in range(parametros.pendentes):
+                yield (aid, 'pendente', SERVICOS[int(sortear() * len(SERVICOS))],
+                       EMPRESAS[int(sortear() * len(EMPRESAS))], 'pre_autorizado', texto_hoje, None, None, cid, None,
+                       moradores[int(sortear() * len(moradores))], None, None)
+                aid += 1
+
+    etapa('acessos', Acesso,
+          ('id', 'status', 'servico', 'empresa', 'tipo_acesso', 'data_prevista_acesso', 'data_acesso', 'data_saida',
+           'condominio_id', 'profissional_id', 'usuario_morador_id', 'usuario_porteiro_id', 'portaria_id'),
+          linhas_acessos())
+
+    _ajustar_sequencias(conexao, (Condominio, Portaria, Profissional, User, Acesso))
+    db.session.commit()
+
+    # O consolidado diário é reconstruído de uma vez, em SQL
+    antes = time.perf_counter()
+    recalcular_rollup()
+    log(f"consolidado diário reconstruído em {time.perf_counter() - antes:.1f}s")
+    log(f"Total: {sum(totais.values())} linhas em {time.perf_counter() - inicio:.1f}s")
+    return totais
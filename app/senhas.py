@@ -0,0 +1,79 @@
+# app/senhas.py
+# Hash e verificação de senhas fora do loop de eventos.
+#
+# O pbkdf2 do werkzeug (centenas de milhares de iterações) ocupa a CPU por
+# dezenas a centenas de milissegundos. No worker do gevent, calculado na
+# greenlet da requisição, ele trava todas as outras greenlets do processo,
+# inclusive as conexões do Socket.IO dos painéis. Aqui o cálculo vai para um
+# pool limitado de threads nativas do gevent (SENHA_HASH_THREADS por worker):
+# o hashlib libera o GIL durante o pbkdf2, então o worker segue atendendo
+# enquanto o hash é calculado. Fora do gevent (servidor de desenvolvimento,
+# CLI, testes) o cálculo é feito na própria thread.
+#
+# O método e os parâmetros vêm de SENHA_HASH_METODO. Hashes gravados com outro
+# método são refeitos no próximo login que acertar a senha (ver main.login).
+
+from functools import lru_cache
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+METODO_PADRAO = 'pbkdf2:sha256:600000'
+THREADS_PADRAO = 4
+
+_pool = None
+
+
+def _configuracao(chave, padrao):
+    if has_app_context():
+        return current_app.config.get(chave) or padrao
+    return padrao
+
+def _pool_gevent():
+    """
+    Pool de threads nativas do gevent, ou None se o processo não usa o gevent
+    (sem monkey patch, as chamadas bloqueantes já rodam em threads do sistema).
+    """
+    global _pool
+    try:
+        from gevent import monkey
+    except ImportError:
+        return None
+    if not monkey.is_module_patched('socket'):
+        return None
+    if _pool is None:
+        from gevent.threadpool import ThreadPool
+        _pool = ThreadPool(_configuracao('SENHA_HASH_THREADS', THREADS_PADRAO))
+    return _pool
+
+def _executar(funcao, *args):
+    pool = _pool_gevent()
+    if pool is None:
+        return funcao(*args)
+    # Só a greenlet atual espera; as demais continuam rodando no hub
+    return pool.apply(funcao, args)
+
+
+def metodo_configurado():
+    return _configuracao('SENHA_HASH_METODO', METODO_PADRAO)
+
+def gerar_hash(senha, metodo=None):
+    return _executar(generate_password_hash, senha, metodo or metodo_configurado())
+
+def verificar_senha(senha_hash, senha):
+    if not senha_hash:
+        return False
+    return _executar(check_password_hash, senha_hash, senha)
+
+@lru_cache(maxsize=8)
+def _prefixo_gravado(metodo):
+    # O werkzeug completa os parâmetros omitidos (ex.: 'pbkdf2' -> 'pbkdf2:sha256:600000');
+    # o prefixo real é obtido gerando um hash uma vez por processo
+    return gerar_hash('', metodo).split('$', 1)[0]
+
+def precisa_rehash(senha_hash):
+    """
+    Verdadeiro se o hash não foi gerado com o método e os parâmetros configurados.
+    """
+    if not senha_hash:
+        return False
+    return senha_hash.split('$', 1)[0] != _prefixo_gravado(metodo_configurado())
@@ -2,10 +2,18 @@
 # Este arquivo contém as principais funções de lógica de negócio do sistema.
 # O objetivo é separar a lógica das rotas do Flask para manter o código mais limpo e organizado.
 
-from app.models import Acesso, Profissional, User, Condominio, Plano, db
+from app.models import Acesso, AcessoDiario, Profissional, User, Condominio, Plano, db, normalizar_cpf, normalizar_placa
+from app.events import montar_evento_acesso, publicar_evento_acesso
+from app.cache import em_cache_por_condominio
+from app.busca import escapar_like
+from app.transicoes import encerrar_acessos, transicionar_acesso
+from app.senhas import gerar_hash
+import csv
+import io
+from dataclasses import dataclass, field
 from datetime import datetime, date, timedelta
-from werkzeug.security import generate_password_hash
-from sqlalchemy import func
+from sqlalchemy import func, select, tuple_, or_
+from sqlalchemy.orm import joinedload, contains_eager
 
 # ==============================================================================
 # Funções para o Módulo de Moradores
@@ -27,7 +35,10 @@ def criar_pre_autorizacao(morador_id, condominio_id, form_data):
             status='pendente'
         )
         db.session.add(pre_autorizacao)
+        db.session.flush()
+        evento = montar_evento_acesso('pre_autorizacao', pre_autorizacao)
         db.session.commit()
+        publicar_evento_acesso(evento)
         return True
     except Exception as e:
         db.session.rollback()
@@ -40,9 +51,10 @@ def get_acessos_morador(morador_id):
     Busca o histórico de acessos para um morador específico.
     A consulta faz um join com a tabela de Profissional para obter o nome.
     """
-    # A consulta foi corrigida para usar o relationship morador para evitar ambiguidade.
-    # O query.join(Acesso.profissional) usa o relationship definido no models.py
+    # O profissional é carregado na mesma consulta (joinedload) para evitar
+    # um SELECT extra por linha quando o template acessa acesso.profissional.
     return db.session.query(Acesso)\
+             .options(joinedload(Acesso.profissional))\
              .filter(Acesso.usuario_morador_id == morador_id)\
              .order_by(Acesso.data_prevista_acesso.desc())\
              .limit(8)\
@@ -56,9 +68,13 @@ def get_acessos_morador(morador_id):
 def get_pre_autorizacoes_pendentes(condominio_id):
     """
     Busca todas as pré-autorizações pendentes para um condomínio específico.
-    Retorna objetos Acesso completos, prontos para uso no template.
+    Retorna objetos Acesso completos, prontos para uso no template, com
+    profissional e morador já carregados.
     """
-    return Acesso.query.filter_by(
+    return Acesso.query.options(
+        joinedload(Acesso.profissional),
+        joinedload(Acesso.morador)
+    ).filter_by(
         condominio_id=condominio_id,
         status='pendente'
     ).order_by(Acesso.data_prevista_acesso).all()
@@ -93,47 +109,71 @@ def get_total_acessos_hoje(condominio_id):
 
 def get_ultimos_acessos_hoje(condominio_id, limite=10):
     """
-    Retorna uma lista com os últimos acessos registrados no dia.
+    Retorna uma lista com os últimos acessos registrados no dia,
+    com profissional e morador já carregados para o template.
     """
     hoje = datetime.combine(date.today(), datetime.min.time())
     return db.session.query(Acesso)\
+             .options(joinedload(Acesso.profissional), joinedload(Acesso.morador))\
              .filter(
                  Acesso.condominio_id == condominio_id,
                  Acesso.data_acesso >= hoje
              ).order_by(Acesso.data_acesso.desc()).limit(limite).all()
 
-def registrar_entrada_acesso_autorizado(acesso_id, porteiro_id):
+def registrar_entrada_acesso_autorizado(acesso_id, porteiro_id, condominio_id, portaria_id=None):
     """
-    Atualiza uma pré-autorização para o status 'em_andamento'.
+    Atualiza uma pré-autorização do condomínio para o status 'em_andamento'.
+    A portaria do porteiro é registrada se o acesso ainda não tiver uma.
+    Retorna um ResultadoTransicao (ver app/transicoes.py).
     """
-    acesso = Acesso.query.get(acesso_id)
-    if acesso:
-        acesso.status = 'em_andamento'
-        acesso.usuario_porteiro_id = porteiro_id
-        acesso.data_acesso = datetime.now()
-        db.session.commit()
-        return True
-    return False
+    return transicionar_acesso(acesso_id, 'entrada', condominio_id,
+                               porteiro_id=porteiro_id, portaria_id=portaria_id)
 
-def registrar_saida_acesso(acesso_id, porteiro_id):
+def registrar_saida_acesso(acesso_id, porteiro_id, condominio_id):
     """
-    Finaliza um acesso registrando a data de saída.
+    Finaliza um acesso em andamento do condomínio registrando a data de saída.
+    Retorna um ResultadoTransicao (ver app/transicoes.py).
     """
-    acesso = Acesso.query.get(acesso_id)
-    if acesso and acesso.status == 'em_andamento':
-        acesso.status = 'finalizado'
-        acesso.data_saida = datetime.now()
-        # Se você quiser rastrear o porteiro de saída, seu modelo Acesso deve ter um campo porteiro_saida_id
-        # acesso.porteiro_saida_id = porteiro_id
-        db.session.commit()
-        return True
-    return False
+    return transicionar_acesso(acesso_id, 'saida', condominio_id, porteiro_id=porteiro_id)
+
+def registrar_saidas_em_lote(porteiro_id, condominio_id, acesso_ids=None, portaria_id=None, horas=None):
+    """
+    Finaliza de uma vez os acessos em andamento do condomínio selecionados por
+    ids, portaria e/ou tempo em aberto (horas). Retorna os ids finalizados.
+    """
+    return encerrar_acessos(condominio_id, porteiro_id=porteiro_id, acesso_ids=acesso_ids, portaria_id=portaria_id,
+                            abertos_ha_mais_de=timedelta(hours=horas) if horas is not None else None)
+
+def get_ultimos_acessos_profissional(profissional_id, limite=10):
+    """
+    Retorna os últimos acessos de um profissional, com condomínio e morador
+    já carregados para o painel do profissional.
+    """
+    return Acesso.query.options(
+        joinedload(Acesso.condominio),
+        joinedload(Acesso.morador)
+    ).filter_by(profissional_id=profissional_id)\
+     .order_by(Acesso.data_acesso.desc())\
+     .limit(limite)\
+     .all()
 
 def buscar_profissional_por_cpf(cpf):
     """
-    Busca um profissional pelo CPF.
+    Busca um profissional pelo CPF, com ou sem pontuação (índice único em cpf_normalizado).
+    """
+    cpf = normalizar_cpf(cpf)
+    if not cpf:
+        return None
+    return Profissional.query.filter_by(cpf_normalizado=cpf).first()
+
+def buscar_profissionais_por_placa(placa):
+    """
+    Busca os profissionais com a placa informada, com ou sem hífen (índice em placa_normalizada).
     """
-    return Profissional.query.filter_by(cpf=cpf).first()
+    placa = normalizar_placa(placa)
+    if not placa:
+        return []
+    return Profissional.query.filter_by(placa_normalizada=placa).order_by(Profissional.nome).all()
 
 def criar_profissional_acesso_imediato(nome, servico, empresa, morador, porteiro):
     """
@@ -153,18 +193,44 @@ def get_all_moradores_do_condominio(condominio_id):
 # Funções para o Módulo de Síndicos
 # ==============================================================================
 
+@dataclass(frozen=True)
+class CondominioInfo:
+    """
+    Dados básicos de um condomínio, desacoplados da sessão para poderem ficar em cache.
+    """
+    id: int
+    nome: str
+    endereco: str
+    status_assinatura: str
+    data_fim_carencia: datetime = None
+    plano_id: int = None
+
+@em_cache_por_condominio('Condominio')
 def get_condominio_info(condominio_id):
     """
     Busca as informações básicas de um condomínio pelo ID.
     """
-    return Condominio.query.filter_by(id=condominio_id).first()
+    condominio = Condominio.query.filter_by(id=condominio_id).first()
+    if not condominio:
+        return None
+    return CondominioInfo(
+        id=condominio.id,
+        nome=condominio.nome,
+        endereco=condominio.endereco,
+        status_assinatura=condominio.status_assinatura,
+        data_fim_carencia=condominio.data_fim_carencia,
+        plano_id=condominio.plano_id
+    )
 
 def get_ultimas_movimentacoes_do_dia(condominio_id, limite=10):
     """
     Busca as últimas entradas e saídas do dia para um condomínio específico.
+    O filtro usa um intervalo em data_acesso (e não func.date) para que o
+    índice (condominio_id, data_acesso) possa ser aproveitado.
     """
-    hoje = date.today()
+    hoje = datetime.combine(date.today(), datetime.min.time())
     return db.session.query(
+        Acesso.id,
         Acesso.data_acesso,
         Acesso.data_saida,
         Profissional.nome,
@@ -174,18 +240,20 @@ def get_ultimas_movimentacoes_do_dia(condominio_id, limite=10):
     ).join(Profissional, Acesso.profissional_id == Profissional.id)\
      .join(User, Acesso.usuario_morador_id == User.id)\
      .filter(Acesso.condominio_id == condominio_id)\
-     .filter(func.date(Acesso.data_acesso) == hoje)\
+     .filter(Acesso.data_acesso >= hoje)\
+     .filter(Acesso.data_acesso < hoje + timedelta(days=1))\
      .order_by(Acesso.data_acesso.desc())\
      .limit(limite)\
      .all()
 
-def get_relatorio_acessos(condominio_id, data_inicio, data_fim):
+def _consulta_relatorio_acessos(condominio_id, data_inicio, data_fim):
     """
-    Busca todos os acessos de um condomínio em um intervalo de datas.
+    Consulta base do relatório de acessos (somente as colunas exibidas).
     """
     data_fim_ajustada = data_fim + timedelta(days=1)
     
     return db.session.query(
+        Acesso.id,
         Acesso.data_acesso,
         Acesso.data_saida,
         Profissional.nome,
@@ -198,8 +266,128 @@ def get_relatorio_acessos(condominio_id, data_inicio, data_fim):
      .filter(Acesso.condominio_id == condominio_id)\
      .filter(Acesso.data_acesso >= data_inicio)\
      .filter(Acesso.data_acesso < data_fim_ajustada)\
-     .order_by(Acesso.data_acesso)\
-     .all()
+     .order_by(Acesso.data_acesso, Acesso.id)
+
+def get_relatorio_acessos(condominio_id, data_inicio, data_fim):
+    """
+    Busca todos os acessos de um condomínio em um intervalo de datas.
+    Para períodos longos prefira get_relatorio_acessos_pagina ou iterar_relatorio_acessos.
+    """
+    return _consulta_relatorio_acessos(condominio_id, data_inicio, data_fim).all()
+
+# Quantidade de linhas por página no relatório em HTML
+TAMANHO_PAGINA_RELATORIO = 100
+
+def get_relatorio_acessos_pagina(condominio_id, data_inicio, data_fim, apos=None, limite=TAMANHO_PAGINA_RELATORIO):
+    """
+    Busca uma página do relatório usando paginação por chave (keyset) em
+    (data_acesso, id), que continua usando o índice em páginas avançadas.
+
+    Args:
+        apos: tupla (data_acesso, id) da última linha da página anterior, ou None.
+
+    Returns:
+        (linhas, proximo), onde proximo é a tupla a ser passada como 'apos'
+        para buscar a página seguinte, ou None se esta for a última.
+    """
+    consulta = _consulta_relatorio_acessos(condominio_id, data_inicio, data_fim)
+    if apos:
+        consulta = consulta.filter(tuple_(Acesso.data_acesso, Acesso.id) > tuple_(*apos))
+
+    # Busca uma linha a mais apenas para saber se existe uma próxima página
+    linhas = consulta.limit(limite + 1).all()
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        ultima = linhas[-1]
+        return linhas, (ultima.data_acesso, ultima.id)
+    return linhas, None
+
+def iterar_relatorio_acessos(condominio_id, data_inicio, data_fim, lote=1000):
+    """
+    Percorre o relatório inteiro com um cursor no servidor (yield_per),
+    mantendo em memória apenas um lote de linhas por vez.
+    """
+    consulta = _consulta_relatorio_acessos(condominio_id, data_inicio, data_fim).yield_per(lote)
+    for linha in consulta:
+        yield linha
+
+# Cabeçalho das exportações do relatório
+COLUNAS_RELATORIO = ['Profissional', 'Serviço', 'Morador', 'Apartamento', 'Entrada', 'Saída', 'Status']
+
+def _linha_relatorio(acesso):
+    return [
+        acesso.nome,
+        acesso.servico,
+        acesso.morador_nome,
+        acesso.apartamento,
+        acesso.data_acesso.strftime('%d/%m/%Y %H:%M') if acesso.data_acesso else '',
+        acesso.data_saida.strftime('%d/%m/%Y %H:%M') if acesso.data_saida else '',
+        acesso.status,
+    ]
+
+def gerar_csv_relatorio_acessos(condominio_id, data_inicio, data_fim):
+    """
+    Gera o relatório em CSV, uma linha por vez, para ser enviado em streaming.
+    Usa ';' e BOM UTF-8 para abrir corretamente no Excel em português.
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=';')
+
+    def descarregar():
+        conteudo = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return conteudo
+
+    escritor.writerow(COLUNAS_RELATORIO)
+    yield '\ufeff' + descarregar()
+    for acesso in iterar_relatorio_acessos(condominio_id, data_inicio, data_fim):
+        escritor.writerow(_linha_relatorio(acesso))
+        yield descarregar()
+
+def gerar_xlsx_relatorio_acessos(condominio_id, data_inicio, data_fim, destino):
+    """
+    Grava o relatório em XLSX no arquivo 'destino' usando o modo write-only do
+    openpyxl (memória constante). Retorna False se o openpyxl não estiver instalado.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        return False
+
+    planilha = Workbook(write_only=True)
+    aba = planilha.create_sheet('Acessos')
+    aba.append(COLUNAS_RELATORIO)
+    for acesso in iterar_relatorio_acessos(condominio_id, data_inicio, data_fim):
+        aba.append(_linha_relatorio(acesso))
+    planilha.save(destino)
+    return True
+
+def formatar_tempo_economizado(total_acessos, tempo_por_acesso_min=5):
+    """
+    Converte uma quantidade de acessos no texto "Xh Ym" exibido nos painéis.
+    """
+    total_minutos_economizados = total_acessos * tempo_por_acesso_min
+    
+    horas = total_minutos_economizados // 60
+    minutos = total_minutos_economizados % 60
+    
+    return f"{horas}h {minutos}m"
+
+def _total_realizados_consolidado(condominio_id, desde=None):
+    """
+    Soma dos acessos realizados a partir do consolidado diário (acessos_diarios),
+    lendo um registro por dia/portaria em vez de todo o histórico de acessos.
+    """
+    consulta = select(func.coalesce(func.sum(AcessoDiario.em_andamento + AcessoDiario.finalizados), 0))\
+        .where(AcessoDiario.condominio_id == condominio_id)
+    if desde is not None:
+        consulta = consulta.where(AcessoDiario.dia >= desde)
+    return consulta.scalar_subquery()
+
+def _primeiro_dia_mes():
+    # Data local, como data_acesso e os dias do consolidado
+    return datetime.now().date().replace(day=1)
 
 def calcular_tempo_economizado(condominio_id, tempo_por_acesso_min=5):
     """
@@ -212,51 +400,105 @@ def calcular_tempo_economizado(condominio_id, tempo_por_acesso_min=5):
     Returns:
         O tempo total economizado em horas e minutos.
     """
-    hoje = datetime.utcnow()
-    primeiro_dia_mes = hoje.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    
-    total_acessos_mes = Acesso.query.filter(
-        Acesso.condominio_id == condominio_id,
-        Acesso.data_acesso >= primeiro_dia_mes,
-        Acesso.status.in_(['finalizado', 'em_andamento'])
-    ).count()
-    
-    total_minutos_economizados = total_acessos_mes * tempo_por_acesso_min
+    total_acessos_mes = db.session.scalar(
+        select(_total_realizados_consolidado(condominio_id, desde=_primeiro_dia_mes()))
+    )
     
-    horas = total_minutos_economizados // 60
-    minutos = total_minutos_economizados % 60
-    
-    return f"{horas}h {minutos}m"
+    return formatar_tempo_economizado(total_acessos_mes, tempo_por_acesso_min)
 
 def calcular_tempo_economizado_total(condominio_id, tempo_por_acesso_min=5):
     """
     Calcula o tempo total economizado para um condomínio desde o início da operação.
     """
-    total_acessos = Acesso.query.filter(
-        Acesso.condominio_id == condominio_id,
-        Acesso.status.in_(['finalizado', 'em_andamento'])
-    ).count()
+    total_acessos = db.session.scalar(select(_total_realizados_consolidado(condominio_id)))
     
-    total_minutos_economizados = total_acessos * tempo_por_acesso_min
-    
-    horas = total_minutos_economizados // 60
-    minutos = total_minutos_economizados % 60
-    
-    return f"{horas}h {minutos}m"
-
+    return formatar_tempo_economizado(total_acessos, tempo_por_acesso_min)
+
+def get_resumo_relatorio_acessos(condominio_id, data_inicio, data_fim):
+    """
+    Totais do período do relatório, somados do consolidado diário.
+    A permanência média considera apenas acessos finalizados.
+    """
+    resumo = db.session.query(
+        func.coalesce(func.sum(AcessoDiario.total), 0).label('total'),
+        func.coalesce(func.sum(AcessoDiario.pendentes), 0).label('pendentes'),
+        func.coalesce(func.sum(AcessoDiario.em_andamento), 0).label('em_andamento'),
+        func.coalesce(func.sum(AcessoDiario.finalizados), 0).label('finalizados'),
+        func.coalesce(func.sum(AcessoDiario.permanencia_total_segundos), 0).label('permanencia_total_segundos'),
+        func.coalesce(func.sum(AcessoDiario.permanencia_quantidade), 0).label('permanencia_quantidade')
+    ).filter(
+        AcessoDiario.condominio_id == condominio_id,
+        AcessoDiario.dia >= data_inicio,
+        AcessoDiario.dia <= data_fim
+    ).one()
+
+    permanencia_media_min = None
+    if resumo.permanencia_quantidade:
+        permanencia_media_min = round(resumo.permanencia_total_segundos / resumo.permanencia_quantidade / 60)
+
+    return {
+        'total': resumo.total,
+        'pendentes': resumo.pendentes,
+        'em_andamento': resumo.em_andamento,
+        'finalizados': resumo.finalizados,
+        'permanencia_media_min': permanencia_media_min,
+    }
+
+@em_cache_por_condominio('User')
 def contar_moradores_condominio(condominio_id):
     """
     Conta o número total de usuários do tipo 'morador' em um condomínio.
     """
-    return User.query.filter_by(condominio_id=condominio_id, role='morador').count()
+    return db.session.query(func.count(User.id))\
+        .filter(User.condominio_id == condominio_id, User.role == 'morador')\
+        .scalar()
 
+@em_cache_por_condominio('Acesso')
 def contar_profissionais_condominio(condominio_id):
     """
     Conta o número total de profissionais que já acessaram um condomínio.
     """
-    profissionais_ids = db.session.query(Acesso.profissional_id).filter_by(condominio_id=condominio_id).distinct().all()
-    
-    return len(profissionais_ids)
+    return db.session.query(func.count(func.distinct(Acesso.profissional_id)))\
+        .filter(Acesso.condominio_id == condominio_id)\
+        .scalar()
+
+
+@dataclass
+class SindicoDashboardSnapshot:
+    """
+    Dados do painel do síndico reunidos em poucas consultas.
+    Os contadores vêm de uma única consulta com agregação condicional.
+    """
+    total_moradores: int = 0
+    total_profissionais: int = 0
+    acessos_pendentes: int = 0
+    tempo_economizado_mes: str = '0h 0m'
+    tempo_economizado_total: str = '0h 0m'
+    ultimas_movimentacoes: list = field(default_factory=list)
+    acessos_em_andamento: list = field(default_factory=list)
+
+def get_sindico_dashboard_snapshot(condominio_id, limite_movimentacoes=10, tempo_por_acesso_min=5):
+    """
+    Monta o painel do síndico com três consultas: uma para os contadores
+    (COUNT(*) FILTER (WHERE ...) e subconsultas no consolidado diário) e duas
+    para as listas exibidas. Moradores e profissionais vêm do cache por
+    condomínio (ver app/cache.py).
+    """
+    contadores = db.session.query(
+        func.count().filter(Acesso.status == 'pendente').label('pendentes'),
+        _total_realizados_consolidado(condominio_id, desde=_primeiro_dia_mes()).label('realizados_mes'),
+        _total_realizados_consolidado(condominio_id).label('realizados_total')
+    ).filter(Acesso.condominio_id == condominio_id).one()
+
+    return SindicoDashboardSnapshot(
+        total_moradores=contar_moradores_condominio(condominio_id),
+        total_profissionais=contar_profissionais_condominio(condominio_id),
+        acessos_pendentes=contadores.pendentes,
+        tempo_economizado_mes=formatar_tempo_economizado(contadores.realizados_mes, tempo_por_acesso_min),
+        tempo_economizado_total=formatar_tempo_economizado(contadores.realizados_total, tempo_por_acesso_min),
+        ultimas_movimentacoes=get_ultimas_movimentacoes_do_dia(condominio_id, limite=limite_movimentacoes),
+        acessos_em_andamento=get_acessos_em_andamento(condominio_id)
+    )
 
 
 # ==============================================================================
@@ -275,13 +517,93 @@ def get_all_condominios():
     """
     return Condominio.query.order_by(Condominio.nome).all()
 
+TAMANHO_PAGINA_ADMIN = 50
+
+# Colunas aceitas no parâmetro de ordenação das listagens do administrador
+ORDENACAO_USUARIOS = {
+    'nome': User.nome,
+    'email': User.email,
+    'role': User.role,
+    'condominio': Condominio.nome,
+    'apartamento': User.apartamento,
+}
+ORDENACAO_CONDOMINIOS = {
+    'nome': Condominio.nome,
+    'endereco': Condominio.endereco,
+    'plano': Plano.nome,
+    'status': Condominio.status_assinatura,
+}
+
+def _padrao_busca(texto):
+    """
+    Padrão para ILIKE com os curingas do próprio texto escapados.
+    """
+    return f'%{escapar_like(texto)}%'
+
+def _ordenar(consulta, colunas, ordem, direcao, desempate):
+    coluna = colunas.get(ordem, next(iter(colunas.values())))
+    coluna = coluna.desc() if direcao == 'desc' else coluna.asc()
+    return consulta.order_by(coluna, desempate)
+
+def listar_usuarios_admin(pagina=1, por_pagina=TAMANHO_PAGINA_ADMIN, busca=None, role=None,
+                          condominio_id=None, ordem='nome', direcao='asc'):
+    """
+    Página de usuários filtrada por texto (nome, e-mail, apartamento), papel e
+    condomínio. O condomínio vem no mesmo SELECT, para exibição e ordenação.
+    """
+    consulta = User.query.outerjoin(User.condominio).options(contains_eager(User.condominio))
+    if busca:
+        padrao = _padrao_busca(busca)
+        consulta = consulta.filter(or_(
+            User.nome.ilike(padrao, escape='\\'),
+            User.email.ilike(padrao, escape='\\'),
+            User.apartamento.ilike(padrao, escape='\\')
+        ))
+    if role:
+        consulta = consulta.filter(User.role == role)
+    if condominio_id:
+        consulta = consulta.filter(User.condominio_id == condominio_id)
+
+    consulta = _ordenar(consulta, ORDENACAO_USUARIOS, ordem, direcao, User.id)
+    return consulta.paginate(page=pagina, per_page=por_pagina, error_out=False)
+
+def listar_condominios_admin(pagina=1, por_pagina=TAMANHO_PAGINA_ADMIN, busca=None, status=None,
+                             ordem='nome', direcao='asc'):
+    """
+    Página de condomínios filtrada por texto (nome, endereço) e status da assinatura.
+    """
+    consulta = Condominio.query.outerjoin(Condominio.plano).options(contains_eager(Condominio.plano))
+    if busca:
+        padrao = _padrao_busca(busca)
+        consulta = consulta.filter(or_(
+            Condominio.nome.ilike(padrao, escape='\\'),
+            Condominio.endereco.ilike(padrao, escape='\\')
+        ))
+    if status:
+        consulta = consulta.filter(Condominio.status_assinatura == status)
+
+    consulta = _ordenar(consulta, ORDENACAO_CONDOMINIOS, ordem, direcao, Condominio.id)
+    return consulta.paginate(page=pagina, per_page=por_pagina, error_out=False)
+
+def buscar_condominios_autocomplete(termo, limite=20):
+    """
+    Sugestões de condomínios pelo nome, para os campos de seleção do administrador.
+    Nomes que começam com o termo vêm primeiro.
+    """
+    consulta = db.session.query(Condominio.id, Condominio.nome)
+    if termo:
+        padrao = _padrao_busca(termo)
+        consulta = consulta.filter(Condominio.nome.ilike(padrao, escape='\\'))\
+            .order_by(Condominio.nome.ilike(padrao[1:], escape='\\').desc())
+    return consulta.order_by(Condominio.nome).limit(limite).all()
+
 def create_user_admin(form_data):
     """
     Cria um novo usuário com base nos dados do formulário do administrador.
     A senha é armazenada com hash por segurança.
     """
     try:
-        hashed_password = generate_password_hash(form_data['password'])
+        hashed_password = gerar_hash(form_data['password'])
 
         condominio_id_from_form = form_data.get('condominio_id')
         condominio_id = int(condominio_id_from_form) if condominio_id_from_form and condominio_id_from_form != '-1' else None
@@ -347,7 +669,7 @@ def update_user_admin(user_id, form_data):
         user.apartamento = form_data.get('apartamento') or None
         
         if form_data.get('password'):
-            user.senha_hash = generate_password_hash(form_data['password'])
+            user.senha_hash = gerar_hash(form_data['password'])
 
         condominio_id_from_form = form_data.get('condominio_id')
         user.condominio_id = int(condominio_id_from_form) if condominio_id_from_form and condominio_id_from_form != '-1' else None
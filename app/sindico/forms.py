@@ -1,6 +1,7 @@
 # app/sindico/forms.py
 
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileRequired, FileAllowed
 from wtforms import StringField, PasswordField, SelectField, SubmitField
 from wtforms.validators import DataRequired, Email, Length, Optional, ValidationError
 
@@ -25,4 +26,10 @@ class MoradorForm(FlaskForm):
     email = StringField('Email', validators=[DataRequired(), Email()])
     apartamento = StringField('Apartamento', validators=[DataRequired()])
     senha = PasswordField('Senha', validators=[DataRequired(), Length(min=6)])
-    submit = SubmitField('Adicionar Morador')
\ No newline at end of file
+    submit = SubmitField('Adicionar Morador')
+
+class ImportarUsuariosForm(FlaskForm):
+    papel = SelectField('Tipo de usuário', choices=[('morador', 'Moradores'), ('porteiro', 'Porteiros')], validators=[DataRequired()])
+    arquivo = FileField('Planilha (CSV ou XLSX)', validators=[FileRequired(), FileAllowed(['csv', 'xlsx'], 'Envie um arquivo CSV ou XLSX.')])
+    submit = SubmitField('Validar planilha')
+    importar = SubmitField('Importar e gerar convites')
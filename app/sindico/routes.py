@@ -1,25 +1,38 @@
 # app/sindico/routes.py
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, Response, send_file, stream_with_context, abort
 from flask_login import login_required, current_user
 from flask_wtf.csrf import generate_csrf
 from app.models import db, Portaria, User
+from sqlalchemy.orm import joinedload
 from app.decorators import permission_required, sindico_required
 from app.forms import RelatorioAcessoForm, PortariaForm
-from app.sindico.forms import UserForm, MoradorForm
+from app.sindico.forms import UserForm, MoradorForm, ImportarUsuariosForm
+from app.importacao import importar_usuarios, ErroImportacao
+from app.tokens_qr import assinar_token_portaria
+from app.condicional import linhas_alteradas, resposta_condicional
+from app.qrcodes import (
+    FORMATOS as FORMATOS_QRCODE,
+    ErroQrcode,
+    conteudo_qrcode_portaria,
+    exportar_zip,
+    itens_qrcodes_portarias,
+    responder_qrcode,
+    urls_qrcodes
+)
 from app.services import (
     get_condominio_info,
-    get_ultimas_movimentacoes_do_dia,
-    get_pre_autorizacoes_pendentes,
-    calcular_tempo_economizado,
-    calcular_tempo_economizado_total,
-    contar_moradores_condominio,
-    contar_profissionais_condominio,
-    get_acessos_em_andamento,
+    get_sindico_dashboard_snapshot,
     get_all_moradores_do_condominio,
-    get_relatorio_acessos
+    get_relatorio_acessos_pagina,
+    get_resumo_relatorio_acessos,
+    gerar_csv_relatorio_acessos,
+    gerar_xlsx_relatorio_acessos
 )
-from datetime import datetime
+from datetime import datetime, date
+import csv
+import io
+import tempfile
 
 # ==============================================================================
 # Define o Blueprint para as rotas do síndico
@@ -38,49 +51,134 @@ def sindico_dashboard():
     sindico_info = current_user
     condominio = get_condominio_info(sindico_info.condominio_id)
     
-    ultimas_movimentacoes = get_ultimas_movimentacoes_do_dia(condominio.id, limite=10)
-    acessos_pendentes = get_pre_autorizacoes_pendentes(condominio.id)
-    tempo_economizado_mes = calcular_tempo_economizado(condominio.id)
-    tempo_economizado_total = calcular_tempo_economizado_total(condominio.id)
-    total_moradores = contar_moradores_condominio(condominio.id)
-    total_profissionais = contar_profissionais_condominio(condominio.id)
-    acessos_em_andamento = get_acessos_em_andamento(condominio.id)
+    painel = get_sindico_dashboard_snapshot(condominio.id, limite_movimentacoes=10)
     
-    return render_template('dashboard.html',
+    return render_template('sindico/dashboard.html',
                            sindico=sindico_info,
                            condominio=condominio,
-                           ultimas_movimentacoes=ultimas_movimentacoes,
-                           acessos_pendentes=len(acessos_pendentes),
-                           tempo_economizado_mes=tempo_economizado_mes,
-                           tempo_economizado_total=tempo_economizado_total,
-                           total_moradores=total_moradores,
-                           total_profissionais=total_profissionais,
-                           acessos_em_andamento=acessos_em_andamento)
+                           ultimas_movimentacoes=painel.ultimas_movimentacoes,
+                           acessos_pendentes=painel.acessos_pendentes,
+                           tempo_economizado_mes=painel.tempo_economizado_mes,
+                           tempo_economizado_total=painel.tempo_economizado_total,
+                           total_moradores=painel.total_moradores,
+                           total_profissionais=painel.total_profissionais,
+                           acessos_em_andamento=painel.acessos_em_andamento)
+
+def _periodo_relatorio(args):
+    """
+    Lê o período do relatório dos parâmetros da URL (data_inicio/data_fim em ISO).
+    """
+    try:
+        data_inicio = date.fromisoformat(args.get('data_inicio', ''))
+        data_fim = date.fromisoformat(args.get('data_fim', ''))
+    except ValueError:
+        return None
+    return data_inicio, data_fim
+
+def _codificar_cursor(cursor):
+    data_acesso, acesso_id = cursor
+    return f"{data_acesso.isoformat()}_{acesso_id}"
+
+def _decodificar_cursor(valor):
+    if not valor:
+        return None
+    try:
+        data_acesso, acesso_id = valor.rsplit('_', 1)
+        return datetime.fromisoformat(data_acesso), int(acesso_id)
+    except ValueError:
+        return None
 
 @sindico.route('/relatorios', methods=['GET', 'POST'])
 @login_required
 @permission_required('sindico')
 def relatorios():
     form = RelatorioAcessoForm()
-    relatorio_gerado = None
 
+    # O filtro vai para a URL para que a paginação e a exportação usem GET
     if form.validate_on_submit():
-        data_inicio = form.data_inicio.data
-        data_fim = form.data_fim.data
-        condominio_id = current_user.condominio_id
-        relatorio_gerado = get_relatorio_acessos(condominio_id, data_inicio, data_fim)
+        return redirect(url_for('sindico.relatorios',
+                                data_inicio=form.data_inicio.data.isoformat(),
+                                data_fim=form.data_fim.data.isoformat()))
+
+    relatorio_gerado = None
+    resumo = None
+    proxima_pagina = None
+    periodo = _periodo_relatorio(request.args)
+    if periodo:
+        data_inicio, data_fim = periodo
+        form.data_inicio.data = data_inicio
+        form.data_fim.data = data_fim
+        apos = _decodificar_cursor(request.args.get('apos'))
+        relatorio_gerado, proximo = get_relatorio_acessos_pagina(
+            current_user.condominio_id, data_inicio, data_fim, apos=apos
+        )
+        proxima_pagina = _codificar_cursor(proximo) if proximo else None
+        resumo = get_resumo_relatorio_acessos(current_user.condominio_id, data_inicio, data_fim)
 
     now = datetime.now()
     return render_template('sindico/relatorios.html',
                            form=form,
                            relatorio=relatorio_gerado,
+                           resumo=resumo,
+                           periodo=periodo,
+                           proxima_pagina=proxima_pagina,
+                           pagina_inicial='apos' not in request.args,
                            now=now)
 
+@sindico.route('/relatorios/exportar')
+@login_required
+@permission_required('sindico')
+def exportar_relatorio():
+    """Exporta o relatório completo do período em CSV (streaming) ou XLSX."""
+    periodo = _periodo_relatorio(request.args)
+    if not periodo:
+        flash('Informe o período do relatório para exportar.', 'warning')
+        return redirect(url_for('sindico.relatorios'))
+
+    data_inicio, data_fim = periodo
+    nome_arquivo = f"acessos_{data_inicio.isoformat()}_{data_fim.isoformat()}"
+
+    if request.args.get('formato') == 'xlsx':
+        # O openpyxl precisa do arquivo completo; ele é montado em disco, não em memória
+        arquivo = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        if not gerar_xlsx_relatorio_acessos(current_user.condominio_id, data_inicio, data_fim, arquivo):
+            flash('Exportação em XLSX indisponível no servidor. Use CSV.', 'danger')
+            return redirect(url_for('sindico.relatorios', data_inicio=data_inicio.isoformat(), data_fim=data_fim.isoformat()))
+        arquivo.seek(0)
+        return send_file(arquivo,
+                         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                         as_attachment=True,
+                         download_name=f"{nome_arquivo}.xlsx")
+
+    linhas = gerar_csv_relatorio_acessos(current_user.condominio_id, data_inicio, data_fim)
+    return Response(stream_with_context(linhas),
+                    mimetype='text/csv; charset=utf-8',
+                    headers={'Content-Disposition': f'attachment; filename={nome_arquivo}.csv'})
+
+
+# Carimbos das listas (ver app/condicional.py). As listas de usuários consideram
+# todos os usuários do condomínio, o que cobre também as trocas de papel.
+def _carimbo_portarias():
+    if not current_user.condominio_id:
+        return None
+    return linhas_alteradas(Portaria, Portaria.condominio_id == current_user.condominio_id)
+
+def _carimbo_usuarios():
+    if not current_user.condominio_id:
+        return None
+    return linhas_alteradas(User, User.condominio_id == current_user.condominio_id)
+
+def _carimbo_porteiros():
+    # A lista também exibe a portaria de cada porteiro
+    if not current_user.condominio_id:
+        return None
+    return _carimbo_usuarios() + _carimbo_portarias()
 
 # Rotas do CRUD de Portarias
 @sindico.route('/portarias')
 @login_required
 @permission_required('sindico')
+@resposta_condicional(_carimbo_portarias)
 def listar_portarias():
     condominio_id = current_user.condominio_id
     portarias = Portaria.query.filter_by(condominio_id=condominio_id).order_by(Portaria.nome).all()
@@ -154,17 +252,60 @@ def gerar_qrcode_portaria(portaria_id):
         flash('Você não tem permissão para esta portaria.', 'danger')
         return redirect(url_for('sindico.listar_portarias'))
         
-    # Aqui você irá gerar o conteúdo do QR Code.
-    # Por exemplo, a URL que o porteiro irá acessar.
-    # URL de exemplo: https://easygate.com/api/portaria/1
-    # O conteúdo do QR code deve ser único para cada portaria.
-    qr_code_content = f"https://easygate.com/api/portaria/{portaria.id}"
-    portaria.qr_code_portaria = qr_code_content
+    # O QR Code leva a URL de check-in com o token assinado da portaria (ver app/tokens_qr.py).
+    # Gerar de novo após trocar QR_CHAVE_ATUAL substitui o código antigo.
+    token = assinar_token_portaria(portaria.id, portaria.condominio_id)
+    portaria.qr_code_portaria = url_for('profissional.checkin_qr', token=token, _external=True)
     db.session.commit()
     flash('QR Code gerado e salvo com sucesso!', 'success')
     
     return redirect(url_for('sindico.listar_portarias'))
 
+# Imagem do QR Code da portaria, gerada no servidor (ver app/qrcodes.py).
+# O porteiro também acessa, para exibir o código no tablet da portaria.
+@sindico.route('/portarias/<int:portaria_id>/qrcode.<formato>')
+@login_required
+@permission_required('sindico', 'porteiro')
+def imagem_qrcode_portaria(portaria_id, formato):
+    portaria = Portaria.query.get_or_404(portaria_id)
+    if portaria.condominio_id != current_user.condominio_id:
+        abort(404)
+    return responder_qrcode(conteudo_qrcode_portaria(portaria), formato)
+
+def _portarias_ativas():
+    return Portaria.query.filter_by(condominio_id=current_user.condominio_id, is_ativo=True).order_by(Portaria.nome).all()
+
+# Todos os QR Codes das portarias ativas em um ZIP (para todos os condomínios: flask qrcodes exportar)
+@sindico.route('/portarias/qrcodes.zip')
+@login_required
+@permission_required('sindico')
+def exportar_qrcodes_portarias():
+    formato = request.args.get('formato', 'png')
+    if formato not in FORMATOS_QRCODE:
+        abort(404)
+    try:
+        dados = exportar_zip(itens_qrcodes_portarias(_portarias_ativas()), formato)
+    except ErroQrcode as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('sindico.listar_portarias'))
+    return Response(dados, mimetype='application/zip',
+                    headers={'Content-Disposition': f'attachment; filename=qrcodes_portarias_{formato}.zip'})
+
+# Folha para impressão com os QR Codes das portarias ativas, um por página
+@sindico.route('/portarias/qrcodes/imprimir')
+@login_required
+@permission_required('sindico')
+def imprimir_qrcodes_portarias():
+    portarias = _portarias_ativas()
+    try:
+        urls = urls_qrcodes([conteudo_qrcode_portaria(portaria) for portaria in portarias], 'svg')
+    except ErroQrcode as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('sindico.listar_portarias'))
+    return render_template('sindico/portaria_qrcodes_impressao.html',
+                           itens=list(zip(portarias, urls)),
+                           condominio=get_condominio_info(current_user.condominio_id))
+
 # ==============================================================================
 # Rotas para Gerenciar Porteiros (CRUD)
 # ==============================================================================
@@ -172,12 +313,14 @@ def gerar_qrcode_portaria(portaria_id):
 @sindico.route('/porteiros')
 @login_required
 @sindico_required
+@resposta_condicional(_carimbo_porteiros)
 def listar_porteiros():
     """Rota para listar todos os porteiros do condomínio do síndico."""
     # Filtra usuários com role 'porteiro' e pertencentes ao condomínio do síndico
     # O user atual logado é o sindico, logo é possível obter seu condomínio
     if current_user.condominio_id:
-        porteiros = User.query.filter_by(
+        # A portaria de cada porteiro vem na mesma consulta (exibida na tabela)
+        porteiros = User.query.options(joinedload(User.portaria)).filter_by(
             role='porteiro', 
             condominio_id=current_user.condominio_id
         ).all()
@@ -299,10 +442,57 @@ def adicionar_morador():
         titulo='Adicionar Morador'
     )
 
+@sindico.route('/usuarios/importar', methods=['GET', 'POST'])
+@login_required
+@sindico_required
+def importar_usuarios_planilha():
+    """
+    Valida ou importa uma planilha de moradores ou porteiros. A importação
+    grava os usuários sem senha e devolve um CSV com o link do convite de cada
+    um para definir a senha (ver app/convites.py).
+    """
+    form = ImportarUsuariosForm()
+    resultado = None
+
+    if form.validate_on_submit():
+        arquivo = form.arquivo.data
+        importar = form.importar.data
+        try:
+            resultado = importar_usuarios(
+                arquivo.stream, arquivo.filename, form.papel.data,
+                current_user.condominio_id, simular=not importar, convites=True
+            )
+        except ErroImportacao as e:
+            flash(str(e), 'danger')
+        else:
+            if resultado.erros:
+                flash(f'{len(resultado.erros)} linha(s) com erro. Corrija a planilha; nada foi importado.', 'danger')
+            elif resultado.convites:
+                return _csv_convites(resultado.convites)
+            else:
+                flash(f'{resultado.validas} linha(s) válidas. Clique em "Importar" para gravar os usuários.', 'info')
+
+    return render_template(
+        'sindico/importar_usuarios.html',
+        form=form,
+        resultado=resultado,
+        titulo='Importar Usuários'
+    )
+
+def _csv_convites(convites):
+    saida = io.StringIO()
+    escritor = csv.writer(saida)
+    escritor.writerow(['email', 'link'])
+    escritor.writerows((email, url_for('main.aceitar_convite', token=token, _external=True))
+                       for email, token in convites)
+    return Response(saida.getvalue(), mimetype='text/csv; charset=utf-8',
+                    headers={'Content-Disposition': 'attachment; filename=convites.csv'})
+
 # Rota para síndico listar moradores
 @sindico.route('/moradores')
 @login_required
 @sindico_required
+@resposta_condicional(_carimbo_usuarios)
 def sindico_listar_moradores():
     """Exibe uma lista de todos os moradores do condomínio do síndico."""
     moradores = User.query.filter_by(role='morador', condominio_id=current_user.condominio_id).all()
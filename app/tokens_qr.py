@@ -0,0 +1,72 @@
+# app/tokens_qr.py
+# Tokens assinados dos QR Codes das portarias.
+#
+# O QR Code impresso na portaria leva a URL de check-in com um token
+# "versao.portaria_id.condominio_id.assinatura", em que a assinatura é um
+# HMAC-SHA256 (truncado) do restante com a chave daquela versão. O check-in
+# confia no conteúdo verificado e não consulta portaria nem condomínio no banco.
+#
+# As chaves vêm de QR_CHAVES ("versao:segredo,..."); sem elas, a versão 1 é
+# derivada da SECRET_KEY. Novos códigos usam QR_CHAVE_ATUAL. Como o token não
+# tem estado, revogar é trocar de chave: removida uma versão, todos os códigos
+# impressos com ela deixam de valer e precisam ser gerados de novo.
+
+import base64
+import hashlib
+import hmac
+from flask import current_app
+
+# Bytes da assinatura mantidos no token (128 bits), para o QR Code ficar pequeno
+TAMANHO_ASSINATURA = 16
+
+
+class TokenInvalido(Exception):
+    """
+    Token malformado, com versão de chave desconhecida ou assinatura incorreta.
+    """
+
+
+def _chaves():
+    configuradas = current_app.config.get('QR_CHAVES')
+    if not configuradas:
+        derivada = hmac.new(current_app.config['SECRET_KEY'].encode(), b'easygate-qr-portaria', hashlib.sha256)
+        return {1: derivada.digest()}
+    chaves = {}
+    for item in configuradas.split(','):
+        versao, _, segredo = item.strip().partition(':')
+        chaves[int(versao)] = segredo.encode()
+    return chaves
+
+def _assinatura(chave, conteudo):
+    digest = hmac.new(chave, conteudo.encode(), hashlib.sha256).digest()[:TAMANHO_ASSINATURA]
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+
+def assinar_token_portaria(portaria_id, condominio_id, versao=None):
+    """
+    Token do QR Code da portaria, assinado com a chave QR_CHAVE_ATUAL (ou 'versao').
+    """
+    versao = versao or current_app.config.get('QR_CHAVE_ATUAL', 1)
+    chave = _chaves().get(versao)
+    if chave is None:
+        raise ValueError(f"Chave de QR Code da versão {versao} não configurada (QR_CHAVES).")
+    conteudo = f"{versao}.{portaria_id}.{condominio_id}"
+    return f"{conteudo}.{_assinatura(chave, conteudo)}"
+
+def verificar_token_portaria(token):
+    """
+    Retorna (portaria_id, condominio_id) do token, sem acessar o banco.
+    Levanta TokenInvalido se ele não puder ser verificado.
+    """
+    conteudo, _, assinatura = (token or '').rpartition('.')
+    try:
+        versao, portaria_id, condominio_id = (int(parte) for parte in conteudo.split('.'))
+    except ValueError:
+        raise TokenInvalido('Token malformado.')
+
+    chave = _chaves().get(versao)
+    if chave is None:
+        raise TokenInvalido('Versão de chave desconhecida ou revogada.')
+    if not hmac.compare_digest(assinatura.encode(), _assinatura(chave, conteudo).encode()):
+        raise TokenInvalido('Assinatura inválida.')
+    return portaria_id, condominio_id
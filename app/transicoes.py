@@ -0,0 +1,288 @@
+# app/transicoes.py
+# Máquina de estados do Acesso: pendente -> em_andamento -> finalizado.
+#
+# Cada transição é um UPDATE condicional, com o id, o condomínio (tenant) e o
+# status esperado no WHERE, e RETURNING das colunas usadas no consolidado
+# diário e no evento em tempo real. Se dois porteiros tocarem na mesma
+# pré-autorização, o banco serializa os UPDATEs e só o primeiro ainda encontra
+# o status esperado; o segundo recebe 'status_invalido' sem alterar nada.
+#
+# Como o UPDATE não passa pelo ORM, o consolidado (app/rollup.py) e o cache do
+# condomínio (app/cache.py) são atualizados aqui.
+#
+# A entrada sobrescreve data_acesso (e preenche a portaria), cujos valores
+# anteriores são necessários para desfazer a contribuição antiga no
+# consolidado. No PostgreSQL eles vêm de uma CTE com FOR UPDATE no mesmo
+# comando; nos demais bancos (o RETURNING do SQLite não lê tabelas do FROM)
+# são lidos antes, na mesma transação.
+#
+# encerrar_acessos finaliza vários acessos em andamento (troca de turno) em um
+# único UPDATE com RETURNING, com eventos agregados por condomínio. O mesmo
+# caminho é usado pelo encerramento automático dos acessos esquecidos em aberto.
+#
+# registrar_checkin_qr cria o acesso do check-in pelo QR Code da portaria com um
+# único INSERT ... SELECT ... RETURNING, a partir do token já verificado
+# (app/tokens_qr.py): o SELECT só devolve a portaria se ela ainda estiver ativa
+# e no condomínio do token.
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from sqlalchemy import DateTime, func, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
+from app.cache import cache_condominio
+from app.events import montar_evento, montar_eventos_lote, publicar_evento_acesso
+from app.models import Acesso, Portaria, Profissional, User, db
+from app.rollup import aplicar_deltas_rollup, deltas_alteracao
+
+logger = logging.getLogger('easygate.transicoes')
+
+# transição: (status esperado, novo status)
+TRANSICOES = {
+    'entrada': ('pendente', 'em_andamento'),
+    'saida': ('em_andamento', 'finalizado'),
+}
+
+
+@dataclass(frozen=True)
+class ResultadoTransicao:
+    """
+    Resultado de uma transição. É verdadeiro quando a transição foi aplicada.
+    motivo: 'nao_encontrado' (inexistente ou de outro condomínio) ou 'status_invalido'.
+    """
+    acesso_id: int
+    sucesso: bool
+    status: str = None
+    motivo: str = None
+    evento: dict = None
+
+    def __bool__(self):
+        return self.sucesso
+
+
+def _colunas_retorno(tabela):
+    usuarios = User.__table__
+    return (
+        tabela.c.id, tabela.c.condominio_id, tabela.c.portaria_id, tabela.c.status,
+        tabela.c.servico, tabela.c.data_acesso, tabela.c.data_saida,
+        select(Profissional.__table__.c.nome)
+        .where(Profissional.__table__.c.id == tabela.c.profissional_id)
+        .scalar_subquery().label('nome_profissional'),
+        select(usuarios.c.nome).where(usuarios.c.id == tabela.c.usuario_morador_id)
+        .scalar_subquery().label('morador_nome'),
+        select(usuarios.c.apartamento).where(usuarios.c.id == tabela.c.usuario_morador_id)
+        .scalar_subquery().label('apartamento'),
+    )
+
+def transicionar_acesso(acesso_id, transicao, condominio_id, porteiro_id=None, portaria_id=None):
+    """
+    Aplica a transição ('entrada' ou 'saida') ao acesso do condomínio, faz o
+    commit e publica o evento. Retorna um ResultadoTransicao.
+    """
+    esperado, novo = TRANSICOES[transicao]
+    tabela = Acesso.__table__
+    agora = datetime.now()
+    filtro = (tabela.c.id == acesso_id, tabela.c.condominio_id == condominio_id, tabela.c.status == esperado)
+    retorno = _colunas_retorno(tabela)
+
+    try:
+        if transicao == 'saida':
+            # Só status e data_saida mudam: os demais valores anteriores são os retornados
+            linha = db.session.execute(
+                update(tabela).where(*filtro).values(
+                    status=novo, data_saida=agora, usuario_porteiro_saida_id=porteiro_id
+                ).returning(*retorno)
+            ).mappings().first()
+            anterior = (linha['data_acesso'], linha['portaria_id']) if linha else None
+        else:
+            valores = dict(status=novo, data_acesso=agora, usuario_porteiro_id=porteiro_id,
+                           portaria_id=func.coalesce(tabela.c.portaria_id, portaria_id))
+            if db.session.get_bind().dialect.name == 'postgresql':
+                bloqueado = select(tabela.c.id, tabela.c.data_acesso, tabela.c.portaria_id) \
+                    .where(*filtro).with_for_update().cte('anterior')
+                linha = db.session.execute(
+                    update(tabela).where(tabela.c.id == bloqueado.c.id).values(**valores).returning(
+                        *retorno,
+                        bloqueado.c.data_acesso.label('data_acesso_anterior'),
+                        bloqueado.c.portaria_id.label('portaria_anterior'),
+                    )
+                ).mappings().first()
+                anterior = (linha['data_acesso_anterior'], linha['portaria_anterior']) if linha else None
+            else:
+                anterior = db.session.execute(
+                    select(tabela.c.data_acesso, tabela.c.portaria_id).where(*filtro)
+                ).first()
+                linha = db.session.execute(
+                    update(tabela).where(*filtro).values(**valores).returning(*retorno)
+                ).mappings().first() if anterior else None
+
+        if linha is None:
+            db.session.rollback()
+            status = db.session.execute(
+                select(tabela.c.status).where(tabela.c.id == acesso_id, tabela.c.condominio_id == condominio_id)
+            ).scalar()
+            return ResultadoTransicao(acesso_id, False, status,
+                                      'nao_encontrado' if status is None else 'status_invalido')
+
+        data_acesso_anterior, portaria_anterior = anterior
+        aplicar_deltas_rollup(db.session.connection(), deltas_alteracao(
+            (condominio_id, portaria_anterior, esperado, data_acesso_anterior, None),
+            (condominio_id, linha['portaria_id'], novo, linha['data_acesso'], linha['data_saida']),
+        ))
+        evento = montar_evento(transicao, linha, esperado, data_acesso_anterior)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    cache_condominio.invalidar(condominio_id, 'Acesso')
+    publicar_evento_acesso(evento)
+    return ResultadoTransicao(acesso_id, True, novo, evento=evento)
+
+
+# ==============================================================================
+# Saída em lote
+# ==============================================================================
+
+def encerrar_acessos(condominio_id=None, porteiro_id=None, acesso_ids=None, portaria_id=None,
+                     abertos_ha_mais_de=None, automatico=False):
+    """
+    Finaliza em um único UPDATE os acessos em andamento que atendem a todos os
+    filtros informados: ids, portaria e/ou entrada há mais de 'abertos_ha_mais_de'
+    (timedelta). Sem condominio_id, vale para todos os condomínios (apenas para
+    o encerramento automático). Retorna os ids finalizados.
+    """
+    tabela = Acesso.__table__
+    agora = datetime.now()
+    filtros = [tabela.c.status == 'em_andamento']
+    if condominio_id is not None:
+        filtros.append(tabela.c.condominio_id == condominio_id)
+    if acesso_ids is not None:
+        filtros.append(tabela.c.id.in_(acesso_ids))
+    if portaria_id is not None:
+        filtros.append(tabela.c.portaria_id == portaria_id)
+    if abertos_ha_mais_de is not None:
+        filtros.append(tabela.c.data_acesso < agora - abertos_ha_mais_de)
+
+    try:
+        linhas = db.session.execute(
+            update(tabela).where(*filtros).values(
+                status='finalizado', data_saida=agora,
+                usuario_porteiro_saida_id=porteiro_id, saida_automatica=automatico,
+            ).returning(tabela.c.id, tabela.c.condominio_id, tabela.c.portaria_id, tabela.c.data_acesso)
+        ).all()
+
+        deltas = None
+        ids_por_condominio = defaultdict(list)
+        for acesso_id, cid, portaria, data_acesso in linhas:
+            deltas = deltas_alteracao((cid, portaria, 'em_andamento', data_acesso, None),
+                                      (cid, portaria, 'finalizado', data_acesso, agora), deltas)
+            ids_por_condominio[cid].append(acesso_id)
+        if deltas:
+            aplicar_deltas_rollup(db.session.connection(), deltas)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    for cid, ids in ids_por_condominio.items():
+        cache_condominio.invalidar(cid, 'Acesso')
+        for evento in montar_eventos_lote(cid, ids, agora, automatico):
+            publicar_evento_acesso(evento)
+    return [linha[0] for linha in linhas]
+
+
+def encerrar_acessos_esquecidos(horas, condominio_id=None):
+    """
+    Encerramento automático: finaliza os acessos em andamento há mais de 'horas'.
+    """
+    ids = encerrar_acessos(condominio_id, abertos_ha_mais_de=timedelta(hours=horas), automatico=True)
+    if ids:
+        logger.info('Encerramento automático: %d acessos abertos há mais de %sh finalizados.', len(ids), horas)
+    return ids
+
+
+def iniciar_encerramento_automatico(app):
+    """
+    Agenda o encerramento automático (ENCERRAMENTO_AUTOMATICO_HORAS) a cada
+    ENCERRAMENTO_AUTOMATICO_INTERVALO segundos, em uma tarefa em segundo plano
+    iniciada na primeira requisição do worker: comandos da CLI não a disparam.
+    Com vários workers o UPDATE condicional evita finalizar o mesmo acesso duas vezes.
+    """
+    horas = app.config.get('ENCERRAMENTO_AUTOMATICO_HORAS')
+    if not horas:
+        return
+    intervalo = app.config.get('ENCERRAMENTO_AUTOMATICO_INTERVALO', 900)
+    iniciado = []
+
+    def executar():
+        from app import socketio
+        while True:
+            socketio.sleep(intervalo)
+            with app.app_context():
+                try:
+                    encerrar_acessos_esquecidos(horas)
+                except Exception:
+                    logger.exception('Falha no encerramento automático de acessos.')
+                finally:
+                    db.session.remove()
+
+    @app.before_request
+    def _iniciar_encerramento_automatico():
+        if not iniciado:
+            iniciado.append(True)
+            from app import socketio
+            socketio.start_background_task(executar)
+
+
+# ==============================================================================
+# Check-in pelo QR Code da portaria
+# ==============================================================================
+
+def registrar_checkin_qr(profissional_id, nome_profissional, condominio_id, portaria_id):
+    """
+    Cria a solicitação de entrada (status 'pendente') do profissional na
+    portaria do QR Code e publica o evento. Retorna um ResultadoTransicao;
+    motivo 'nao_encontrado' se a portaria não existir mais, estiver desativada
+    ou não for do condomínio do código.
+    """
+    tabela = Acesso.__table__
+    agora = datetime.now()
+    # INSERT ... SELECT: desativar a portaria revoga os QR Codes já impressos
+    # sem uma consulta a mais antes da gravação
+    valores = {
+        'condominio_id': literal(condominio_id), 'portaria_id': Portaria.id, 'profissional_id': literal(profissional_id),
+        'status': literal('pendente'), 'servico': literal('Aguardando verificação'),
+        'tipo_acesso': literal('qr_code'), 'data_acesso': literal(agora, DateTime),
+    }
+    try:
+        acesso_id = db.session.execute(
+            insert(tabela).from_select(
+                list(valores),
+                select(*valores.values()).where(
+                    Portaria.id == portaria_id, Portaria.condominio_id == condominio_id, Portaria.is_ativo.is_(True))
+            ).returning(tabela.c.id)
+        ).scalar_one_or_none()
+        if acesso_id is None:
+            db.session.rollback()
+            return ResultadoTransicao(None, False, motivo='nao_encontrado')
+        aplicar_deltas_rollup(db.session.connection(), deltas_alteracao(
+            None, (condominio_id, portaria_id, 'pendente', agora, None)))
+        evento = montar_evento('checkin', {
+            'id': acesso_id, 'condominio_id': condominio_id, 'portaria_id': portaria_id,
+            'status': 'pendente', 'servico': 'Aguardando verificação', 'data_acesso': agora, 'data_saida': None,
+            'nome_profissional': nome_profissional, 'morador_nome': None, 'apartamento': None,
+        })
+        db.session.commit()
+    except IntegrityError:
+        # Chave estrangeira: profissional excluído
+        db.session.rollback()
+        return ResultadoTransicao(None, False, motivo='nao_encontrado')
+    except Exception:
+        db.session.rollback()
+        raise
+
+    cache_condominio.invalidar(condominio_id, 'Acesso')
+    publicar_evento_acesso(evento)
+    return ResultadoTransicao(acesso_id, True, 'pendente', evento=evento)
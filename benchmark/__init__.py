@@ -0,0 +1,14 @@
+# benchmark/__init__.py
+# Benchmarks dos fluxos da portaria, do morador e do síndico.
+#
+#   python -m benchmark gerar --condominios 50 --moradores 200 --dias 180
+#   python -m benchmark executar --usuarios 20 --duracao 60 --saida benchmark/resultados/atual.json
+#   python -m benchmark executar --url http://localhost:5000 ...   (servidor em execução, ex.: gunicorn -k geventwebsocket)
+#   python -m benchmark executar --usuarios 20 --mistura '{"profissional": 1}'   (check-ins pelo QR Code por segundo)
+#   python -m benchmark logins --url http://localhost:5001 --concorrencia 30   (latência do Socket.IO durante logins)
+#   python -m benchmark comparar benchmark/resultados/base.json benchmark/resultados/atual.json
+#
+# O banco é o de DATABASE_URL (o mesmo do servidor, no modo --url). Use um
+# banco dedicado: os cenários criam pré-autorizações e fazem check-in/check-out.
+# Todos os logins saem do mesmo IP: rode o servidor com LIMITE_LOGIN_BACKEND=nenhum
+# (ver app/limitador.py) para não medir as recusas do limite de login.
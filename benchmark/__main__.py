@@ -0,0 +1,126 @@
+# benchmark/__main__.py
+# Linha de comando do benchmark (python -m benchmark --help).
+
+import json
+import click
+from app import create_app
+
+
+@click.group()
+def cli():
+    """Geração de dados e execução dos cenários de benchmark."""
+
+
+@cli.command()
+@click.option('--condominios', type=int, default=10, show_default=True)
+@click.option('--portarias', type=int, default=2, show_default=True, help='Por condomínio.')
+@click.option('--moradores', type=int, default=100, show_default=True, help='Por condomínio.')
+@click.option('--profissionais', type=int, default=1000, show_default=True)
+@click.option('--dias', type=int, default=90, show_default=True, help='Dias de histórico de acessos.')
+@click.option('--acessos-por-dia', type=int, default=20, show_default=True, help='Por condomínio.')
+@click.option('--pendentes', type=int, default=20, show_default=True,
+              help='Pré-autorizações para hoje, por condomínio (consumidas pelo check-in).')
+@click.option('--contas-profissionais', type=int, default=20, show_default=True,
+              help='Profissionais com login, para o check-in pelo QR Code.')
+@click.option('--semente', type=int, default=42, show_default=True)
+def gerar(**opcoes):
+    """Gera condomínios, usuários e histórico de acessos em volume."""
+    from app.seed import ParametrosGeracao, gerar_dados
+    app = create_app()
+    with app.app_context():
+        gerar_dados(ParametrosGeracao(**opcoes), log=click.echo)
+
+
+@cli.command()
+@click.option('--url', default=None, help='Servidor em execução (padrão: test_client do Flask, no processo).')
+@click.option('--usuarios', type=int, default=10, show_default=True, help='Usuários virtuais simultâneos.')
+@click.option('--duracao', type=float, default=30, show_default=True, help='Segundos de execução.')
+@click.option('--mistura', default=None, help='Pesos por papel em JSON, ex.: \'{"porteiro": 5, "sindico": 1}\'.')
+@click.option('--saida', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='Arquivo JSON com o resultado.')
+def executar(url, usuarios, duracao, mistura, saida):
+    """Executa os cenários e mede latência (percentis) e vazão por operação."""
+    from benchmark.cenarios import ErroCenario, executar as executar_cenarios, salvar
+    app = create_app()
+    try:
+        resultado = executar_cenarios(app, url=url, usuarios=usuarios, duracao=duracao,
+                                      mistura=json.loads(mistura) if mistura else None)
+    except ErroCenario as e:
+        raise click.ClickException(str(e))
+
+    click.echo(f"{'operação':28} {'qtd':>7} {'erros':>6} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for operacao, resumo in list(resultado['operacoes'].items()) + [('total', resultado['total'])]:
+        click.echo(f"{operacao:28} {resumo['quantidade']:>7} {resumo['erros']:>6} {resumo['vazao_por_s']:>8} "
+                   f"{resumo.get('p50_ms', '-'):>8} {resumo.get('p95_ms', '-'):>8} {resumo.get('p99_ms', '-'):>8}")
+    if saida:
+        salvar(resultado, saida)
+        click.echo(f"Resultado gravado em {saida}.")
+
+
+@cli.command()
+@click.option('--url', required=True, help='Servidor em execução (ex.: gunicorn com o worker gevent).')
+@click.option('--concorrencia', type=int, default=20, show_default=True, help='Logins simultâneos.')
+@click.option('--duracao', type=float, default=20, show_default=True, help='Segundos de cada fase.')
+@click.option('--saida', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='Arquivo JSON com o resultado.')
+def logins(url, concorrencia, duracao, saida):
+    """Latência do Socket.IO em repouso e durante uma rajada de logins."""
+    from benchmark.cenarios import ErroCenario, salvar
+    from benchmark.logins import executar_logins
+    try:
+        resultado = executar_logins(create_app(), url, concorrencia=concorrencia, duracao=duracao)
+    except ErroCenario as e:
+        raise click.ClickException(str(e))
+
+    click.echo(f"{'operação':28} {'qtd':>7} {'erros':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for operacao, resumo in resultado['operacoes'].items():
+        click.echo(f"{operacao:28} {resumo['quantidade']:>7} {resumo['erros']:>6} {resumo.get('p50_ms', '-'):>8} "
+                   f"{resumo.get('p95_ms', '-'):>8} {resumo.get('p99_ms', '-'):>8} {resumo.get('max_ms', '-'):>8}")
+    if saida:
+        salvar(resultado, saida)
+        click.echo(f"Resultado gravado em {saida}.")
+
+@cli.command()
+@click.option('--periodo', 'periodos', type=int, multiple=True, help='Dias exportados (repetível; padrão: 7, 30, 90 e 365).')
+@click.option('--formato', type=click.Choice(['csv', 'xlsx']), default='csv', show_default=True)
+@click.option('--saida', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='Arquivo JSON com o resultado.')
+def exportacao(periodos, formato, saida):
+    """Memória (RSS) da exportação do relatório de acessos por tamanho do período."""
+    from benchmark.cenarios import ErroCenario, salvar
+    from benchmark.exportacao import PERIODOS_PADRAO, executar_exportacao
+    try:
+        resultado = executar_exportacao(create_app(), periodos=periodos or PERIODOS_PADRAO, formato=formato)
+    except ErroCenario as e:
+        raise click.ClickException(str(e))
+
+    click.echo(f"{'período':12} {'linhas':>9} {'MB':>8} {'tempo':>7} {'RSS ini':>8} {'RSS pico':>9} {'acréscimo':>10}")
+    for periodo, resumo in resultado['exportacoes'].items():
+        click.echo(f"{periodo:12} {resumo['linhas'] if resumo['linhas'] is not None else '-':>9} "
+                   f"{resumo['tamanho_mb']:>8} {resumo['tempo_s']:>7} {resumo['rss_inicial_mb']:>8} "
+                   f"{resumo['rss_pico_mb']:>9} {resumo['acrescimo_rss_mb']:>10}")
+    if saida:
+        salvar(resultado, saida)
+        click.echo(f"Resultado gravado em {saida}.")
+
+@cli.command()
+@click.argument('base',type=click.Path(exists=True, dir_okay=False))
+@click.argument('atual', type=click.Path(exists=True, dir_okay=False))
+@click.option('--tolerancia', type=float, default=0.2, show_default=True, help='Piora aceitável (0.2 = 20%).')
+@click.option('--metrica', default='p95_ms', show_default=True)
+def comparar(base, atual, tolerancia, metrica):
+    """Compara dois resultados; sai com erro se alguma operação regrediu."""
+    from benchmark.cenarios import comparar as comparar_resultados
+    with open(base, encoding='utf-8') as arquivo_base, open(atual, encoding='utf-8') as arquivo_atual:
+        linhas = comparar_resultados(json.load(arquivo_base), json.load(arquivo_atual), tolerancia, metrica)
+
+    regressoes = 0
+    for operacao, anterior, valor, variacao, regrediu in linhas:
+        regressoes += regrediu
+        click.echo(f"{operacao:28} {anterior:>10} -> {valor:>10} ({variacao:+.1%}){'  REGRESSÃO' if regrediu else ''}")
+    if regressoes:
+        raise click.ClickException(f"{regressoes} operação(ões) com {metrica} acima da tolerância de {tolerancia:.0%}.")
+
+
+if __name__ == '__main__':
+    cli()
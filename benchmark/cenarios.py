@@ -0,0 +1,350 @@
+# benchmark/cenarios.py
+# Driver de cenários: usuários virtuais (threads) que repetem os fluxos da
+# portaria, do morador e do síndico e medem a latência de cada operação.
+#
+# Os mesmos cenários rodam contra o servidor de testes do Flask, no próprio
+# processo (ClienteTeste), ou contra um servidor HTTP em execução, como o
+# gunicorn com o worker gevent (ClienteHttp). Em ambos os casos as contas e as
+# pré-autorizações pendentes são lidas do banco gerado por app/seed.py.
+
+import http.cookiejar
+import json
+import re
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict, deque
+from datetime import date, datetime, timedelta
+from random import Random
+from app.models import Acesso, Portaria, User, db
+from app.seed import DOMINIO_EMAIL, SENHA_PADRAO
+from app.tokens_qr import assinar_token_portaria
+
+# Proporção de usuários virtuais por papel. O check-in pelo QR Code
+# ('profissional') fica de fora por padrão; para medir leituras por segundo
+# em um worker: --mistura '{"profissional": 1}'
+MISTURA_PADRAO = {'porteiro': 5, 'morador': 3, 'sindico': 2}
+PERCENTIS = (50, 90, 95, 99)
+_CSRF = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+# Termos da busca do acesso imediato, como digitados na portaria (nomes, empresa, apartamento)
+TERMOS_BUSCA = ('jo', 'joao', 'ana sil', 'conceicao', 'carvalho gomes', 'fibra', 'farmacia', '10')
+
+
+class ErroCenario(Exception):
+    """
+    Resposta inesperada em uma operação do cenário.
+    """
+
+
+# ==============================================================================
+# Clientes
+# ==============================================================================
+
+class ClienteTeste:
+    """
+    Requisições pelo test_client do Flask, no mesmo processo.
+    """
+
+    def __init__(self, app):
+        self.cliente = app.test_client()
+
+    def requisitar(self, metodo, caminho, dados=None, cabecalhos=None):
+        resposta = self.cliente.open(caminho, method=metodo, data=dados, headers=cabecalhos)
+        return resposta.status_code, resposta.get_data(as_text=True)
+
+
+class _SemRedirecionar(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+class ClienteHttp:
+    """
+    Requisições HTTP a um servidor em execução (ex.: gunicorn com worker gevent).
+    Redirecionamentos não são seguidos, como no test_client.
+    """
+
+    def __init__(self, url_base):
+        self.url_base = url_base.rstrip('/')
+        self.abridor = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _SemRedirecionar()
+        )
+
+    def requisitar(self, metodo, caminho, dados=None, cabecalhos=None):
+        corpo = urllib.parse.urlencode(dados).encode() if dados is not None else None
+        requisicao = urllib.request.Request(self.url_base + caminho, data=corpo, method=metodo,
+                                            headers=cabecalhos or {})
+        try:
+            with self.abridor.open(requisicao, timeout=30) as resposta:
+                return resposta.status, resposta.read().decode('utf-8', 'replace')
+        except urllib.error.HTTPError as erro:
+            return erro.code, erro.read().decode('utf-8', 'replace')
+
+
+def _esperar(status, esperado, operacao):
+    if status not in esperado:
+        raise ErroCenario(f"{operacao}: status {status}")
+
+def _csrf(html):
+    encontrado = _CSRF.search(html)
+    return encontrado.group(1) if encontrado else ''
+
+def entrar(cliente, email, senha):
+    status, html = cliente.requisitar('GET', '/login')
+    _esperar(status, (200,), 'login')
+    status, _ = cliente.requisitar('POST', '/login', {'csrf_token': _csrf(html), 'email': email, 'password': senha})
+    _esperar(status, (302,), 'login')
+
+
+# ==============================================================================
+# Cenários
+# ==============================================================================
+
+def cenario_porteiro(cliente, conta, contexto, medir):
+    """
+    Painel da portaria, busca do acesso imediato, check-in de uma
+    pré-autorização pendente e check-out.
+    """
+    medir('porteiro.painel', lambda: _esperar(cliente.requisitar('GET', '/porteiro/dashboard')[0], (200,), 'painel'))
+    consulta = urllib.parse.urlencode({'q': contexto.proximo_termo()})
+    medir('porteiro.busca', lambda: _pagina(cliente, f'/porteiro/api/busca?{consulta}'))
+    acesso_id = contexto.proximo_pendente(conta['condominio_id'])
+    if acesso_id is None:
+        return
+    json_aceito = {'Accept': 'application/json'}
+    medir('porteiro.checkin', lambda: _esperar(
+        cliente.requisitar('POST', f'/porteiro/autorizar-acesso/{acesso_id}', cabecalhos=json_aceito)[0],
+        (200,), 'checkin'))
+    medir('porteiro.checkout', lambda: _esperar(
+        cliente.requisitar('POST', f'/porteiro/registrar-saida/{acesso_id}', cabecalhos=json_aceito)[0],
+        (200,), 'checkout'))
+
+def cenario_morador(cliente, conta, contexto, medir):
+    """
+    Painel do morador e nova pré-autorização.
+    """
+    html = medir('morador.painel', lambda: _pagina(cliente, '/morador_dashboard'))
+    dados = {
+        'csrf_token': _csrf(html),
+        'servico': 'Entrega (benchmark)',
+        'empresa': 'Benchmark',
+        'data_prevista_acesso': date.today().isoformat(),
+        'observacoes_morador': '',
+    }
+    medir('morador.pre_autorizacao', lambda: _esperar(
+        cliente.requisitar('POST', '/morador_dashboard', dados)[0], (302,), 'pre_autorizacao'))
+
+def cenario_sindico(cliente, conta, contexto, medir):
+    """
+    Painel do síndico e relatório dos últimos 30 dias.
+    """
+    medir('sindico.painel', lambda: _pagina(cliente, '/sindico/dashboard'))
+    fim = date.today()
+    consulta = urllib.parse.urlencode({'data_inicio': (fim - timedelta(days=30)).isoformat(),
+                                       'data_fim': fim.isoformat()})
+    medir('sindico.relatorio', lambda: _pagina(cliente, f'/sindico/relatorios?{consulta}'))
+
+def cenario_profissional(cliente, conta, contexto, medir):
+    """
+    Leitura do QR Code de uma portaria (confirmação) e check-in com o token assinado.
+    """
+    token = contexto.proximo_token()
+    if token is None:
+        return
+    html = medir('profissional.confirmacao_qr', lambda: _pagina(cliente, f'/profissional/checkin/{token}'))
+    medir('profissional.checkin_qr', lambda: _esperar(
+        cliente.requisitar('POST', f'/profissional/checkin/{token}', {'csrf_token': _csrf(html)},
+                           cabecalhos={'Accept': 'application/json'})[0],
+        (201,), 'checkin_qr'))
+
+def _pagina(cliente, caminho):
+    status, html = cliente.requisitar('GET', caminho)
+    _esperar(status, (200,), caminho)
+    return html
+
+CENARIOS = {
+    'porteiro': cenario_porteiro,
+    'morador': cenario_morador,
+    'sindico': cenario_sindico,
+    'profissional': cenario_profissional,
+}
+
+
+# ==============================================================================
+# Execução
+# ==============================================================================
+
+class ContextoExecucao:
+    """
+    Contas de benchmark e pré-autorizações pendentes, compartilhadas entre os usuários virtuais.
+    """
+
+    def __init__(self):
+        self.contas = defaultdict(list)
+        self.pendentes = defaultdict(deque)
+        self.tokens = []
+        self._proximo_token = 0
+        self._proximo_termo = 0
+        self._lock = threading.Lock()
+
+    def carregar(self):
+        usuarios = db.session.query(User.email, User.role, User.condominio_id).filter(
+            User.email.like(f'%@{DOMINIO_EMAIL}'), User.role.in_(tuple(CENARIOS))
+        ).order_by(User.id)
+        for email, role, condominio_id in usuarios:
+            self.contas[role].append({'email': email, 'condominio_id': condominio_id})
+
+        condominios = {conta['condominio_id'] for conta in self.contas['porteiro']}
+        if condominios:
+            for acesso_id, condominio_id in db.session.query(Acesso.id, Acesso.condominio_id).filter(
+                    Acesso.condominio_id.in_(condominios), Acesso.status == 'pendente').order_by(Acesso.id):
+                self.pendentes[condominio_id].append(acesso_id)
+            self.tokens = [assinar_token_portaria(portaria_id, condominio_id) for portaria_id, condominio_id in
+                           db.session.query(Portaria.id, Portaria.condominio_id)
+                           .filter(Portaria.condominio_id.in_(condominios)).order_by(Portaria.id)]
+        db.session.remove()
+
+    def proximo_pendente(self, condominio_id):
+        with self._lock:
+            fila = self.pendentes.get(condominio_id)
+            return fila.popleft() if fila else None
+
+    def proximo_token(self):
+        with self._lock:
+            if not self.tokens:
+                return None
+            self._proximo_token += 1
+            return self.tokens[self._proximo_token % len(self.tokens)]
+
+    def proximo_termo(self):
+        with self._lock:
+            self._proximo_termo += 1
+            return TERMOS_BUSCA[self._proximo_termo % len(TERMOS_BUSCA)]
+
+
+def _usuario_virtual(criar_cliente, papel, conta, contexto, senha, fim, medicoes, erros, lock):
+    def medir(operacao, funcao):
+        inicio = time.perf_counter()
+        try:
+            resultado = funcao()
+        except Exception as erro:
+            with lock:
+                erros[operacao] += 1
+            raise ErroCenario(f"{operacao}: {erro}") from erro
+        with lock:
+            medicoes[operacao].append(time.perf_counter() - inicio)
+        return resultado
+
+    cliente = criar_cliente()
+    try:
+        medir(f'{papel}.login', lambda: entrar(cliente, conta['email'], senha))
+    except ErroCenario:
+        return
+    while time.monotonic() < fim:
+        try:
+            CENARIOS[papel](cliente, conta, contexto, medir)
+        except ErroCenario:
+            # A falha já foi contada; o usuário virtual segue para a próxima iteração
+            time.sleep(0.1)
+
+def _percentil(valores_ordenados, percentil):
+    indice = max(0, -(-len(valores_ordenados) * percentil // 100) - 1)
+    return valores_ordenados[indice]
+
+def _resumir(latencias, erros, duracao):
+    latencias = sorted(latencias)
+    resumo = {
+        'quantidade': len(latencias),
+        'erros': erros,
+        'vazao_por_s': round(len(latencias) / duracao, 2),
+    }
+    if latencias:
+        resumo['media_ms'] = round(sum(latencias) / len(latencias) * 1000, 2)
+        for percentil in PERCENTIS:
+            resumo[f'p{percentil}_ms'] = round(_percentil(latencias, percentil) * 1000, 2)
+        resumo['max_ms'] = round(latencias[-1] * 1000, 2)
+    return resumo
+
+def _versao_codigo():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def executar(app, url=None, usuarios=10, duracao=30, mistura=None, senha=SENHA_PADRAO, semente=42):
+    """
+    Roda 'usuarios' usuários virtuais por 'duracao' segundos e devolve o
+    resultado (latências por operação, vazão e erros) pronto para JSON.
+    Sem url, usa o test_client do Flask.
+    """
+    with app.app_context():
+        contexto = ContextoExecucao()
+        contexto.carregar()
+        dialeto = db.engine.dialect.name
+
+    mistura = mistura or MISTURA_PADRAO
+    pesos = {papel: peso for papel, peso in mistura.items() if peso > 0 and contexto.contas[papel]}
+    if not pesos:
+        raise ErroCenario(f"Nenhuma conta @{DOMINIO_EMAIL} no banco. Gere os dados com 'python -m benchmark gerar'.")
+
+    aleatorio = Random(semente)
+    criar_cliente = (lambda: ClienteHttp(url)) if url else (lambda: ClienteTeste(app))
+    medicoes, erros, lock = defaultdict(list), defaultdict(int), threading.Lock()
+    inicio = time.monotonic()
+    fim = inicio + duracao
+
+    threads = []
+    atribuidos = defaultdict(int)
+    for numero in range(usuarios):
+        # Cada novo usuário vai para o papel mais distante da sua proporção na mistura
+        papel = max(pesos, key=lambda papel: pesos[papel] * (numero + 1) / sum(pesos.values()) - atribuidos[papel])
+        atribuidos[papel] += 1
+        conta = aleatorio.choice(contexto.contas[papel])
+        thread = threading.Thread(target=_usuario_virtual, daemon=True, args=(
+            criar_cliente, papel, conta, contexto, senha, fim, medicoes, erros, lock))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    decorrido = time.monotonic() - inicio
+
+    operacoes = sorted(set(medicoes) | set(erros))
+    return {
+        'meta': {
+            'executado_em': datetime.now().isoformat(timespec='seconds'),
+            'versao': _versao_codigo(),
+            'alvo': url or 'test_client',
+            'banco': dialeto,
+            'usuarios': usuarios,
+            'duracao_s': round(decorrido, 2),
+            'mistura': mistura,
+        },
+        'operacoes': {operacao: _resumir(medicoes[operacao], erros[operacao], decorrido)
+                      for operacao in operacoes},
+        'total': _resumir([valor for valores in medicoes.values() for valor in valores],
+                          sum(erros.values()), decorrido),
+    }
+
+
+def comparar(base, atual, tolerancia=0.2, metrica='p95_ms'):
+    """
+    Compara dois resultados e devolve as linhas [(operacao, base, atual, variacao, regrediu)].
+    Uma operação regride quando a métrica piora mais que 'tolerancia' (0.2 = 20%).
+    """
+    linhas = []
+    for operacao, resumo in sorted(atual['operacoes'].items()):
+        anterior = base['operacoes'].get(operacao, {}).get(metrica)
+        valor = resumo.get(metrica)
+        if anterior is None or valor is None:
+            continue
+        variacao = (valor - anterior) / anterior if anterior else 0.0
+        linhas.append((operacao, anterior, valor, variacao, variacao > tolerancia))
+    return linhas
+
+
+def salvar(resultado, caminho):
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
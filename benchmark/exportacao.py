@@ -0,0 +1,111 @@
+# benchmark/exportacao.py
+# Memória da exportação do relatório de acessos (/sindico/relatorios/exportar).
+#
+# Exporta períodos cada vez maiores pelo test_client, no próprio processo,
+# consumindo a resposta em streaming, e mede o RSS do processo durante cada
+# exportação. Com a leitura em lotes (yield_per) e o CSV gerado linha a linha,
+# o acréscimo de RSS não deve crescer com o número de linhas exportadas.
+#
+# Lê o RSS de /proc/self/statm (Linux).
+
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from app.models import Acesso, User, db
+from app.seed import DOMINIO_EMAIL, SENHA_PADRAO
+from benchmark.cenarios import ClienteTeste, ErroCenario, _versao_codigo, entrar
+
+PERIODOS_PADRAO = (7, 30, 90, 365)
+
+
+def _rss_bytes():
+    with open('/proc/self/statm') as arquivo:
+        return int(arquivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+class MonitorRss:
+    """
+    Amostra o RSS do processo em uma thread e guarda o pico.
+    """
+
+    def __init__(self, intervalo=0.005):
+        self.intervalo = intervalo
+        self.inicial = self.pico = _rss_bytes()
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._amostrar, daemon=True)
+
+    def _amostrar(self):
+        while not self._parar.is_set():
+            self.pico = max(self.pico, _rss_bytes())
+            time.sleep(self.intervalo)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *excecao):
+        self._parar.set()
+        self._thread.join()
+        self.pico = max(self.pico, _rss_bytes())
+
+
+def _mb(valor):
+    return round(valor / (1024 * 1024), 1)
+
+def executar_exportacao(app, periodos=PERIODOS_PADRAO, formato='csv', senha=SENHA_PADRAO):
+    """
+    Exporta os últimos N dias para cada N em 'periodos' com o síndico do
+    condomínio com mais acessos e devolve linhas, bytes, tempo e RSS de cada exportação.
+    """
+    if not os.path.exists('/proc/self/statm'):
+        raise ErroCenario('A medição de RSS requer Linux (/proc/self/statm).')
+
+    with app.app_context():
+        dialeto = db.engine.dialect.name
+        condominio_id = (db.session.query(Acesso.condominio_id).group_by(Acesso.condominio_id)
+                         .order_by(db.func.count().desc()).limit(1).scalar())
+        email = db.session.query(User.email).filter(
+            User.role == 'sindico', User.condominio_id == condominio_id,
+            User.email.like(f'%@{DOMINIO_EMAIL}')).scalar() if condominio_id else None
+        db.session.remove()
+    if not email:
+        raise ErroCenario(f"Nenhum síndico @{DOMINIO_EMAIL} com acessos. Gere os dados com 'python -m benchmark gerar'.")
+
+    cliente = ClienteTeste(app)
+    entrar(cliente, email, senha)
+
+    exportacoes = {}
+    hoje = date.today()
+    for dias in periodos:
+        caminho = (f'/sindico/relatorios/exportar?formato={formato}'
+                   f'&data_inicio={(hoje - timedelta(days=dias)).isoformat()}&data_fim={hoje.isoformat()}')
+        tamanho = linhas = 0
+        inicio = time.perf_counter()
+        with MonitorRss() as monitor:
+            resposta = cliente.cliente.get(caminho, buffered=False)
+            if resposta.status_code != 200:
+                raise ErroCenario(f'exportação de {dias} dias: HTTP {resposta.status_code}')
+            for pedaco in resposta.iter_encoded():
+                tamanho += len(pedaco)
+                linhas += pedaco.count(b'\n')
+            resposta.close()
+        exportacoes[f'{dias}_dias'] = {
+            'linhas': linhas if formato == 'csv' else None,
+            'tamanho_mb': _mb(tamanho),
+            'tempo_s': round(time.perf_counter() - inicio, 2),
+            'rss_inicial_mb': _mb(monitor.inicial),
+            'rss_pico_mb': _mb(monitor.pico),
+            'acrescimo_rss_mb': _mb(monitor.pico - monitor.inicial),
+        }
+
+    return {
+        'meta': {
+            'executado_em': datetime.now().isoformat(timespec='seconds'),
+            'versao': _versao_codigo(),
+            'banco': dialeto,
+            'formato': formato,
+            'condominio_id': condominio_id,
+        },
+        'exportacoes': exportacoes,
+    }
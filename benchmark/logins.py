@@ -0,0 +1,99 @@
+# benchmark/logins.py
+# Latência do Socket.IO durante uma rajada de logins.
+#
+# Mede a ida e volta de mensagens Socket.IO (emit com confirmação) em um
+# servidor em execução, primeiro em repouso e depois com vários logins
+# simultâneos. Com o pbkdf2 calculado na greenlet da requisição, cada login
+# trava o worker do gevent e a latência do socket sobe junto; com o pool de
+# threads de app/senhas.py ela deve ficar próxima à de repouso.
+#
+# Requer o cliente do python-socketio: pip install "python-socketio[client]".
+
+import threading
+import time
+from datetime import datetime
+from app.seed import DOMINIO_EMAIL, SENHA_PADRAO
+from benchmark.cenarios import ClienteHttp, ContextoExecucao, ErroCenario, _resumir, _versao_codigo, entrar
+
+
+def _medir_socket(url, fim, intervalo, latencias, erros):
+    try:
+        import socketio
+    except ImportError:
+        raise ErroCenario('Instale o cliente do Socket.IO: pip install "python-socketio[client]".')
+
+    cliente = socketio.SimpleClient()
+    cliente.connect(url, transports=['websocket'])
+    try:
+        while time.monotonic() < fim:
+            inicio = time.perf_counter()
+            try:
+                # Sem login, o 'join' é ignorado pelo servidor, mas a confirmação volta
+                cliente.call('join', {'room': 'benchmark'}, timeout=30)
+            except socketio.exceptions.TimeoutError:
+                erros.append(1)
+            else:
+                latencias.append(time.perf_counter() - inicio)
+            time.sleep(intervalo)
+    finally:
+        cliente.disconnect()
+
+def _logar_em_loop(url, contas, senha, fim, latencias, erros, lock):
+    indice = 0
+    while time.monotonic() < fim:
+        # Um cliente novo por login: com a sessão aberta, /login só redireciona
+        conta = contas[indice % len(contas)]
+        indice += 1
+        inicio = time.perf_counter()
+        try:
+            entrar(ClienteHttp(url), conta['email'], senha)
+        except (ErroCenario, OSError):
+            with lock:
+                erros.append(1)
+            time.sleep(0.1)
+            continue
+        with lock:
+            latencias.append(time.perf_counter() - inicio)
+
+
+def executar_logins(app, url, concorrencia=20, duracao=20, intervalo=0.05, senha=SENHA_PADRAO):
+    """
+    Mede a latência do socket por 'duracao' segundos em repouso e mais
+    'duracao' segundos com 'concorrencia' logins simultâneos.
+    """
+    with app.app_context():
+        contexto = ContextoExecucao()
+        contexto.carregar()
+    contas = [conta for contas in contexto.contas.values() for conta in contas]
+    if not contas:
+        raise ErroCenario(f"Nenhuma conta @{DOMINIO_EMAIL} no banco. Gere os dados com 'python -m benchmark gerar'.")
+
+    repouso, erros_repouso = [], []
+    _medir_socket(url, time.monotonic() + duracao, intervalo, repouso, erros_repouso)
+
+    com_logins, erros_socket = [], []
+    logins, erros_login, lock = [], [], threading.Lock()
+    fim = time.monotonic() + duracao
+    threads = [threading.Thread(target=_logar_em_loop, daemon=True,
+                                args=(url, contas[numero::concorrencia] or contas, senha, fim, logins, erros_login, lock))
+               for numero in range(concorrencia)]
+    for thread in threads:
+        thread.start()
+    _medir_socket(url, fim, intervalo, com_logins, erros_socket)
+    for thread in threads:
+        thread.join()
+
+    return {
+        'meta': {
+            'executado_em': datetime.now().isoformat(timespec='seconds'),
+            'versao': _versao_codigo(),
+            'alvo': url,
+            'concorrencia': concorrencia,
+            'duracao_s': duracao,
+        },
+        'operacoes': {
+            'socket.repouso': _resumir(repouso, len(erros_repouso), duracao),
+            'socket.com_logins': _resumir(com_logins, len(erros_socket), duracao),
+            'login': _resumir(logins, len(erros_login), duracao),
+        },
+    }
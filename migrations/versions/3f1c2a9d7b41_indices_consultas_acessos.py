@@ -0,0 +1,46 @@
+"""Indices compostos e parciais para as consultas de acessos
+
+Revision ID: 3f1c2a9d7b41
+Revises: 8d9b6af03a79
+Create Date: 2026-10-17 09:12:44.103518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d7b41'
+down_revision = '8d9b6af03a79'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('acessos', schema=None) as batch_op:
+        batch_op.create_index('ix_acessos_condominio_status', ['condominio_id', 'status'], unique=False)
+        batch_op.create_index('ix_acessos_condominio_data_acesso', ['condominio_id', 'data_acesso'], unique=False)
+        batch_op.create_index('ix_acessos_morador_data_prevista', ['usuario_morador_id', 'data_prevista_acesso'], unique=False)
+        batch_op.create_index('ix_acessos_profissional_data_acesso', ['profissional_id', 'data_acesso'], unique=False)
+        batch_op.create_index(
+            'ix_acessos_abertos',
+            ['condominio_id', 'status', 'data_acesso'],
+            unique=False,
+            postgresql_where=sa.text("status IN ('pendente', 'em_andamento')"),
+            sqlite_where=sa.text("status IN ('pendente', 'em_andamento')"),
+        )
+
+    with op.batch_alter_table('usuarios', schema=None) as batch_op:
+        batch_op.create_index('ix_usuarios_condominio_role', ['condominio_id', 'role'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('usuarios', schema=None) as batch_op:
+        batch_op.drop_index('ix_usuarios_condominio_role')
+
+    with op.batch_alter_table('acessos', schema=None) as batch_op:
+        batch_op.drop_index('ix_acessos_abertos')
+        batch_op.drop_index('ix_acessos_profissional_data_acesso')
+        batch_op.drop_index('ix_acessos_morador_data_prevista')
+        batch_op.drop_index('ix_acessos_condominio_data_acesso')
+        batch_op.drop_index('ix_acessos_condominio_status')
@@ -0,0 +1,92 @@
+"""Consolidado diario de acessos (acessos_diarios)
+
+Revision ID: 7a4e9c1d2b58
+Revises: 3f1c2a9d7b41
+Create Date: 2026-10-17 10:41:07.552901
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4e9c1d2b58'
+down_revision = '3f1c2a9d7b41'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic')
+
+
+# Cópia de recalcular_rollup (app/rollup.py) nesta revisão: a migração não
+# acompanha mudanças na aplicação
+def _segundos_entre(inicio, fim, dialeto):
+    if dialeto == 'postgresql':
+        return sa.func.extract('epoch', fim - inicio)
+    return (sa.func.julianday(fim) - sa.func.julianday(inicio)) * 86400
+
+def _preencher(conexao):
+    acessos = sa.table(
+        'acessos', sa.column('condominio_id'), sa.column('portaria_id'), sa.column('status'),
+        sa.column('data_acesso', sa.DateTime()), sa.column('data_saida', sa.DateTime())
+    )
+    acessos_diarios = sa.table(
+        'acessos_diarios', sa.column('condominio_id'), sa.column('portaria_id'), sa.column('dia'),
+        sa.column('total'), sa.column('pendentes'), sa.column('em_andamento'), sa.column('finalizados'),
+        sa.column('permanencia_total_segundos'), sa.column('permanencia_quantidade')
+    )
+
+    finalizado_com_saida = (acessos.c.status == 'finalizado') & acessos.c.data_saida.isnot(None)
+    segundos = _segundos_entre(acessos.c.data_acesso, acessos.c.data_saida, conexao.dialect.name)
+    dia = sa.func.date(acessos.c.data_acesso)
+    portaria = sa.func.coalesce(acessos.c.portaria_id, 0)
+    consulta = sa.select(
+        acessos.c.condominio_id,
+        portaria,
+        dia,
+        sa.func.count(),
+        sa.func.count().filter(acessos.c.status == 'pendente'),
+        sa.func.count().filter(acessos.c.status == 'em_andamento'),
+        sa.func.count().filter(acessos.c.status == 'finalizado'),
+        sa.func.coalesce(sa.func.sum(sa.case(
+            (finalizado_com_saida, sa.cast(sa.func.round(segundos), sa.BigInteger)),
+            else_=sa.literal(0)
+        )), 0),
+        sa.func.count().filter(finalizado_com_saida),
+    ).where(
+        acessos.c.condominio_id.isnot(None),
+        acessos.c.data_acesso.isnot(None)
+    ).group_by(acessos.c.condominio_id, portaria, dia)
+
+    resultado = conexao.execute(acessos_diarios.insert().from_select(
+        ['condominio_id', 'portaria_id', 'dia', 'total', 'pendentes', 'em_andamento', 'finalizados',
+         'permanencia_total_segundos', 'permanencia_quantidade'],
+        consulta
+    ))
+    logger.info('acessos_diarios preenchido com %s linhas.', resultado.rowcount)
+
+
+def upgrade():
+    op.create_table('acessos_diarios',
+    sa.Column('condominio_id', sa.Integer(), nullable=False),
+    sa.Column('portaria_id', sa.Integer(), nullable=False),
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('pendentes', sa.Integer(), nullable=False),
+    sa.Column('em_andamento', sa.Integer(), nullable=False),
+    sa.Column('finalizados', sa.Integer(), nullable=False),
+    sa.Column('permanencia_total_segundos', sa.BigInteger(), nullable=False),
+    sa.Column('permanencia_quantidade', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['condominio_id'], ['condominios.id'], ),
+    sa.PrimaryKeyConstraint('condominio_id', 'portaria_id', 'dia')
+    )
+    # Preenche com os acessos existentes, na mesma transação da criação; a
+    # partir daqui o consolidado é mantido pela aplicação. Para reconstruí-lo
+    # depois: flask rollup backfill
+    _preencher(op.get_bind())
+
+
+def downgrade():
+    op.drop_table('acessos_diarios')
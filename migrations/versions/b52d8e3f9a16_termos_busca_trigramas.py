@@ -0,0 +1,95 @@
+"""Coluna termos_busca e indices de trigramas para a busca da portaria
+
+Revision ID: b52d8e3f9a16
+Revises: 7a4e9c1d2b58
+Create Date: 2026-10-17 14:05:31.227064
+
+"""
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b52d8e3f9a16'
+down_revision = '7a4e9c1d2b58'
+branch_labels = None
+depends_on = None
+
+TAMANHO_LOTE = 1000
+
+
+# Cópia da normalização de app/busca.py e app/models.py nesta revisão: a
+# migração não pode mudar se o código da aplicação mudar depois
+def _normalizar_busca(*partes):
+    texto = ' '.join(str(parte) for parte in partes if parte)
+    texto = unicodedata.normalize('NFKD', texto)
+    texto = ''.join(caractere for caractere in texto if not unicodedata.combining(caractere))
+    return ' '.join(texto.lower().split())
+
+def _normalizar_cpf(cpf):
+    return re.sub(r'\D', '', cpf or '') or None
+
+def _normalizar_placa(placa):
+    return re.sub(r'[^0-9A-Za-z]', '', placa or '').upper() or None
+
+def termos_profissional(nome, cpf, placa_veiculo, empresa):
+    return _normalizar_busca(nome, cpf, _normalizar_cpf(cpf), placa_veiculo, _normalizar_placa(placa_veiculo), empresa)
+
+def termos_usuario(nome, apartamento):
+    return _normalizar_busca(nome, apartamento)
+
+
+def _preencher(conexao, tabela, colunas, gerar_termos):
+    tabela_sql = sa.table(tabela, sa.column('id'), sa.column('termos_busca'), *(sa.column(c) for c in colunas))
+    atualizacao = tabela_sql.update()\
+        .where(tabela_sql.c.id == sa.bindparam('_id'))\
+        .values(termos_busca=sa.bindparam('_termos'))
+
+    ultimo_id = 0
+    while True:
+        linhas = conexao.execute(
+            sa.select(tabela_sql.c.id, *(tabela_sql.c[c] for c in colunas))
+            .where(tabela_sql.c.id > ultimo_id)
+            .order_by(tabela_sql.c.id)
+            .limit(TAMANHO_LOTE)
+        ).all()
+        if not linhas:
+            break
+        conexao.execute(atualizacao, [
+            {'_id': linha[0], '_termos': gerar_termos(*linha[1:])} for linha in linhas
+        ])
+        ultimo_id = linhas[-1][0]
+
+
+def upgrade():
+    with op.batch_alter_table('profissionais', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('termos_busca', sa.String(length=512), nullable=True))
+
+    with op.batch_alter_table('usuarios', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('termos_busca', sa.String(length=512), nullable=True))
+
+    conexao = op.get_bind()
+    _preencher(conexao, 'profissionais', ('nome', 'cpf', 'placa_veiculo', 'empresa'), termos_profissional)
+    _preencher(conexao, 'usuarios', ('nome', 'apartamento'), termos_usuario)
+
+    if conexao.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index('ix_profissionais_termos_busca_trgm', 'profissionais', ['termos_busca'],
+                        postgresql_using='gin', postgresql_ops={'termos_busca': 'gin_trgm_ops'})
+        op.create_index('ix_usuarios_termos_busca_trgm', 'usuarios', ['termos_busca'],
+                        postgresql_using='gin', postgresql_ops={'termos_busca': 'gin_trgm_ops'})
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_usuarios_termos_busca_trgm', table_name='usuarios')
+        op.drop_index('ix_profissionais_termos_busca_trgm', table_name='profissionais')
+
+    with op.batch_alter_table('usuarios', schema=None) as batch_op:
+        batch_op.drop_column('termos_busca')
+
+    with op.batch_alter_table('profissionais', schema=None) as batch_op:
+        batch_op.drop_column('termos_busca')
@@ -0,0 +1,91 @@
+"""CPF e placa normalizados em profissionais
+
+Revision ID: c8f3a1d6e274
+Revises: b52d8e3f9a16
+Create Date: 2026-10-17 15:22:48.610937
+
+"""
+import logging
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8f3a1d6e274'
+down_revision = 'b52d8e3f9a16'
+branch_labels = None
+depends_on = None
+
+TAMANHO_LOTE = 1000
+
+logger = logging.getLogger('alembic')
+
+
+# Cópia de app/models.py nesta revisão: a migração não acompanha mudanças na aplicação
+def normalizar_cpf(cpf):
+    return re.sub(r'\D', '', cpf or '') or None
+
+def normalizar_placa(placa):
+    return re.sub(r'[^0-9A-Za-z]', '', placa or '').upper() or None
+
+
+def _preencher(conexao):
+    profissionais = sa.table(
+        'profissionais', sa.column('id'), sa.column('cpf'), sa.column('placa_veiculo'),
+        sa.column('cpf_normalizado'), sa.column('placa_normalizada')
+    )
+    atualizacao = profissionais.update()\
+        .where(profissionais.c.id == sa.bindparam('_id'))\
+        .values(cpf_normalizado=sa.bindparam('_cpf'), placa_normalizada=sa.bindparam('_placa'))
+
+    cpfs_vistos = {}
+    duplicados = []
+    ultimo_id = 0
+    while True:
+        linhas = conexao.execute(
+            sa.select(profissionais.c.id, profissionais.c.cpf, profissionais.c.placa_veiculo)
+            .where(profissionais.c.id > ultimo_id)
+            .order_by(profissionais.c.id)
+            .limit(TAMANHO_LOTE)
+        ).all()
+        if not linhas:
+            break
+
+        valores = []
+        for id, cpf, placa in linhas:
+            cpf = normalizar_cpf(cpf)
+            # O mesmo CPF gravado com e sem pontuação: mantém o cadastro mais antigo
+            # no índice único e lista os demais para unificação manual
+            if cpf in cpfs_vistos:
+                duplicados.append((id, cpfs_vistos[cpf]))
+                cpf = None
+            elif cpf:
+                cpfs_vistos[cpf] = id
+            valores.append({'_id': id, '_cpf': cpf, '_placa': normalizar_placa(placa)})
+        conexao.execute(atualizacao, valores)
+        ultimo_id = linhas[-1][0]
+
+    for id, original in duplicados:
+        logger.warning('Profissional %s tem o mesmo CPF do profissional %s; cpf_normalizado ficou vazio.', id, original)
+
+
+def upgrade():
+    with op.batch_alter_table('profissionais', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cpf_normalizado', sa.String(length=14), nullable=True))
+        batch_op.add_column(sa.Column('placa_normalizada', sa.String(length=10), nullable=True))
+
+    _preencher(op.get_bind())
+
+    with op.batch_alter_table('profissionais', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_profissionais_cpf_normalizado'), ['cpf_normalizado'], unique=True)
+        batch_op.create_index(batch_op.f('ix_profissionais_placa_normalizada'), ['placa_normalizada'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('profissionais', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_profissionais_placa_normalizada'))
+        batch_op.drop_index(batch_op.f('ix_profissionais_cpf_normalizado'))
+        batch_op.drop_column('placa_normalizada')
+        batch_op.drop_column('cpf_normalizado')
@@ -0,0 +1,30 @@
+"""Porteiro da saída e saída automática em acessos
+
+Revision ID: e4b7d2c9a513
+Revises: c8f3a1d6e274
+Create Date: 2026-10-17 18:41:07.264190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b7d2c9a513'
+down_revision = 'c8f3a1d6e274'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('acessos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('usuario_porteiro_saida_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('saida_automatica', sa.Boolean(), nullable=False, server_default=sa.false()))
+        batch_op.create_foreign_key('fk_acessos_porteiro_saida', 'usuarios', ['usuario_porteiro_saida_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('acessos', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_acessos_porteiro_saida', type_='foreignkey')
+        batch_op.drop_column('saida_automatica')
+        batch_op.drop_column('usuario_porteiro_saida_id')
@@ -0,0 +1,33 @@
+"""updated_at em usuários, profissionais, acessos, portarias e condomínios
+
+Revision ID: f2a6c8e1d374
+Revises: e4b7d2c9a513
+Create Date: 2026-10-17 21:12:40.518327
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a6c8e1d374'
+down_revision = 'e4b7d2c9a513'
+branch_labels = None
+depends_on = None
+
+TABELAS = ('usuarios', 'profissionais', 'acessos', 'portarias', 'condominios')
+
+
+def upgrade():
+    # now() é estável: no PostgreSQL 11+ a coluna é adicionada sem reescrever a tabela
+    for tabela in TABELAS:
+        with op.batch_alter_table(tabela, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()))
+    op.create_index('ix_usuarios_condominio_updated_at', 'usuarios', ['condominio_id', 'updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_usuarios_condominio_updated_at', table_name='usuarios')
+    for tabela in reversed(TABELAS):
+        with op.batch_alter_table(tabela, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
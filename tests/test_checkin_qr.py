@@ -0,0 +1,125 @@
+# tests/test_checkin_qr.py
+# Check-in pelo QR Code da portaria: a leitura (GET) só mostra a confirmação e
+# o acesso é criado pelo POST com CSRF, em nome do cadastro do profissional.
+# Portarias desativadas não aceitam mais check-in.
+
+import pytest
+from app import transicoes
+from app.models import Acesso, Portaria, Profissional, User, db
+from app.seed import DOMINIO_EMAIL, SENHA_PADRAO
+from app.tokens_qr import assinar_token_portaria
+
+CONDOMINIO = 1
+JSON = {'Accept': 'application/json'}
+
+
+@pytest.fixture
+def portaria(app):
+    """
+    Portaria nova no condomínio 1, removida (com os acessos dela) no fim do teste.
+    """
+    with app.app_context():
+        portaria = Portaria(nome='Portaria QR', condominio_id=CONDOMINIO)
+        db.session.add(portaria)
+        db.session.commit()
+        portaria_id = portaria.id
+        db.session.remove()
+    yield portaria_id
+    with app.app_context():
+        Acesso.query.filter_by(portaria_id=portaria_id).delete()
+        Portaria.query.filter_by(id=portaria_id).delete()
+        db.session.commit()
+        db.session.remove()
+
+@pytest.fixture
+def eventos(monkeypatch):
+    publicados = []
+    monkeypatch.setattr(transicoes, 'publicar_evento_acesso', publicados.append)
+    return publicados
+
+
+def _token(app, portaria_id, condominio_id):
+    with app.app_context():
+        return assinar_token_portaria(portaria_id, condominio_id)
+
+def _acessos(app, portaria_id):
+    with app.app_context():
+        quantidade = Acesso.query.filter_by(portaria_id=portaria_id).count()
+        db.session.remove()
+    return quantidade
+
+
+def test_leitura_do_codigo_so_mostra_a_confirmacao(app, entrar, portaria):
+    cliente = entrar('profissional1')
+    resposta = cliente.get(f'/profissional/checkin/{_token(app, portaria, CONDOMINIO)}')
+    assert resposta.status_code == 200
+    assert 'Portaria QR' in resposta.get_data(as_text=True)
+    assert _acessos(app, portaria) == 0
+
+def _renomear_conta(app, email, nome):
+    with app.app_context():
+        user = User.query.filter_by(email=email).one()
+        nome_anterior, user.nome = user.nome, nome
+        nome_cadastro = db.session.get(Profissional, user.profissional_id).nome
+        db.session.commit()
+        db.session.remove()
+    return nome_anterior, nome_cadastro
+
+def test_confirmacao_cria_o_acesso_com_o_nome_do_cadastro(app, entrar, portaria, eventos):
+    email = f'profissional1@{DOMINIO_EMAIL}'
+    # O nome da conta de login pode diferir do nome no cadastro do profissional
+    nome_anterior, nome_cadastro = _renomear_conta(app, email, 'Apelido da Conta')
+    try:
+        cliente = entrar('profissional1')
+        resposta = cliente.post(f'/profissional/checkin/{_token(app, portaria, CONDOMINIO)}', headers=JSON)
+    finally:
+        _renomear_conta(app, email, nome_anterior)
+    assert resposta.status_code == 201
+    assert _acessos(app, portaria) == 1
+    assert [evento['nome_profissional'] for evento in eventos] == [nome_cadastro]
+
+def test_post_sem_csrf_e_recusado(app, entrar, portaria):
+    cliente = entrar('profissional1')
+    app.config['WTF_CSRF_ENABLED'] = True
+    try:
+        resposta = cliente.post(f'/profissional/checkin/{_token(app, portaria, CONDOMINIO)}', headers=JSON)
+    finally:
+        app.config['WTF_CSRF_ENABLED'] = False
+    assert resposta.status_code == 400
+    assert _acessos(app, portaria) == 0
+
+def test_portaria_desativada_nao_aceita_checkin(app, entrar, portaria, eventos):
+    with app.app_context():
+        db.session.get(Portaria, portaria).is_ativo = False
+        db.session.commit()
+        db.session.remove()
+    token = _token(app, portaria, CONDOMINIO)
+    cliente = entrar('profissional1')
+
+    assert cliente.get(f'/profissional/checkin/{token}').status_code == 302
+    assert cliente.post(f'/profissional/checkin/{token}', headers=JSON).status_code == 404
+    assert _acessos(app, portaria) == 0
+    assert eventos == []
+
+def test_token_de_outro_condominio_nao_aceita_checkin(app, entrar, portaria):
+    cliente = entrar('profissional1')
+    resposta = cliente.post(f'/profissional/checkin/{_token(app, portaria, CONDOMINIO + 1)}', headers=JSON)
+    assert resposta.status_code == 404
+    assert _acessos(app, portaria) == 0
+
+def test_conta_sem_cadastro_de_profissional(app, entrar, portaria):
+    with app.app_context():
+        user = User(nome='Sem Cadastro', email='sem.cadastro@teste.easygate.com.br', role='profissional')
+        user.set_senha(SENHA_PADRAO)
+        db.session.add(user)
+        db.session.commit()
+        db.session.remove()
+    try:
+        cliente = entrar('sem.cadastro@teste.easygate.com.br')
+        resposta = cliente.post(f'/profissional/checkin/{_token(app, portaria, CONDOMINIO)}', headers=JSON)
+        assert resposta.status_code == 403
+    finally:
+        with app.app_context():
+            User.query.filter_by(email='sem.cadastro@teste.easygate.com.br').delete()
+            db.session.commit()
+            db.session.remove()
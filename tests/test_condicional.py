@@ -0,0 +1,64 @@
+# tests/test_condicional.py
+# O ETag das páginas muda quando muda qualquer linha exibida nelas, inclusive
+# as relacionadas (portaria do porteiro, condomínio e morador dos acessos).
+
+import pytest
+from app.models import Condominio, Portaria, User, db
+from app.seed import DOMINIO_EMAIL
+from app.services import get_ultimos_acessos_profissional
+
+
+def _renomear(app, modelo, id_, nome):
+    with app.app_context():
+        linha = db.session.get(modelo, id_)
+        nome_anterior, linha.nome = linha.nome, nome
+        db.session.commit()
+        db.session.remove()
+    return nome_anterior
+
+@pytest.fixture
+def renomear(app):
+    """
+    Renomeia linhas durante o teste e devolve os nomes originais no fim.
+    """
+    originais = []
+
+    def _renomear_linha(modelo, id_, nome):
+        originais.append((modelo, id_, _renomear(app, modelo, id_, nome)))
+
+    yield _renomear_linha
+    for modelo, id_, nome in reversed(originais):
+        _renomear(app, modelo, id_, nome)
+
+
+def _etag_muda(cliente, url, alterar):
+    resposta = cliente.get(url)
+    assert resposta.status_code == 200 and resposta.headers.get('ETag')
+    assert cliente.get(url, headers={'If-None-Match': resposta.headers['ETag']}).status_code == 304
+    alterar()
+    nova = cliente.get(url, headers={'If-None-Match': resposta.headers['ETag']})
+    assert nova.status_code == 200
+    return nova.get_data(as_text=True)
+
+
+def test_lista_de_porteiros_muda_com_a_portaria(app, entrar, renomear):
+    with app.app_context():
+        portaria_id = User.query.filter_by(email=f'porteiro1.1@{DOMINIO_EMAIL}').one().portaria_id
+        db.session.remove()
+    html = _etag_muda(entrar('sindico1'), '/sindico/porteiros',
+                      lambda: renomear(Portaria, portaria_id, 'Portaria Renomeada'))
+    assert 'Portaria Renomeada' in html
+
+@pytest.mark.parametrize('modelo, coluna', [
+    (Condominio, 'condominio_id'),
+    (User, 'usuario_morador_id'),
+])
+def test_painel_do_profissional_muda_com_condominio_e_morador(app, entrar, renomear, modelo, coluna):
+    with app.app_context():
+        profissional_id = User.query.filter_by(email=f'profissional1@{DOMINIO_EMAIL}').one().profissional_id
+        exibidos = get_ultimos_acessos_profissional(profissional_id, limite=10)
+        id_ = next(getattr(acesso, coluna) for acesso in exibidos if getattr(acesso, coluna))
+        db.session.remove()
+    html = _etag_muda(entrar('profissional1'), '/profissional/dashboard',
+                      lambda: renomear(modelo, id_, f'{modelo.__name__} Renomeado'))
+    assert f'{modelo.__name__} Renomeado' in html
@@ -0,0 +1,83 @@
+# tests/test_identidade.py
+# A identidade do usuário logado fica na sessão enquanto a versão dele no
+# backend de cache não muda. Trocas de papel e exclusões valem na requisição
+# seguinte em todos os backends; sem backend, o usuário é lido do banco.
+
+import os
+import pytest
+from app.cache import CacheRedis, cache_condominio
+from app.identidade import CHAVE_SESSAO
+from app.models import Portaria, User, db
+from app.seed import SENHA_PADRAO
+
+CONDOMINIO = 1
+
+
+@pytest.fixture(params=['memoria', 'nenhum', 'redis'])
+def backend(request, monkeypatch):
+    if request.param == 'nenhum':
+        monkeypatch.setattr(cache_condominio, 'backend', None)
+    elif request.param == 'redis':
+        pytest.importorskip('redis')
+        if not os.environ.get('TEST_REDIS_URL'):
+            pytest.skip('requer um Redis (TEST_REDIS_URL)')
+        monkeypatch.setattr(cache_condominio, 'backend', CacheRedis(os.environ['TEST_REDIS_URL']))
+    return request.param
+
+@pytest.fixture
+def porteiro(app, backend):
+    """
+    Porteiro novo no condomínio 1; removido no fim do teste se ainda existir.
+    """
+    with app.app_context():
+        portaria = Portaria.query.filter_by(condominio_id=CONDOMINIO).first()
+        user = User(nome='Porteiro Identidade', email=f'identidade.{backend}@teste.easygate.com.br',
+                    role='porteiro', condominio_id=CONDOMINIO, portaria_id=portaria.id)
+        user.set_senha(SENHA_PADRAO)
+        db.session.add(user)
+        db.session.commit()
+        user_id, email = user.id, user.email
+        db.session.remove()
+    yield user_id, email
+    with app.app_context():
+        User.query.filter_by(id=user_id).delete()
+        db.session.commit()
+        db.session.remove()
+
+
+def _alterar(app, user_id, **campos):
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        for campo, valor in campos.items():
+            setattr(user, campo, valor)
+        db.session.commit()
+        db.session.remove()
+
+
+def test_troca_de_papel_vale_na_requisicao_seguinte(app, backend, porteiro, entrar):
+    user_id, email = porteiro
+    cliente = entrar(email)
+    assert cliente.get('/porteiro/dashboard').status_code == 200
+
+    _alterar(app, user_id, role='morador')
+    assert cliente.get('/porteiro/dashboard').status_code == 403
+
+def test_usuario_excluido_perde_a_sessao(app, backend, porteiro, entrar):
+    user_id, email = porteiro
+    cliente = entrar(email)
+    assert cliente.get('/porteiro/dashboard').status_code == 200
+
+    with app.app_context():
+        db.session.delete(db.session.get(User, user_id))
+        db.session.commit()
+        db.session.remove()
+    resposta = cliente.get('/porteiro/dashboard')
+    assert resposta.status_code == 302
+    assert '/login' in resposta.headers['Location']
+
+def test_identidade_so_fica_na_sessao_com_backend(backend, porteiro, entrar):
+    _, email = porteiro
+    cliente = entrar(email)
+    cliente.get('/porteiro/dashboard')
+    with cliente.session_transaction() as sessao:
+        assert (CHAVE_SESSAO in sessao) == (backend != 'nenhum')
@@ -0,0 +1,103 @@
+# tests/test_importacao.py
+# A tela de importação do síndico valida a planilha (relatório de erros por
+# linha, sem gravar) e importa sem gerar hashes: os usuários são gravados sem
+# senha e recebem um convite para defini-la. A linha de comando grava com senhas.
+
+import csv
+import io
+from app.importacao import importar_usuarios
+from app.models import User, db
+from app.seed import DOMINIO_EMAIL
+
+PLANILHA = ('nome;email;apartamento\n'
+            'Ana Importada;ana.importada@teste.easygate.com.br;101\n'
+            'Bruno Importado;bruno.importado@teste.easygate.com.br;102\n')
+
+PLANILHA_COM_ERROS = ('nome;email;apartamento\n'
+                      'Ana Importada;ana.importada@teste.easygate.com.br;101\n'
+                      'Sem Apartamento;bruno.importado@teste.easygate.com.br;\n'
+                      'E-mail Ruim;nao-e-email;103\n'
+                      'Repetida;ana.importada@teste.easygate.com.br;104\n'
+                      f'Já Cadastrado;morador1.1@{DOMINIO_EMAIL};105\n')
+
+NOVA_SENHA = 'senha-do-convite'
+
+
+def _emails(app):
+    with app.app_context():
+        emails = set(db.session.scalars(db.select(User.email).where(User.email.like('%importad%@teste.easygate.com.br'))))
+        db.session.remove()
+    return emails
+
+def _remover_importados(app):
+    with app.app_context():
+        User.query.filter(User.email.like('%importad%@teste.easygate.com.br')).delete(synchronize_session=False)
+        db.session.commit()
+        db.session.remove()
+
+def _enviar(cliente, planilha, importar=False):
+    dados = {'papel': 'morador', 'arquivo': (io.BytesIO(planilha.encode()), 'moradores.csv')}
+    if importar:
+        dados['importar'] = 'Importar e gerar convites'
+    return cliente.post('/sindico/usuarios/importar', data=dados, content_type='multipart/form-data')
+
+def _login(app, email, senha):
+    resposta = app.test_client().post('/login', data={'email': email, 'password': senha})
+    return not resposta.location.endswith('/login')
+
+
+def test_tela_valida_sem_gravar(app, entrar):
+    resposta = _enviar(entrar('sindico1'), PLANILHA)
+    assert resposta.status_code == 200
+    assert '2 linha(s) válidas' in resposta.get_data(as_text=True)
+    assert _emails(app) == set()
+
+def test_validacao_lista_os_erros_por_linha(app, contexto):
+    resultado = importar_usuarios(io.BytesIO(PLANILHA_COM_ERROS.encode()), 'moradores.csv', 'morador', 1, simular=True)
+    assert resultado.total_linhas == 5
+    assert resultado.validas == 1
+    assert [linha for linha, _ in resultado.erros] == [3, 4, 5, 6]
+    mensagens = dict(resultado.erros)
+    assert "'apartamento' não preenchido" in mensagens[3]
+    assert 'e-mail inválido' in mensagens[4]
+    assert 'e-mail repetido na linha 2' in mensagens[5]
+    assert 'e-mail já cadastrado' in mensagens[6]
+
+def test_tela_mostra_os_erros_e_nao_importa(app, entrar):
+    resposta = _enviar(entrar('sindico1'), PLANILHA_COM_ERROS, importar=True)
+    assert resposta.status_code == 200
+    html = resposta.get_data(as_text=True)
+    assert '4 linha(s) com erro' in html and 'e-mail repetido na linha 2' in html
+    assert _emails(app) == set()
+
+def test_importacao_pela_tela_gera_convites(app, entrar):
+    try:
+        resposta = _enviar(entrar('sindico1'), PLANILHA, importar=True)
+        assert resposta.status_code == 200
+        assert resposta.mimetype == 'text/csv'
+        links = dict(csv.reader(io.StringIO(resposta.get_data(as_text=True))))
+        assert set(links) - {'email'} == {'ana.importada@teste.easygate.com.br', 'bruno.importado@teste.easygate.com.br'}
+        # Gravados sem senha: ninguém entra antes de aceitar o convite
+        assert not _login(app, 'ana.importada@teste.easygate.com.br', NOVA_SENHA)
+
+        cliente = app.test_client()
+        link = links['ana.importada@teste.easygate.com.br']
+        assert cliente.get(link).status_code == 200
+        resposta = cliente.post(link, data={'password': NOVA_SENHA, 'password_confirm': NOVA_SENHA})
+        assert resposta.location.endswith('/login')
+        assert _login(app, 'ana.importada@teste.easygate.com.br', NOVA_SENHA)
+
+        # O convite vale uma vez só
+        assert cliente.get(link).location.endswith('/login')
+    finally:
+        _remover_importados(app)
+
+def test_importacao_pela_linha_de_comando_grava(app, contexto):
+    resultado = importar_usuarios(io.BytesIO(PLANILHA.encode()), 'moradores.csv', 'morador', 1, processos=1)
+    try:
+        assert resultado.inseridos == 2
+        assert len(resultado.senhas_geradas) == 2
+        assert _emails(app) == {'ana.importada@teste.easygate.com.br', 'bruno.importado@teste.easygate.com.br'}
+    finally:
+        User.query.filter(User.email.like('%importad%@teste.easygate.com.br')).delete(synchronize_session=False)
+        db.session.commit()
@@ -0,0 +1,74 @@
+# tests/test_indices.py
+# As consultas dos painéis em 'acessos' devem usar índice, nunca varrer a
+# tabela inteira (ver os índices de Acesso em app/models.py). Os comandos que
+# cada serviço executa são capturados e passados pelo EXPLAIN do banco.
+
+import json
+import pytest
+from sqlalchemy import select
+from app import db
+from app.models import Acesso, User
+from app import services
+
+CONDOMINIO = 1
+
+
+def _morador():
+    return db.session.scalar(select(User.id).where(User.condominio_id == CONDOMINIO, User.role == 'morador'))
+
+def _profissional():
+    return db.session.scalar(select(Acesso.profissional_id).where(Acesso.profissional_id.is_not(None)))
+
+CONSULTAS = {
+    'get_pre_autorizacoes_pendentes': lambda: services.get_pre_autorizacoes_pendentes(CONDOMINIO),
+    'get_acessos_em_andamento': lambda: services.get_acessos_em_andamento(CONDOMINIO),
+    'get_total_acessos_hoje': lambda: services.get_total_acessos_hoje(CONDOMINIO),
+    'get_ultimos_acessos_hoje': lambda: services.get_ultimos_acessos_hoje(CONDOMINIO),
+    'get_ultimas_movimentacoes_do_dia': lambda: services.get_ultimas_movimentacoes_do_dia(CONDOMINIO),
+    'get_acessos_morador': lambda: services.get_acessos_morador(_morador()),
+    'get_ultimos_acessos_profissional': lambda: services.get_ultimos_acessos_profissional(_profissional()),
+}
+
+
+def _comandos_em_acessos(contador_sql, consulta):
+    # Os ids de apoio são lidos antes, para não entrarem na captura
+    with contador_sql() as comandos:
+        consulta()
+    return [(sql, parametros) for sql, parametros in comandos.comandos if 'FROM acessos' in sql]
+
+def _nos_plano_postgresql(plano):
+    yield plano
+    for filho in plano.get('Plans', ()):
+        yield from _nos_plano_postgresql(filho)
+
+
+@pytest.mark.parametrize('nome', CONSULTAS)
+def test_consulta_usa_indice_sqlite(nome, contexto, contador_sql):
+    if db.engine.dialect.name != 'sqlite':
+        pytest.skip('EXPLAIN QUERY PLAN do SQLite')
+    comandos = _comandos_em_acessos(contador_sql, CONSULTAS[nome])
+    assert comandos, f'{nome} não consultou acessos'
+
+    for sql, parametros in comandos:
+        plano = [linha[-1] for linha in db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + sql, parametros)]
+        em_acessos = [detalhe for detalhe in plano if detalhe.split(' ')[1:2] == ['acessos']]
+        assert em_acessos, plano
+        # 'SEARCH acessos USING INDEX ...' é busca pelo índice; 'SCAN acessos' varre a tabela (ou o índice inteiro)
+        assert all(detalhe.startswith('SEARCH acessos USING') for detalhe in em_acessos), f'{nome}: {plano}'
+
+@pytest.mark.postgresql
+@pytest.mark.parametrize('nome', CONSULTAS)
+def test_consulta_usa_indice_postgresql(nome, contexto, contador_sql):
+    comandos = _comandos_em_acessos(contador_sql, CONSULTAS[nome])
+    assert comandos, f'{nome} não consultou acessos'
+
+    conexao = db.session.connection()
+    # Com poucas linhas o planejador prefere varrer a tabela; o teste verifica se existe índice utilizável
+    conexao.exec_driver_sql('SET LOCAL enable_seqscan = off')
+    for sql, parametros in comandos:
+        plano = conexao.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + sql, parametros).scalar()
+        if isinstance(plano, str):
+            plano = json.loads(plano)
+        varreduras = [no for no in _nos_plano_postgresql(plano[0]['Plan'])
+                      if no['Node Type'] == 'Seq Scan' and no.get('Relation Name') == 'acessos']
+        assert not varreduras, f'{nome}: {json.dumps(plano, indent=1)}'
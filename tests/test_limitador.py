@@ -0,0 +1,32 @@
+# tests/test_limitador.py
+# Poda dos baldes em memória do limite de login: os usados há mais tempo saem
+# primeiro, até FRACAO_APOS_PODA de max_baldes.
+
+from app.limitador import FRACAO_APOS_PODA, BaldesMemoria
+
+CAPACIDADE, TAXA = 5, 5 / 300
+
+
+def test_poda_remove_os_usados_ha_mais_tempo():
+    baldes = BaldesMemoria(max_baldes=100)
+    for numero in range(100):
+        baldes.consumir(f'ip:{numero}', CAPACIDADE, TAXA, agora=1000.0 + numero)
+    # O primeiro volta a ser usado e passa para o fim da fila
+    baldes.consumir('ip:0', CAPACIDADE, TAXA, agora=1100.0)
+
+    baldes.consumir('ip:novo', CAPACIDADE, TAXA, agora=1101.0)
+
+    chaves = [chave for chave, _, _ in baldes.estados(1000)]
+    assert len(chaves) == int(100 * FRACAO_APOS_PODA)
+    assert chaves[-2:] == ['ip:0', 'ip:novo']
+    assert 'ip:11' not in chaves and 'ip:12' in chaves
+
+def test_balde_podado_volta_cheio():
+    baldes = BaldesMemoria(max_baldes=10)
+    for _ in range(CAPACIDADE):
+        baldes.consumir('email:alvo@teste', CAPACIDADE, TAXA, agora=1000.0)
+    assert baldes.consumir('email:alvo@teste', CAPACIDADE, TAXA, agora=1000.0)[0] is False
+
+    for numero in range(10):
+        baldes.consumir(f'ip:{numero}', CAPACIDADE, TAXA, agora=1001.0)
+    assert baldes.consumir('email:alvo@teste', CAPACIDADE, TAXA, agora=1002.0)[0] is True
@@ -0,0 +1,27 @@
+# tests/test_metricas.py
+# /metrics só responde ao coletor com o token de METRICAS_TOKEN; sem token
+# configurado, o endpoint não existe.
+
+import pytest
+
+
+@pytest.fixture
+def token(app):
+    app.config['METRICAS_TOKEN'] = 'token-do-coletor'
+    yield 'token-do-coletor'
+    app.config['METRICAS_TOKEN'] = None
+
+
+def test_sem_token_configurado_nao_expoe(app):
+    assert app.config.get('METRICAS_TOKEN') is None
+    assert app.test_client().get('/metrics').status_code == 404
+
+@pytest.mark.parametrize('cabecalho', [None, 'Bearer errado', 'token-do-coletor'])
+def test_token_errado_e_recusado(app, token, cabecalho):
+    headers = {'Authorization': cabecalho} if cabecalho else {}
+    assert app.test_client().get('/metrics', headers=headers).status_code == 401
+
+def test_coletor_com_token(app, token):
+    resposta = app.test_client().get('/metrics', headers={'Authorization': f'Bearer {token}'})
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'text/plain'
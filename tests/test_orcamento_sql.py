@@ -0,0 +1,29 @@
+# tests/test_orcamento_sql.py
+# Orçamento de comandos SQL por requisição dos painéis e listas. Os valores
+# não dependem da quantidade de linhas exibidas: um relacionamento carregado
+# sob demanda no template (N+1) estoura o orçamento com os dados do seed.
+# Contam a primeira requisição depois do login, que lê o usuário do banco.
+
+import pytest
+from app.seed import SENHA_DEMONSTRACAO
+
+ORCAMENTOS = [
+    ('porteiro1.1', '/porteiro/dashboard', 5),
+    ('morador1.1', '/morador_dashboard', 2),
+    ('profissional1', '/profissional/dashboard', 4),
+    ('sindico1', '/sindico/dashboard', 7),
+    ('sindico1', '/sindico/moradores', 3),
+    ('sindico1', '/sindico/porteiros', 3),
+    ('sindico1', '/sindico/portarias', 3),
+    ('admin@autorizame.com.br', '/admin_dashboard', 3),
+    ('admin@autorizame.com.br', '/admin_user_list', 3),
+    ('admin@autorizame.com.br', '/admin_condominio_list', 3),
+]
+
+
+@pytest.mark.parametrize('conta, url, maximo', ORCAMENTOS)
+def test_orcamento_sql_por_requisicao(conta, url, maximo, entrar, contador_sql):
+    cliente = entrar(conta, SENHA_DEMONSTRACAO) if conta.endswith('@autorizame.com.br') else entrar(conta)
+    with contador_sql(maximo=maximo):
+        resposta = cliente.get(url)
+    assert resposta.status_code == 200
@@ -0,0 +1,37 @@
+# tests/test_painel_sindico.py
+# O painel do síndico é montado por get_sindico_dashboard_snapshot em três
+# consultas (contadores com agregação condicional e as duas listas), mais as
+# duas contagens em cache por condomínio quando o cache está frio.
+
+from datetime import date
+from app import services
+from app.cache import cache_condominio
+
+CONDOMINIO = 1
+
+
+def test_snapshot_em_tres_consultas_com_cache_quente(contexto, contador_sql):
+    services.get_sindico_dashboard_snapshot(CONDOMINIO)
+    with contador_sql() as comandos:
+        services.get_sindico_dashboard_snapshot(CONDOMINIO)
+    assert len(comandos) == 3, comandos.comandos
+
+def test_snapshot_com_cache_frio(contexto, contador_sql):
+    cache_condominio.invalidar(CONDOMINIO, 'User')
+    cache_condominio.invalidar(CONDOMINIO, 'Acesso')
+    with contador_sql() as comandos:
+        services.get_sindico_dashboard_snapshot(CONDOMINIO)
+    assert len(comandos) == 5, comandos.comandos
+
+def test_snapshot_igual_as_funcoes_individuais(contexto):
+    snapshot = services.get_sindico_dashboard_snapshot(CONDOMINIO)
+    assert snapshot.acessos_pendentes == len(services.get_pre_autorizacoes_pendentes(CONDOMINIO))
+    assert snapshot.total_moradores == len(services.get_all_moradores_do_condominio(CONDOMINIO))
+    assert snapshot.tempo_economizado_mes == services.calcular_tempo_economizado(CONDOMINIO)
+    assert snapshot.tempo_economizado_total == services.calcular_tempo_economizado_total(CONDOMINIO)
+    assert [acesso.id for acesso, *_ in snapshot.acessos_em_andamento] == \
+        [acesso.id for acesso, *_ in services.get_acessos_em_andamento(CONDOMINIO)]
+    assert snapshot.acessos_em_andamento
+
+def test_mes_atual_em_hora_local():
+    assert services._primeiro_dia_mes() == date.today().replace(day=1)
@@ -0,0 +1,192 @@
+# tests/test_pubsub.py
+# Dois "workers" (duas aplicações Flask, cada uma com seu SocketIO e seu
+# PostgresNotifyManager) ligados por um substituto local do LISTEN/NOTIFY do
+# PostgreSQL. Um evento emitido em um worker chega, uma única vez, aos clientes
+# da sala conectados aos dois.
+
+import os
+import threading
+import time
+from datetime import datetime
+import pytest
+from flask import Flask
+from flask_socketio import SocketIO, join_room
+from app.events import EVENTO_ACESSO, montar_eventos_lote, sala_condominio
+from app.pubsub import LIMITE_PAYLOAD_NOTIFY, PostgresNotifyManager
+
+
+class Notificacao:
+    def __init__(self, payload):
+        self.payload = payload
+
+
+class CursorLocal:
+    def __init__(self, conexao):
+        self.conexao = conexao
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        pass
+
+    def execute(self, comando, parametros=None):
+        if comando.startswith('LISTEN'):
+            self.conexao.broker.escutar(comando.split('"')[1], self.conexao)
+        elif comando == 'SELECT pg_notify(%s, %s)':
+            self.conexao.broker.notificar(*parametros)
+        else:
+            raise NotImplementedError(comando)
+
+
+class ConexaoLocal:
+    """
+    O que o PostgresNotifyManager usa de uma conexão psycopg2: cursor(), poll(),
+    notifies e um fileno() que fica legível quando chega uma notificação.
+    """
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.closed = False
+        self.notifies = []
+        self._pendentes = []
+        self._lock = threading.Lock()
+        self._leitura, self._escrita = os.pipe()
+
+    def cursor(self):
+        return CursorLocal(self)
+
+    def fileno(self):
+        return self._leitura
+
+    def entregar(self, payload):
+        with self._lock:
+            self._pendentes.append(Notificacao(payload))
+        os.write(self._escrita, b'.')
+
+    def poll(self):
+        os.read(self._leitura, 4096)
+        with self._lock:
+            self.notifies.extend(self._pendentes)
+            self._pendentes.clear()
+
+    def close(self):
+        self.closed = True
+
+
+class BrokerLocal:
+    """
+    Substituto do LISTEN/NOTIFY: entrega cada NOTIFY a todas as conexões que
+    escutam o canal, com o mesmo limite de payload do PostgreSQL.
+    """
+
+    def __init__(self):
+        self.ouvintes = {}
+        self.notificacoes = []
+        self._lock = threading.Lock()
+
+    def conectar(self):
+        return ConexaoLocal(self)
+
+    def escutar(self, canal, conexao):
+        with self._lock:
+            self.ouvintes.setdefault(canal, []).append(conexao)
+
+    def notificar(self, canal, payload):
+        if len(payload.encode('utf-8')) >= LIMITE_PAYLOAD_NOTIFY:
+            raise ValueError('payload string too long')
+        self.notificacoes.append(payload)
+        with self._lock:
+            ouvintes = list(self.ouvintes.get(canal, []))
+        for conexao in ouvintes:
+            conexao.entregar(payload)
+
+    def aguardar_ouvintes(self, canal, quantidade, timeout=5):
+        limite = time.monotonic() + timeout
+        while len(self.ouvintes.get(canal, [])) < quantidade:
+            assert time.monotonic() < limite, f'os workers não escutaram o canal {canal}'
+            time.sleep(0.01)
+
+
+def criar_worker(broker):
+    class GerenciadorLocal(PostgresNotifyManager):
+        def _conectar(self):
+            return broker.conectar()
+
+        def initialize(self):
+            # O cliente de teste chama initialize a cada conexão: uma só thread LISTEN
+            if getattr(self, 'thread', None) is None:
+                super().initialize()
+
+    app = Flask(__name__)
+    socketio = SocketIO(app, async_mode='threading',
+                        client_manager=GerenciadorLocal('postgresql://local/easygate'))
+
+    @socketio.on('connect')
+    def entrar_na_sala(auth):
+        join_room(sala_condominio((auth or {}).get('condominio_id', 1)))
+
+    return app, socketio
+
+
+def aguardar_eventos(cliente, timeout=2):
+    limite = time.monotonic() + timeout
+    while True:
+        recebidos = [pacote for pacote in cliente.get_received() if pacote['name'] == EVENTO_ACESSO]
+        if recebidos or time.monotonic() >= limite:
+            return recebidos
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    # O cliente de teste do Flask-SocketIO recusa gerenciadores com fila porque
+    # captura os envios só neste processo; aqui os dois workers estão nele.
+    monkeypatch.setattr('flask_socketio.test_client.PubSubManager', type('SemFila', (), {}))
+    broker = BrokerLocal()
+    return broker, criar_worker(broker), criar_worker(broker)
+
+
+def test_evento_de_um_worker_chega_aos_clientes_dos_dois(workers):
+    broker, (app_a, socketio_a), (app_b, socketio_b) = workers
+    cliente_a = socketio_a.test_client(app_a, auth={'condominio_id': 1})
+    cliente_b = socketio_b.test_client(app_b, auth={'condominio_id': 1})
+    outro_condominio = socketio_b.test_client(app_b, auth={'condominio_id': 2})
+    broker.aguardar_ouvintes('socketio', 2)
+
+    evento = {'tipo': 'entrada', 'acesso_id': 42, 'condominio_id': 1}
+    socketio_a.emit(EVENTO_ACESSO, evento, to=sala_condominio(1))
+
+    recebidos_b = aguardar_eventos(cliente_b)
+    recebidos_a = aguardar_eventos(cliente_a)
+    # Tempo para uma eventual entrega duplicada (o próprio NOTIFY voltando ao worker A)
+    time.sleep(0.2)
+    recebidos_a += aguardar_eventos(cliente_a, timeout=0)
+    recebidos_b += aguardar_eventos(cliente_b, timeout=0)
+
+    assert [pacote['args'] for pacote in recebidos_a] == [[evento]]
+    assert [pacote['args'] for pacote in recebidos_b] == [[evento]]
+    assert aguardar_eventos(outro_condominio, timeout=0.2) == []
+    assert len(broker.notificacoes) == 1
+
+# 500 é o limite de ids escolhidos pelo porteiro; por portaria ou por horas
+# (inclusive o encerramento automático) não há limite
+@pytest.mark.parametrize('quantidade', [500, 2000])
+def test_saida_em_lote_cabe_no_notify(workers, quantidade):
+    broker, (app_a, socketio_a), (app_b, socketio_b) = workers
+    cliente_b = socketio_b.test_client(app_b, auth={'condominio_id': 1})
+    socketio_a.test_client(app_a, auth={'condominio_id': 1})
+    broker.aguardar_ouvintes('socketio', 2)
+
+    # Ids com 10 dígitos, o pior caso para o tamanho da mensagem
+    acesso_ids = list(range(2_000_000_000, 2_000_000_000 + quantidade))
+    for evento in montar_eventos_lote(1, acesso_ids, datetime.now()):
+        socketio_a.emit(EVENTO_ACESSO, evento, to=sala_condominio(1))
+
+    recebidos, limite = [], time.monotonic() + 2
+    while sum(len(evento['acesso_ids']) for evento in recebidos) < len(acesso_ids) and time.monotonic() < limite:
+        recebidos += [pacote['args'][0] for pacote in aguardar_eventos(cliente_b, timeout=0.05)]
+
+    assert [acesso_id for evento in recebidos for acesso_id in evento['acesso_ids']] == acesso_ids
+    assert sum(evento['contadores']['em_andamento'] for evento in recebidos) == -len(acesso_ids)
+    assert all(len(payload.encode('utf-8')) < LIMITE_PAYLOAD_NOTIFY for payload in broker.notificacoes)
@@ -0,0 +1,31 @@
+# tests/test_qrcodes.py
+# As rotas web geram os QR Codes na própria requisição: o pool de processos
+# é só do comando 'flask qrcodes exportar'.
+
+import io
+import zipfile
+import pytest
+from app import qrcodes
+
+
+@pytest.fixture
+def sem_pool(monkeypatch):
+    def recusar(*args, **kwargs):
+        raise AssertionError('pool de processos iniciado no processo web')
+    # Como num servidor com vários núcleos e muitas portarias
+    monkeypatch.setattr(qrcodes.os, 'cpu_count', lambda: 4)
+    monkeypatch.setattr(qrcodes, 'MINIMO_IMAGENS_POOL', 0)
+    monkeypatch.setattr(qrcodes, 'ProcessPoolExecutor', recusar)
+
+
+def test_zip_das_portarias_sem_pool(entrar, sem_pool):
+    resposta = entrar('sindico1').get('/sindico/portarias/qrcodes.zip?formato=svg')
+    assert resposta.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(resposta.data)) as arquivo_zip:
+        nomes = arquivo_zip.namelist()
+    assert nomes and all(nome.endswith('.svg') for nome in nomes)
+
+def test_folha_de_impressao_sem_pool(entrar, sem_pool):
+    resposta = entrar('sindico1').get('/sindico/portarias/qrcodes/imprimir')
+    assert resposta.status_code == 200
+    assert '/qrcodes/' in resposta.get_data(as_text=True)
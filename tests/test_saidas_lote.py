@@ -0,0 +1,48 @@
+# tests/test_saidas_lote.py
+# A saída em lote só aceita um objeto JSON com acesso_ids (lista de inteiros),
+# portaria_id e horas finitas entre 0 e LIMITE_HORAS_LOTE; o resto é 400 e
+# nenhum acesso é finalizado.
+
+import pytest
+from app.porteiro import routes
+
+URL = '/porteiro/api/saidas-em-lote'
+
+
+@pytest.fixture
+def chamadas(monkeypatch):
+    registradas = []
+
+    def registrar(porteiro_id, condominio_id, **filtros):
+        registradas.append(filtros)
+        return []
+    monkeypatch.setattr(routes, 'registrar_saidas_em_lote', registrar)
+    return registradas
+
+
+@pytest.mark.parametrize('corpo', [
+    [1, 2],
+    'texto',
+    {},
+    {'horas': 'nan'},
+    {'horas': 'inf'},
+    {'horas': 1e12},
+    {'horas': -1},
+    {'acesso_ids': '12'},
+    {'acesso_ids': {'1': 2}},
+    {'acesso_ids': [1, '2']},
+    {'acesso_ids': [True]},
+    {'acesso_ids': []},
+    {'acesso_ids': list(range(routes.LIMITE_SAIDAS_LOTE + 1))},
+    {'portaria_id': 'abc'},
+])
+def test_corpo_invalido_e_recusado(entrar, chamadas, corpo):
+    resposta = entrar('porteiro1.1').post(URL, json=corpo)
+    assert resposta.status_code == 400
+    assert resposta.get_json()['sucesso'] is False
+    assert chamadas == []
+
+def test_corpo_valido_chega_ao_servico(entrar, chamadas):
+    resposta = entrar('porteiro1.1').post(URL, json={'acesso_ids': [1, 2], 'horas': routes.LIMITE_HORAS_LOTE})
+    assert resposta.status_code == 200
+    assert chamadas == [{'acesso_ids': [1, 2], 'portaria_id': None, 'horas': float(routes.LIMITE_HORAS_LOTE)}]